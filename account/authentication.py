@@ -0,0 +1,122 @@
+# authentication.py
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """A bounded, thread-safe LRU cache of token key -> (user, token, revocation stamp). Entries expire after a TTL.
+    The cache is per process. Signals invalidate it in the process that made the change, and other processes notice the change through the user's revocation stamp in the shared cache (see revoke_user_tokens).
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                return None
+
+            user, token, stamp, expires_at = entry
+
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+
+            # mark the entry as most recently used
+            self.entries.move_to_end(key)
+            return user, token, stamp
+
+    def set(self, key, user, token, stamp):
+        with self.lock:
+            self.entries[key] = (user, token, stamp, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+
+            # evict the least recently used entries
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self.lock:
+            keys = [key for key, (user, token, stamp, expires_at) in self.entries.items() if user.pk == user_id]
+            for key in keys:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+def get_revocation_key(user_id):
+    return f'auth_token_revoked:{user_id}'
+
+
+def get_revocation_stamp(user_id):
+    return cache.get(get_revocation_key(user_id))
+
+
+def revoke_user_tokens(user_id):
+    """Make every process drop its cached tokens of a user, e.g. after sign out or deactivation. A new revocation stamp is stored in the shared cache, and a cached token whose stamp differs from the current one is looked up in the database again.
+    The stamp only needs to outlive the cached entries, so it expires after TOKEN_CACHE_TTL. A stamp that expires or is evicted early only causes an extra database lookup.
+    """
+    cache.set(get_revocation_key(user_id), uuid.uuid4().hex, settings.TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that resolves token keys from token_cache. The database is only queried on a cache miss, and a cache hit costs one read of the user's revocation stamp from the shared cache.
+    Tokens are dropped from the cache when they are deleted (sign out, token rotation) and when their user is saved (e.g. deactivation). See the signal handlers in account.models.
+    No endpoint requires a token, so a request with an invalid or revoked token, e.g. one left behind by a client that signed out, is served anonymously instead of failing with 401, as it was before tokens were checked. That includes signing in and out again.
+    """
+
+    def authenticate(self, request):
+        try:
+            return super().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return None
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+
+        if cached is not None and cached[2] != get_revocation_stamp(cached[0].pk):
+            # the user's tokens were revoked in another process since the token was cached
+            token_cache.invalidate(key)
+            cached = None
+
+        if cached is None:
+            model = self.get_model()
+
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+
+            # the stamp is read after the token, so a revocation made after this lookup is always noticed
+            stamp = get_revocation_stamp(token.user_id)
+            token_cache.set(key, token.user, token, stamp)
+            cached = (token.user, token, stamp)
+
+        user, token, stamp = cached
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        # hand out a copy so changes made during one request don't leak into the cache
+        return copy.copy(user), token
@@ -0,0 +1,46 @@
+import datetime
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+from account.authentication import CachedTokenAuthentication, token_cache
+from account.models import Fan
+from team.models import Team
+
+
+class Command(BaseCommand):
+    help = 'Measure how long CachedTokenAuthentication takes to resolve a token with and without the token cache. A temporary fan and token are created and rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000, help='The number of lookups timed for each case.')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        authentication = CachedTokenAuthentication()
+
+        with transaction.atomic():
+            fan = Fan.objects.create_user(
+                email='benchmark@example.com', username='token_benchmark', birth_date=datetime.date(2000, 1, 1),
+                phone_no='token_benchmark', is_active=True, fav_team=Team.objects.first(),
+            )
+            key = Token.objects.create(user=fan).key
+
+            def time_lookups(clear_cache):
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    if clear_cache:
+                        token_cache.invalidate(key)
+                    authentication.authenticate_credentials(key)
+                return (time.perf_counter() - start) / iterations * 1e6
+
+            uncached = time_lookups(clear_cache=True)
+            # one lookup fills the cache, then every lookup is a hit
+            authentication.authenticate_credentials(key)
+            cached = time_lookups(clear_cache=False)
+
+            transaction.set_rollback(True)
+
+        token_cache.invalidate(key)
+
+        self.stdout.write(f'Uncached: {uncached:.1f}us per lookup')
+        self.stdout.write(f'Cached: {cached:.1f}us per lookup ({uncached / cached:.0f}x faster)')
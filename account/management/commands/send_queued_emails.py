@@ -0,0 +1,31 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from account.outbox import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbound emails in batches over a single SMTP connection. Use --loop to keep polling the outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE, help='The maximum number of emails sent per batch.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting once it is drained.')
+        parser.add_argument('--interval', type=float, default=settings.EMAIL_OUTBOX_POLL_INTERVAL, help='Seconds to wait between polls when the outbox is empty.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            sent, failed = send_queued_emails(batch_size)
+
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} email(s), {failed} failed')
+
+            # a full batch means there may be more due emails, so send again straight away
+            if sent + failed >= batch_size:
+                continue
+
+            if not options['loop']:
+                break
+
+            time.sleep(options['interval'])
@@ -1,6 +1,11 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 from account.managers import CustomUserManager
+from account.authentication import revoke_user_tokens, token_cache
 
 
 class Fan(AbstractUser):
@@ -14,3 +19,48 @@ class Fan(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+# Keep the authentication token cache in step with the database.
+# Deleting a token covers sign out and token rotation. Saving a fan covers deactivation.
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+    revoke_user_tokens(instance.user_id)
+
+
+@receiver(post_save, sender=Fan)
+def invalidate_cached_fan_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+    revoke_user_tokens(instance.pk)
+
+
+class OutboundEmail(models.Model):
+    
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Sending', 'Sending'),
+        ('Sent', 'Sent'),
+        ('Failed', 'Failed'),
+    ]
+    
+    id = models.AutoField(primary_key=True)
+    to_email = models.EmailField(null=False, blank=False)
+    subject = models.CharField(max_length=200, null=False, blank=False)
+    plain_message = models.TextField()
+    html_message = models.TextField(null=True, blank=True, default=None)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True, default=None)
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True, default=None)
+    
+    def __str__(self):
+        return self.subject + ' -> ' + self.to_email + ' (' + self.status + ')'
+    
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
@@ -0,0 +1,203 @@
+# outbox.py
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape, strip_tags
+from account.models import OutboundEmail
+
+
+ACTIVATION_EMAIL_SUBJECT = 'Activate Your APL Account'
+
+# The activation template is rendered once with this placeholder in place of the link.
+# Each user's link is then substituted into the cached copy instead of re-rendering the template.
+ACTIVATION_LINK_PLACEHOLDER = '__APL_ACTIVATION_LINK__'
+
+_activation_template_cache = {}
+
+
+def render_activation_email(activation_link):
+    """Render the activation mail for a user. The template is only rendered on the first call. Later calls substitute the link into the cached render.
+
+    Args:
+        activation_link: The user's activation link.
+
+    Returns:
+        A tuple of (plain_message, html_message).
+    """
+    if 'html' not in _activation_template_cache:
+        html_template = render_to_string('activation_mail_template.html', {'activation_link': ACTIVATION_LINK_PLACEHOLDER})
+        _activation_template_cache['html'] = html_template
+        _activation_template_cache['plain'] = strip_tags(html_template)
+
+    # the template autoescapes the link, so the substituted value is escaped the same way
+    escaped_link = escape(activation_link)
+    html_message = _activation_template_cache['html'].replace(ACTIVATION_LINK_PLACEHOLDER, escaped_link)
+    plain_message = _activation_template_cache['plain'].replace(ACTIVATION_LINK_PLACEHOLDER, escaped_link)
+    return plain_message, html_message
+
+
+def queue_email(to_email, subject, plain_message, html_message=None):
+    """Add an email to the outbox. It is sent later by the send_queued_emails management command.
+
+    Args:
+        to_email: The recipient's email address.
+        subject: The subject of the email.
+        plain_message: The plain text body of the email.
+        html_message: The HTML body of the email (Optional).
+
+    Returns:
+        The queued OutboundEmail.
+    """
+    return OutboundEmail.objects.create(
+        to_email=to_email,
+        subject=subject,
+        plain_message=plain_message,
+        html_message=html_message,
+    )
+
+
+def queue_activation_email(user, activation_link):
+    """Queue the activation mail for a user. See render_activation_email and queue_email.
+
+    Args:
+        user: The user the activation mail is for.
+        activation_link: The user's activation link.
+
+    Returns:
+        The queued OutboundEmail.
+    """
+    plain_message, html_message = render_activation_email(activation_link)
+    return queue_email(user.email, ACTIVATION_EMAIL_SUBJECT, plain_message, html_message)
+
+
+def get_retry_delay(attempts):
+    """Get how long to wait before retrying an email. The delay doubles after every failed attempt and is capped by EMAIL_OUTBOX_MAX_RETRY_DELAY.
+
+    Args:
+        attempts: The number of attempts made so far.
+
+    Returns:
+        A timedelta.
+    """
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def claim_due_emails(batch_size):
+    """Claim the next batch of due emails, in one short transaction. The rows are locked while they are claimed, so two workers never claim the same email, and are marked as 'Sending' so they are not claimed again while they are sent.
+    A claim lasts EMAIL_OUTBOX_SENDING_TIMEOUT. Emails still 'Sending' after that, e.g. because the worker sending them stopped, are claimed again.
+
+    Args:
+        batch_size: The maximum number of emails to claim.
+
+    Returns:
+        A list of OutboundEmail objects.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        due_emails = list(OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+            status__in=['Queued', 'Sending'],
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at')[:batch_size])
+
+        claim_expires_at = now + timedelta(seconds=settings.EMAIL_OUTBOX_SENDING_TIMEOUT)
+        OutboundEmail.objects.filter(id__in=[email.id for email in due_emails]).update(status='Sending', next_attempt_at=claim_expires_at)
+
+    for email in due_emails:
+        email.status = 'Sending'
+        email.next_attempt_at = claim_expires_at
+
+    return due_emails
+
+
+def send_queued_emails(batch_size=None):
+    """Send one batch of due emails over a single SMTP connection. Emails that fail are rescheduled with a backoff until EMAIL_OUTBOX_MAX_ATTEMPTS is reached, after which they are marked as failed.
+    The emails are claimed first (see claim_due_emails) and sent outside any transaction, and the result of each email is saved as soon as it is known. An error partway through a batch therefore doesn't undo the emails already sent, and no rows are locked while the SMTP server is waited on.
+
+    Args:
+        batch_size: The maximum number of emails to send. Defaults to EMAIL_OUTBOX_BATCH_SIZE.
+
+    Returns:
+        A tuple of (no_of_emails_sent, no_of_emails_failed).
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    sent = 0
+    failed = 0
+
+    emails = claim_due_emails(batch_size)
+
+    if not emails:
+        return sent, failed
+
+    connection = get_connection()
+
+    try:
+        connection.open()
+    except Exception as e:
+        # nothing could be sent, so the whole batch is retried later
+        for email in emails:
+            record_failed_attempt(email, e)
+        return sent, len(emails)
+
+    try:
+        for email in emails:
+            message = EmailMultiAlternatives(
+                subject=email.subject,
+                body=email.plain_message,
+                from_email=settings.EMAIL_HOST_USER,
+                to=[email.to_email],
+                connection=connection,
+            )
+
+            if email.html_message:
+                message.attach_alternative(email.html_message, 'text/html')
+
+            try:
+                message.send()
+            except Exception as e:
+                record_failed_attempt(email, e)
+                failed += 1
+                continue
+
+            record_sent(email)
+            sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
+
+
+def record_sent(email):
+    """Record that an email was sent. This is a single UPDATE, so it's committed on its own.
+
+    Args:
+        email: The OutboundEmail that was sent.
+    """
+    email.status = 'Sent'
+    email.attempts += 1
+    email.sent_at = timezone.now()
+    email.last_error = None
+    email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+
+
+def record_failed_attempt(email, error):
+    """Record a failed send attempt. The email is queued again with a backoff, or marked as failed if it has run out of attempts. This is a single UPDATE, so it's committed on its own.
+
+    Args:
+        email: The OutboundEmail that could not be sent.
+        error: The exception raised while sending.
+    """
+    email.attempts += 1
+    email.last_error = str(error)
+
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'Failed'
+    else:
+        email.status = 'Queued'
+        email.next_attempt_at = timezone.now() + get_retry_delay(email.attempts)
+
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
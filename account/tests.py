@@ -1,3 +1,168 @@
-from django.test import TestCase
+import datetime
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
+from account.authentication import CachedTokenAuthentication, TokenCache, revoke_user_tokens, token_cache
+from account.models import Fan, OutboundEmail
+from account.outbox import queue_email, send_queued_emails
+from team.models import Team
 
-# Create your tests here.
+
+class FailingEmailBackend(EmailBackend):
+    """A locmem backend that fails to send to any address starting with 'fail'."""
+
+    def send_messages(self, messages):
+        if any(address.startswith('fail') for message in messages for address in message.to):
+            raise SMTPException('Mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='account.tests.FailingEmailBackend',
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_DELAY=60,
+    EMAIL_OUTBOX_MAX_RETRY_DELAY=3600,
+    EMAIL_OUTBOX_SENDING_TIMEOUT=600,
+)
+class OutboxTests(TestCase):
+
+    def make_due(self, email):
+        OutboundEmail.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+
+    def test_queued_emails_are_sent(self):
+        queue_email('kofi@example.com', 'Welcome', 'Hello Kofi', '<p>Hello Kofi</p>')
+        queue_email('ama@example.com', 'Welcome', 'Hello Ama')
+
+        self.assertEqual(send_queued_emails(), (2, 0))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['ama@example.com', 'kofi@example.com'])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(OutboundEmail.objects.exclude(status='Sent').exists())
+
+        # sent emails are not sent again
+        self.assertEqual(send_queued_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_a_failed_email_does_not_undo_the_rest_of_the_batch(self):
+        queue_email('kofi@example.com', 'Welcome', 'Hello Kofi')
+        failing_email = queue_email('fail@example.com', 'Welcome', 'Hello')
+        queue_email('ama@example.com', 'Welcome', 'Hello Ama')
+
+        self.assertEqual(send_queued_emails(), (2, 1))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(OutboundEmail.objects.filter(status='Sent').count(), 2)
+
+        failing_email.refresh_from_db()
+        self.assertEqual(failing_email.status, 'Queued')
+        self.assertEqual(failing_email.last_error, 'Mailbox unavailable')
+
+    def test_failed_emails_are_retried_with_a_backoff(self):
+        email = queue_email('fail@example.com', 'Welcome', 'Hello')
+
+        before = timezone.now()
+        self.assertEqual(send_queued_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=60))
+
+        # not due yet
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+        self.make_due(email)
+        before = timezone.now()
+        self.assertEqual(send_queued_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 2)
+        # the delay doubles after every failed attempt
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=120))
+        self.assertLess(email.next_attempt_at, before + timedelta(seconds=180))
+
+    def test_emails_fail_after_the_maximum_attempts(self):
+        email = queue_email('fail@example.com', 'Welcome', 'Hello')
+
+        for _ in range(3):
+            self.make_due(email)
+            send_queued_emails()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'Failed')
+        self.assertEqual(email.attempts, 3)
+
+        self.make_due(email)
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+    def test_claimed_emails_are_claimed_again_after_the_timeout(self):
+        email = queue_email('kofi@example.com', 'Welcome', 'Hello Kofi')
+
+        # a worker claimed the email and stopped before sending it
+        OutboundEmail.objects.filter(id=email.id).update(status='Sending', next_attempt_at=timezone.now() + timedelta(seconds=600))
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+        self.make_due(email)
+        self.assertEqual(send_queued_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.fan = Fan.objects.create_user(
+            email='kofi@example.com', username='kofi', birth_date=datetime.date(2000, 1, 1),
+            phone_no='0200000000', is_active=True, fav_team=Team.objects.first(),
+        )
+        self.token = Token.objects.create(user=self.fan)
+        self.key = self.token.key
+        self.authentication = CachedTokenAuthentication()
+
+    def authenticate(self, method='post'):
+        request = getattr(APIRequestFactory(), method)('/', HTTP_AUTHORIZATION='Token ' + self.key)
+        return self.authentication.authenticate(request)
+
+    def test_cached_tokens_are_not_looked_up_again(self):
+        self.assertEqual(self.authenticate()[0].pk, self.fan.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate()[0].pk, self.fan.pk)
+
+    def test_tokens_revoked_in_another_process_are_looked_up_again(self):
+        self.authenticate()
+
+        # another process deactivated the fan: only the revocation stamp reaches this one. update() sends no signals, so this process's cache isn't cleared.
+        Fan.objects.filter(pk=self.fan.pk).update(is_active=False)
+        revoke_user_tokens(self.fan.pk)
+
+        self.assertIsNone(self.authenticate())
+
+    def test_tokens_revoked_by_a_sign_out_in_another_process_are_not_accepted(self):
+        # each process has its own token cache, but they share the revocation stamps
+        other_process_cache = TokenCache(10, 60)
+        self.authenticate()
+
+        with mock.patch('account.authentication.token_cache', other_process_cache):
+            self.assertEqual(self.authenticate()[0].pk, self.fan.pk)
+
+        response = APIClient().post('/account/logout/', {'token': self.key}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        with mock.patch('account.authentication.token_cache', other_process_cache):
+            self.assertIsNone(self.authenticate())
+
+    def test_requests_with_a_revoked_token_are_anonymous(self):
+        self.token.delete()
+
+        self.assertIsNone(self.authenticate('get'))
+        self.assertIsNone(self.authenticate('post'))
+
+        # e.g. a client signing in again with the token it had before signing out
+        self.fan.set_password('password')
+        self.fan.save()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + self.key)
+        response = client.post('/account/login/', {'email': self.fan.email, 'password': 'password'}, format='json')
+        self.assertEqual(response.status_code, 200)
@@ -1,15 +1,13 @@
 from django.utils import timezone
 from django.conf import settings
 from rest_framework import status
-from django.core.mail import send_mail
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from django.contrib.auth import authenticate
 from rest_framework.authtoken.models import Token
 from account.models import Fan
 from account.serializers import FanSerializer
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from account.outbox import queue_activation_email
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode  
 from django.utils.encoding import force_bytes, force_str
 
@@ -137,7 +135,7 @@ def sign_out(request):
 @api_view(['POST'])
 def send_activation_email(request):
     """
-    Send an email to a user to activate his account.
+    Send an email to a user to activate his account. The email is queued in the outbox and sent in the background by the send_queued_emails management command.
     
     Args:
         request: The request object containing the user's email. The email is used to retrieve the user from the database. The user object is used to generate the activation link. The activation link is sent to the user's email.
@@ -150,22 +148,9 @@ def send_activation_email(request):
         
         activation_link = generate_activation_link(user)
         
-        subject = 'Activate Your APL Account'
-        to_email = user.email
-
-        # HTML content for the email
-        html_message = render_to_string('activation_mail_template.html', {'activation_link': activation_link})
-
-        # Plain text version of the HTML content for non-HTML email clients
-        plain_message = strip_tags(html_message)
-
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[to_email],
-            html_message=html_message,  
-        )
+        # The email is added to the outbox and sent by the send_queued_emails management command,
+        # so the request doesn't wait on the SMTP server.
+        queue_activation_email(user, activation_link)
         
         return Response({'message': 'Activation email sent successfully'}, status=status.HTTP_200_OK)
     
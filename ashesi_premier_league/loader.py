@@ -0,0 +1,140 @@
+# loader.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import models
+from rest_framework import serializers
+
+
+class RelationLoader:
+    """Load the related objects of many serialized instances in batches. Keys are registered first (see prime and load_related), then the first lookup of a key resolves every pending key of the same kind with one query. The results are kept for the rest of the request, so e.g. a team nested in a hundred matches and events is loaded once.
+    A loader is made for each request by RelationLoaderMiddleware. It's only used to read: objects changed during the request after they were loaded aren't reloaded.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.pending = {}
+
+    def prime(self, kind, keys):
+        """Register keys to be resolved with the next lookup of their kind. Keys that are None or already resolved are ignored."""
+        results = self.results.get(kind, {})
+        self.pending.setdefault(kind, set()).update(key for key in keys if key is not None and key not in results)
+
+    def get(self, kind, key, fetch, default=None):
+        """Get the value of a key, resolving it and every pending key of its kind with one call to fetch.
+
+        Args:
+            kind: The kind of key, e.g. a model, or a name like 'player_goal_counts'.
+            key: The key, e.g. an id.
+            fetch: A function taking a set of keys and returning a dictionary of their values. Keys missing from the dictionary get the default.
+            default: The value of a key fetch didn't return.
+        """
+        results = self.results.setdefault(kind, {})
+
+        if key not in results:
+            keys = self.pending.pop(kind, set()) | {key}
+            values = fetch(keys)
+            for each in keys:
+                results[each] = values.get(each, default)
+
+        return results[key]
+
+    def load_related(self, instances, *paths):
+        """Load relations of many instances, with one id__in query per model for the related objects that aren't loaded yet, and store the related objects on the instances, so accessing the relations doesn't query the database.
+
+        Args:
+            instances: The instances, all of the same model.
+            paths: The relations to load, e.g. 'home_team' or 'match__match_day__season'. Foreign keys, one-to-one fields and reverse one-to-one relations are supported.
+        """
+        for path in paths:
+            name, _, rest = path.partition('__')
+            related_instances = self.load_relation(instances, name)
+
+            if rest:
+                self.load_related(related_instances, rest)
+
+    def load_relation(self, instances, name):
+        """Load one relation of many instances, see load_related. Returns the related objects that were found."""
+        instances = [instance for instance in instances if instance is not None]
+
+        if not instances:
+            return []
+
+        field = instances[0]._meta.get_field(name)
+        related_model = field.related_model
+
+        if field.concrete:
+            # a foreign key or one-to-one field: the related objects are looked up by their id
+            kind = related_model
+            get_key = lambda instance: getattr(instance, field.attname)
+            fetch = related_model._base_manager.in_bulk
+        else:
+            # a reverse one-to-one relation, e.g. a match event's goal: the related objects are looked up by the field pointing back
+            remote_field = field.remote_field
+            kind = (related_model, remote_field.name)
+            get_key = lambda instance: instance.pk
+            fetch = lambda keys: {getattr(obj, remote_field.attname): obj for obj in related_model._base_manager.filter(**{remote_field.attname + '__in': keys})}
+
+        unloaded = [instance for instance in instances if not field.is_cached(instance)]
+        self.prime(kind, (get_key(instance) for instance in unloaded))
+
+        for instance in unloaded:
+            key = get_key(instance)
+            field.set_cached_value(instance, None if key is None else self.get(kind, key, fetch))
+
+        related_instances = []
+
+        for instance in instances:
+            related_instance = field.get_cached_value(instance)
+            if related_instance is not None:
+                related_instances.append(related_instance)
+
+        return related_instances
+
+
+current_loader = ContextVar('current_loader', default=None)
+
+
+def get_loader():
+    """Get the current request's loader. Outside a request, e.g. in a management command, a new loader is returned, so nothing is kept between calls."""
+    return current_loader.get() or RelationLoader()
+
+
+@contextmanager
+def loader_scope():
+    """Use one loader until the block ends. The request's loader is used if there is one, otherwise a new loader is made for the block, e.g. when a view is rendered without the middleware (see fixture.archive.render_endpoint)."""
+    loader = current_loader.get()
+
+    if loader is not None:
+        yield loader
+        return
+
+    loader = RelationLoader()
+    token = current_loader.set(loader)
+
+    try:
+        yield loader
+    finally:
+        current_loader.reset(token)
+
+
+class RelationLoaderMiddleware:
+    """Give each request its own RelationLoader, see get_loader."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with loader_scope():
+            return self.get_response(request)
+
+
+class BatchedListSerializer(serializers.ListSerializer):
+    """A list serializer that loads the relations of every item before serializing them, by calling the child serializer's prime_relations(instances, loader) class method. Set it as the list_serializer_class of a serializer whose to_representation follows relations."""
+
+    def to_representation(self, data):
+        # like DRF's ListSerializer, only a manager is turned into a queryset, so a queryset the view already evaluated isn't queried again
+        instances = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+
+        with loader_scope() as loader:
+            self.child.prime_relations(instances, loader)
+            return [self.child.to_representation(instance) for instance in instances]
@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     'fixture.apps.FixtureConfig',
     'stats.apps.StatsConfig',
     'standings.apps.StandingsConfig',
+    'export.apps.ExportConfig',
     'corsheaders',
 ]
 
@@ -66,6 +67,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'fixture.middleware.SeasonArchiveMiddleware',
+    'ashesi_premier_league.loader.RelationLoaderMiddleware',
 ]
 
 ROOT_URLCONF = 'ashesi_premier_league.urls'
@@ -95,6 +98,66 @@ AUTHENTICATION_BACKENDS = [
 
 WSGI_APPLICATION = 'ashesi_premier_league.wsgi.application'
 
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'account.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
+
+# The cache is shared by every process through Redis when REDIS_URL is set (e.g. redis://localhost:6379/0), which it must be when more than one process
+# serves requests: sign outs and deactivations (see account.authentication) and changes to the in-memory search index and news timelines (see
+# ashesi_premier_league.versions) reach the other processes through it. Without it, each process has its own cache, which is only right for a single process.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Token -> user lookups are cached in memory by CachedTokenAuthentication
+TOKEN_CACHE_MAX_SIZE = 1024
+TOKEN_CACHE_TTL = 60 # seconds
+
+# Season card rankings are cached until a card in the season changes, or for at most this long
+CARD_RANKINGS_CACHE_TTL = 300 # seconds
+# Likewise for the man of the match rankings, until an award in the season changes
+MOTM_RANKINGS_CACHE_TTL = 300 # seconds
+# Players' careers are cached until one of their events, appearances, awards or transfers changes, or for at most this long
+PLAYER_CAREER_CACHE_TTL = 3600 # seconds
+
+# The length of a match, used to work out players' minutes played (see stats.appearances). Events in stoppage time count as the last minute.
+MATCH_LENGTH = 90 # minutes
+
+# The order teams level in a table are separated in. Positions are recomputed with these whenever a table changes (see standings.ranking).
+# Tiebreakers: 'points', 'goal_difference', 'goals_for', 'head_to_head' (points in the matches between the level teams) and 'name'
+STANDINGS_TIEBREAKERS = ['points', 'goal_difference', 'goals_for', 'head_to_head', 'name']
+
+# Every process keeps the player search index (see player.search) in memory. It's rebuilt when another process changes it, through a version in the
+# cache (see ashesi_premier_league.versions), and at least this often, to pick up changes that send no signals
+SEARCH_INDEX_REBUILD_INTERVAL = 600 # seconds
+
+# The same for the per-tag news timelines (see news.feed)
+NEWS_TIMELINES_REBUILD_INTERVAL = 600 # seconds
+
+# Archived seasons (see fixture.archive) never change, so clients may cache their responses for this long
+SEASON_ARCHIVE_MAX_AGE = 31536000 # seconds
+# How often each process checks which seasons have been archived or unarchived
+SEASON_ARCHIVE_REFRESH_INTERVAL = 60 # seconds
+
+# Where manage.py export_static_json writes the static JSON export of the public endpoints (see export.exporter)
+STATIC_EXPORT_ROOT = os.path.join(BASE_DIR, 'static_export')
+# How long the changes the export reads are kept. Each export prunes the older ones, and an export whose last run is older than this renders every file again
+EXPORT_CHANGE_RETENTION = 2592000 # seconds
+
 CORS_ALLOW_ALL = True
 
 CORS_ALLOWED_ORIGINS = [
@@ -158,6 +221,15 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 
+# Outbound email queue. Queued emails are sent by the send_queued_emails management command.
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60 # seconds. Doubles after every failed attempt.
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600 # seconds
+# How long a worker has to send the emails it claimed. Emails still being sent after this are claimed again, e.g. if the worker stopped.
+EMAIL_OUTBOX_SENDING_TIMEOUT = 600 # seconds
+EMAIL_OUTBOX_POLL_INTERVAL = 5 # seconds
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.1/topics/i18n/
@@ -0,0 +1,47 @@
+# testing.py
+"""Helpers for the apps' tests, to create the objects most of them need. The default teams, competitions, stages, positions and news tags are created by post_migrate, so they're looked up rather than created."""
+import datetime
+from fixture.models import Competition, Match, MatchDay, Referee, Season, Stage
+from player.models import Player, PlayerPosition
+from team.models import Team
+
+
+def get_teams(no_of_teams):
+    """Get the first default teams, in id order."""
+    return list(Team.objects.order_by('id')[:no_of_teams])
+
+
+def create_season(name='2023/24', start_date=datetime.date(2023, 9, 1), end_date=datetime.date(2024, 6, 1)):
+    return Season.objects.create(name=name, start_date=start_date, end_date=end_date)
+
+
+def create_match_day(season, number=1, date=None):
+    """Create a match day of a season. By default the nth match day is on the nth of October 2023."""
+    return MatchDay.objects.create(number=number, date=date or datetime.date(2023, 10, number), season=season)
+
+
+def create_player(team, gender='M', first_name='Kofi', last_name='Boateng', **fields):
+    fields.setdefault('position', PlayerPosition.objects.first())
+    return Player.objects.create(
+        first_name=first_name, last_name=last_name, gender=gender, birth_date=datetime.date(2000, 1, 1), year_group='2024', major='CS', team=team, **fields,
+    )
+
+
+def create_match(home_team, away_team, match_day, competition=None, stage_name=None, **fields):
+    """Create a started match. By default it's a men's Premier League match.
+
+    Args:
+        competition: The competition. It's optional.
+        stage_name: The name of the match's stage, e.g. 'Group Stage'. It's optional.
+        fields: Any other fields of the match, e.g. has_ended=True.
+    """
+    fields.setdefault('has_started', True)
+    fields.setdefault('match_time', '15:00')
+    fields.setdefault('referee', Referee.objects.get_or_create(first_name='Kwame', last_name='Mensah')[0])
+
+    return Match.objects.create(
+        home_team=home_team, away_team=away_team, match_day=match_day,
+        competition=competition or Competition.objects.get(name='Premier League', gender='M'),
+        stage=Stage.objects.get(name=stage_name) if stage_name else None,
+        **fields,
+    )
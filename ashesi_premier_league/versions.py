@@ -0,0 +1,34 @@
+# versions.py
+from django.core.cache import cache
+
+
+def get_version_cache_key(name):
+    return f'version:{name}'
+
+
+def get_shared_version(name):
+    """Get the version of some data every process keeps in memory, e.g. the player search index. It's 0 until the data first changes, or if the version was evicted from the cache.
+
+    Args:
+        name: The name of the data, e.g. 'search_index'.
+    """
+    return cache.get(get_version_cache_key(name), 0)
+
+
+def bump_shared_version(name):
+    """Tell every process that some data kept in memory has changed, so they reload it before using it again. The version is a counter in the cache, so with a shared cache backend (e.g. Memcached or Redis) it's shared by every process.
+
+    Args:
+        name: The name of the data.
+
+    Returns:
+        The new version, or None if it couldn't be incremented.
+    """
+    key = get_version_cache_key(name)
+    cache.add(key, 0, None)
+
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # evicted between add and incr. Reading it as 0 still makes every process reload.
+        return None
@@ -0,0 +1,136 @@
+# endpoints.py
+from functools import lru_cache
+from django.urls import reverse
+
+
+class ExportedEndpoint:
+    """A public GET endpoint that is exported to static JSON files, one file per value of its query parameter.
+
+    Args:
+        url_name: The name of the endpoint's url.
+        param: The name of the endpoint's query parameter, e.g. 'id', or None if it takes none.
+        get_values: A function returning every value of the query parameter to export.
+        entity: The label of the model whose id the parameter is, e.g. 'player.player'. A change to one of these objects only re-renders that object's file.
+        depends_on: The labels of the other models the endpoint's response is built from. A change to any of these re-renders every file of the endpoint.
+    """
+
+    def __init__(self, url_name, param=None, get_values=None, entity=None, depends_on=()):
+        self.url_name = url_name
+        self.param = param
+        self.get_values = get_values
+        self.entity = entity
+        self.depends_on = set(depends_on)
+
+    @property
+    def path(self):
+        return reverse(self.url_name)
+
+    def get_params(self):
+        """Get the query parameters of every file of the endpoint, e.g. [{'id': 1}, {'id': 2}]."""
+        if self.param is None:
+            return [{}]
+        return [{self.param: value} for value in self.get_values()]
+
+    def has_changed(self, changes, params):
+        """Whether the file of the endpoint for some query parameters has to be rendered again.
+
+        Args:
+            changes: A dictionary of model label -> set of ids of the objects changed since the last export.
+            params: The query parameters of the file.
+        """
+        if any(model in changes for model in self.depends_on):
+            return True
+
+        return self.entity is not None and params.get(self.param) in changes.get(self.entity, ())
+
+
+def get_ids(model_label):
+    def get_values():
+        from django.apps import apps
+        return list(apps.get_model(model_label).objects.order_by('id').values_list('id', flat=True))
+    return get_values
+
+
+def get_tag_names():
+    from news.models import NewsItemTag
+    return list(NewsItemTag.objects.order_by('id').values_list('name', flat=True))
+
+
+TEAMS = {'team.team'}
+PLAYERS = {'player.player', 'player.playerposition', 'team.team'}
+MATCHES = {'fixture.season', 'fixture.matchday', 'fixture.match', 'fixture.goal', 'fixture.competition', 'fixture.stage', 'fixture.referee', 'team.team'}
+MATCH_DETAILS = MATCHES | {'fixture.matchevent', 'fixture.substitution', 'fixture.startingxi', 'fixture.manofthematch', 'player.player'}
+STANDINGS = MATCHES | {'standings.standings', 'standings.standingsteam', 'fixture.teamform'}
+LEADERBOARDS = MATCH_DETAILS | {'player.playerposition', 'stats.playerdiscipline', 'stats.appearance'}
+NEWS = {'news.newsitem', 'news.newsitemtag'}
+
+EXPORTED_ENDPOINTS = [
+    ExportedEndpoint('get_teams', depends_on=TEAMS | {'player.player'}),
+    ExportedEndpoint('get_team', 'id', get_ids('team.team'), entity='team.team', depends_on={'fixture.teamform'}),
+    ExportedEndpoint('get_mens_players_in_team', 'id', get_ids('team.team'), depends_on=PLAYERS),
+    ExportedEndpoint('get_womens_players_in_team', 'id', get_ids('team.team'), depends_on=PLAYERS),
+    ExportedEndpoint('get_team_stats', 'id', get_ids('team.team'), depends_on=MATCH_DETAILS),
+    ExportedEndpoint('get_mens_team_stats', 'id', get_ids('team.team'), depends_on=MATCH_DETAILS),
+    ExportedEndpoint('get_womens_team_stats', 'id', get_ids('team.team'), depends_on=MATCH_DETAILS),
+
+    ExportedEndpoint('get_players', depends_on=PLAYERS),
+    ExportedEndpoint('get_player', 'id', get_ids('player.player'), entity='player.player', depends_on=PLAYERS - {'player.player'}),
+    ExportedEndpoint('get_coaches', depends_on={'player.coach', 'team.team'}),
+    ExportedEndpoint('get_coach', 'id', get_ids('player.coach'), entity='player.coach', depends_on=TEAMS),
+    ExportedEndpoint('get_positions', depends_on={'player.playerposition'}),
+    ExportedEndpoint('get_transfers', depends_on={'transfer.transfer'} | PLAYERS),
+
+    ExportedEndpoint('get_seasons', depends_on={'fixture.season'}),
+    ExportedEndpoint('get_season', 'id', get_ids('fixture.season'), entity='fixture.season'),
+    ExportedEndpoint('get_competitions', depends_on={'fixture.competition'}),
+    ExportedEndpoint('get_stages', depends_on={'fixture.stage'}),
+    ExportedEndpoint('get_season_fixtures', depends_on=MATCHES),
+    ExportedEndpoint('get_season_match_days', 'season_id', get_ids('fixture.season'), depends_on=MATCHES),
+    ExportedEndpoint('get_season_results', 'season_id', get_ids('fixture.season'), depends_on=MATCHES),
+    ExportedEndpoint('get_match_centre', 'id', get_ids('fixture.match'), depends_on=MATCH_DETAILS),
+
+    ExportedEndpoint('get_season_standings', 'season_id', get_ids('fixture.season'), depends_on=STANDINGS),
+    ExportedEndpoint('get_season_mens_league_standings', 'season_id', get_ids('fixture.season'), depends_on=STANDINGS),
+    ExportedEndpoint('get_season_womens_league_standings', 'season_id', get_ids('fixture.season'), depends_on=STANDINGS),
+    ExportedEndpoint('get_season_mens_fa_cup_group_standings', 'season_id', get_ids('fixture.season'), depends_on=STANDINGS),
+
+    ExportedEndpoint('get_mens_top_scorers', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_womens_top_scorers', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_mens_season_top_assisters', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_womens_season_top_assisters', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_mens_season_red_card_rankings', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_mens_season_yellow_card_rankings', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_womens_season_red_card_rankings', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_womens_season_yellow_card_rankings', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_mens_season_clean_sheet_rankings', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_womens_season_clean_sheet_rankings', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_season_suspensions', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_mens_season_minutes_played', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_womens_season_minutes_played', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_mens_season_motm_rankings', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+    ExportedEndpoint('get_womens_season_motm_rankings', 'season_id', get_ids('fixture.season'), depends_on=LEADERBOARDS),
+
+    ExportedEndpoint('get_news_items', depends_on=NEWS),
+    ExportedEndpoint('get_news_item', 'id', get_ids('news.newsitem'), entity='news.newsitem', depends_on={'news.newsitemtag'}),
+    ExportedEndpoint('get_news_feed', 'tags', get_tag_names, depends_on=NEWS | TEAMS),
+    ExportedEndpoint('get_tags', depends_on={'news.newsitemtag'}),
+]
+
+
+@lru_cache(maxsize=None)
+def get_tracked_models():
+    """Get the labels of every model an exported endpoint depends on. Only changes to these are recorded."""
+    tracked_models = set()
+
+    for endpoint in EXPORTED_ENDPOINTS:
+        tracked_models |= endpoint.depends_on
+        if endpoint.entity:
+            tracked_models.add(endpoint.entity)
+
+    return frozenset(tracked_models)
+
+
+@lru_cache(maxsize=None)
+def get_entity_models():
+    """Get the labels of the models some endpoint has one file per object of. The ids of the changed objects are only recorded for these."""
+    return frozenset(endpoint.entity for endpoint in EXPORTED_ENDPOINTS if endpoint.entity)
@@ -0,0 +1,160 @@
+# exporter.py
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.http import urlencode
+from django.utils.text import slugify
+from export.endpoints import EXPORTED_ENDPOINTS
+from export.models import ExportChange
+from fixture.archive import render_endpoint
+from fixture.models import SeasonArchive
+
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def get_request_key(path, params):
+    """Get the request a file answers, e.g. '/player/get?id=3'. This is the key of the file in the manifest."""
+    return path + ('?' + urlencode(params) if params else '')
+
+
+def get_file_name(path, params, content_hash):
+    """Get the name of a file from the request it answers and a hash of its content, e.g. 'player/get/id-3.1a2b3c4d5e6f7a8b.json'. A new name is used whenever the content changes, so the files can be cached forever."""
+    name = '_'.join(name + '-' + slugify(str(value)) for name, value in params.items()) or 'index'
+    return f'{path.strip("/")}/{name}.{content_hash}.json'
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+
+
+def write_file(output_dir, file_name, content):
+    """Write a file atomically, so a reader never sees half of it."""
+    file_path = os.path.join(output_dir, file_name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    with open(file_path + '.tmp', 'w') as temp_file:
+        temp_file.write(content)
+
+    os.replace(file_path + '.tmp', file_path)
+
+
+def remove_file(output_dir, file_name):
+    try:
+        os.remove(os.path.join(output_dir, file_name))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def get_changes(last_change_id, max_change_id):
+    """Get the objects changed since the last export.
+
+    Returns:
+        A dictionary of model label -> set of ids of the changed objects.
+    """
+    changes = {}
+
+    for model, object_id in ExportChange.objects.filter(id__gt=last_change_id, id__lte=max_change_id).values_list('model', 'object_id'):
+        changes.setdefault(model, set()).add(object_id)
+
+    return changes
+
+
+def export_static_json(output_dir, full=False):
+    """Render every exported endpoint (see export.endpoints) to a directory of static JSON files, and write a manifest of which file answers which request.
+    Only files whose endpoint depends on something that changed since the last export are rendered again, unless full is True or the last export is older than EXPORT_CHANGE_RETENTION, whose changes may have been pruned since. Archived seasons are read from their archive instead of being rendered. Files are named after a hash of their content, so a file is only written when its content changes, and the files the new manifest no longer refers to are deleted.
+    If any file fails to render, the export is abandoned: the files it wrote are deleted and the manifest is left as it was, so the export never serves a mix of old and new files. Otherwise, the recorded changes older than EXPORT_CHANGE_RETENTION are pruned.
+
+    Args:
+        output_dir: The directory to export to.
+        full: Whether to render every file again, whatever has changed.
+
+    Returns:
+        A dictionary with the number of files rendered, written and deleted, and the requests that failed to render. The export was abandoned if any failed.
+    """
+    manifest = load_manifest(output_dir)
+    # Changes made while the export runs are picked up by the next export
+    max_change_id = ExportChange.objects.aggregate(Max('id'))['id__max'] or 0
+    retention_start = timezone.now() - timedelta(seconds=settings.EXPORT_CHANGE_RETENTION)
+
+    if manifest is None or full or datetime.fromisoformat(manifest['generated_at']) < retention_start:
+        old_files = manifest['files'] if manifest else {}
+        changes = None
+    else:
+        old_files = manifest['files']
+        changes = get_changes(manifest['last_change_id'], max_change_id)
+
+    archived_responses = {
+        (path, season_id): (status_code, content)
+        for path, season_id, status_code, content in SeasonArchive.objects.values_list('path', 'season_id', 'status_code', 'content')
+    }
+
+    files = {}
+    counts = {'rendered': 0, 'written': 0, 'deleted': 0, 'failed': []}
+    written_file_names = []
+
+    for endpoint in EXPORTED_ENDPOINTS:
+        path = endpoint.path
+
+        for params in endpoint.get_params():
+            key = get_request_key(path, params)
+            old_file = old_files.get(key)
+
+            if old_file is not None and changes is not None and not endpoint.has_changed(changes, params):
+                files[key] = old_file
+                continue
+
+            archived_response = archived_responses.get((path, params.get('season_id')))
+
+            if archived_response is not None:
+                status_code, content = archived_response
+            else:
+                try:
+                    status_code, content = render_endpoint(path, params)
+                except Exception as e:
+                    # Carry on, to report every file that fails
+                    counts['failed'].append(key + ': ' + str(e))
+                    continue
+                counts['rendered'] += 1
+
+            content_hash = hashlib.sha256(content.encode()).hexdigest()[:16]
+
+            if old_file is not None and old_file['hash'] == content_hash:
+                files[key] = old_file
+                continue
+
+            file_name = get_file_name(path, params, content_hash)
+            write_file(output_dir, file_name, content)
+            counts['written'] += 1
+            files[key] = {'file': file_name, 'hash': content_hash, 'status_code': status_code}
+            written_file_names.append(file_name)
+
+    if counts['failed']:
+        for file_name in written_file_names:
+            remove_file(output_dir, file_name)
+        return counts
+
+    write_file(output_dir, MANIFEST_NAME, json.dumps({
+        'generated_at': timezone.now().isoformat(),
+        'last_change_id': max_change_id,
+        'files': files,
+    }, indent=2))
+
+    file_names = {file['file'] for file in files.values()}
+
+    for old_file in old_files.values():
+        if old_file['file'] not in file_names and remove_file(output_dir, old_file['file']):
+            counts['deleted'] += 1
+
+    ExportChange.objects.filter(created_at__lt=retention_start).delete()
+
+    return counts
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from export.exporter import export_static_json, load_manifest
+from export.models import ExportChange
+
+
+class Command(BaseCommand):
+    help = 'Export the public read endpoints (teams, players, seasons, fixtures, results, standings, leaderboards and news) to a directory of static JSON files with a manifest. Only the files affected by changes since the last export are rendered again. If any file fails to render, nothing is exported.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=settings.STATIC_EXPORT_ROOT, help='The directory to export to')
+        parser.add_argument('--full', action='store_true', help='Render every file again, whatever has changed')
+        parser.add_argument('--prune', action='store_true', help='Delete the recorded changes this export has covered, instead of keeping them for EXPORT_CHANGE_RETENTION. Only use this if nothing else exports from them.')
+
+    def handle(self, *args, **options):
+        counts = export_static_json(options['output_dir'], full=options['full'])
+
+        if counts['failed']:
+            for failure in counts['failed']:
+                self.stderr.write('Failed to render ' + failure)
+            raise CommandError(f"{len(counts['failed'])} file(s) failed to render, so nothing was exported")
+
+        if options['prune']:
+            ExportChange.objects.filter(id__lte=load_manifest(options['output_dir'])['last_change_id']).delete()
+
+        self.stdout.write(f"Rendered {counts['rendered']}, wrote {counts['written']} and deleted {counts['deleted']} file(s) in {options['output_dir']}")
@@ -0,0 +1,76 @@
+import threading
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+
+class ExportChange(models.Model):
+    """A change to an object that one or more exported endpoints depend on. The static export (see export.exporter) reads the changes made since it last ran to work out which files to render again."""
+    
+    # The model's label, e.g. 'player.player'
+    model = models.CharField(max_length=100)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.model + " " + str(self.object_id)
+
+
+# The changes made in each thread's current transaction, written together when it commits
+pending_changes = threading.local()
+
+
+def record_changes(model, ids=None):
+    """Record changes to some objects of a model, once per transaction. Only the models some endpoint's files are per object of (see export.endpoints) keep the objects' ids, so a transaction writes one row per other model, however many of its objects it changes.
+    The signal handlers below record every save and delete. Writes that send no signals, e.g. bulk_create, bulk_update and update(), must call this themselves.
+
+    Args:
+        model: The model, e.g. StandingsTeam.
+        ids: The ids of the changed objects. It's only needed for the models with per-object files, e.g. Player.
+    """
+    from export.endpoints import get_entity_models, get_tracked_models
+    
+    label = model._meta.label_lower
+    
+    if label not in get_tracked_models():
+        return
+    
+    object_ids = list(ids) if label in get_entity_models() else [None]
+    
+    if not object_ids:
+        return
+    
+    if not hasattr(pending_changes, 'changes'):
+        pending_changes.changes = set()
+    
+    pending_changes.changes.update((label, object_id) for object_id in object_ids)
+    # The first callback to run writes every pending change, and the others find nothing left to write. Each change registers one, as the
+    # callbacks of a rolled back transaction are dropped, and its changes are then written by the next transaction to commit, which only means
+    # some files are rendered again for nothing. Outside a transaction, the change is written straight away.
+    transaction.on_commit(write_pending_changes)
+
+
+def write_pending_changes():
+    changes = getattr(pending_changes, 'changes', None)
+    pending_changes.changes = set()
+    
+    if changes:
+        ExportChange.objects.bulk_create([ExportChange(model=model, object_id=object_id) for model, object_id in sorted(changes, key=str)])
+
+
+# Record every change to the exported models
+@receiver(post_save)
+def record_saved_object(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_changes(sender, [instance.pk])
+
+
+@receiver(post_delete)
+def record_deleted_object(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk])
+
+
+@receiver(m2m_changed)
+def record_changed_relation(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        record_changes(type(instance), [instance.pk])
@@ -0,0 +1,101 @@
+import datetime
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from export.endpoints import EXPORTED_ENDPOINTS
+from export.exporter import export_static_json, load_manifest
+from export.models import ExportChange, pending_changes
+from fixture.archive import render_endpoint as real_render_endpoint
+from ashesi_premier_league.testing import create_match, create_match_day, create_player, create_season, get_teams
+from fixture.events import change_score
+from fixture.models import Competition, MatchEvent, Referee
+from standings.groups import draw_groups
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+        self.teams = get_teams(2)
+        self.player = create_player(self.teams[0])
+        self.match = create_match(self.teams[0], self.teams[1], create_match_day(create_season()))
+        create_player(self.teams[1])
+        MatchEvent.objects.create(match=self.match, player=self.player, team=self.teams[0], event_type='Goal', minute=30)
+
+        # the changes made so far are never written, as test transactions never commit
+        pending_changes.changes = set()
+
+    def test_changes_are_written_once_per_transaction(self):
+        last_change_id = ExportChange.objects.order_by('id').values_list('id', flat=True).last() or 0
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for name in ('Kwame', 'Kojo', 'Yaw'):
+                    Referee.objects.create(first_name=name, last_name='Mensah')
+                self.player.save()
+                self.player.save()
+
+        changes = set(ExportChange.objects.filter(id__gt=last_change_id).values_list('model', 'object_id'))
+        # there are per-player and per-team files but no per-referee ones. Saving a player recounts their team's players.
+        self.assertEqual(changes, {('fixture.referee', None), ('player.player', self.player.id), ('team.team', self.teams[0].id)})
+
+    def test_writes_that_send_no_signals_are_recorded(self):
+        last_change_id = ExportChange.objects.order_by('id').values_list('id', flat=True).last() or 0
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # update() and bulk_create
+            change_score(self.match, self.teams[0].id, 1)
+            draw_groups(create_season('2024/25'), Competition.objects.get(name='FA Cup', gender='M'), 1, pots=[[team.id for team in self.teams]], seed=1)
+
+        changes = set(ExportChange.objects.filter(id__gt=last_change_id).values_list('model', 'object_id'))
+        self.assertTrue({('fixture.match', None), ('standings.standings', None), ('standings.standingsteam', None)} <= changes)
+
+    def test_standings_files_depend_on_their_teams_records(self):
+        endpoint = next(endpoint for endpoint in EXPORTED_ENDPOINTS if endpoint.url_name == 'get_season_standings')
+        self.assertTrue(endpoint.has_changed({'standings.standingsteam': {None}}, {'season_id': 1}))
+
+    def test_every_endpoint_is_exported(self):
+        counts = export_static_json(self.output_dir)
+
+        self.assertEqual(counts['failed'], [])
+        self.assertIn('/team/stats/get?id=' + str(self.teams[0].id), load_manifest(self.output_dir)['files'])
+
+    def test_the_export_is_abandoned_if_a_file_fails_to_render(self):
+        export_static_json(self.output_dir)
+        manifest = load_manifest(self.output_dir)
+        file_names = set(os.listdir(self.output_dir))
+
+        self.player.first_name = 'Kwame'
+        self.player.save()
+        ExportChange.objects.create(model='player.player', object_id=self.player.id)
+
+        def render_endpoint(path, params):
+            if path == reverse('get_players'):
+                raise ValueError('Broken view')
+            return real_render_endpoint(path, params)
+
+        with mock.patch('export.exporter.render_endpoint', side_effect=render_endpoint):
+            counts = export_static_json(self.output_dir)
+
+        # the player's file was written again, then deleted with the rest of the export
+        self.assertGreater(counts['written'], 0)
+        self.assertTrue(counts['failed'])
+        self.assertEqual(load_manifest(self.output_dir), manifest)
+        self.assertEqual(set(os.listdir(self.output_dir)), file_names)
+
+    def test_old_changes_are_pruned(self):
+        old_change = ExportChange.objects.create(model='player.player', object_id=self.player.id)
+        ExportChange.objects.filter(id=old_change.id).update(created_at=timezone.now() - datetime.timedelta(days=31))
+        new_change = ExportChange.objects.create(model='player.player', object_id=self.player.id)
+
+        export_static_json(self.output_dir)
+
+        self.assertFalse(ExportChange.objects.filter(id=old_change.id).exists())
+        self.assertTrue(ExportChange.objects.filter(id=new_change.id).exists())
@@ -0,0 +1,169 @@
+# archive.py
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve, reverse
+from django.utils import timezone
+from fixture.models import Match, SeasonArchive
+
+
+# The public endpoints that are archived when a season is over. Each takes the season as a season_id query parameter.
+ARCHIVED_URL_NAMES = [
+    'get_season_match_days',
+    'get_season_results',
+    'get_season_standings',
+    'get_season_mens_league_standings',
+    'get_season_womens_league_standings',
+    'get_season_mens_fa_cup_group_standings',
+    'get_mens_top_scorers',
+    'get_womens_top_scorers',
+    'get_mens_season_top_assisters',
+    'get_womens_season_top_assisters',
+    'get_mens_season_red_card_rankings',
+    'get_mens_season_yellow_card_rankings',
+    'get_womens_season_red_card_rankings',
+    'get_womens_season_yellow_card_rankings',
+    'get_mens_season_clean_sheet_rankings',
+    'get_womens_season_clean_sheet_rankings',
+    'get_season_suspensions',
+    'get_mens_season_minutes_played',
+    'get_womens_season_minutes_played',
+    'get_mens_season_motm_rankings',
+    'get_womens_season_motm_rankings',
+]
+
+
+def get_archived_paths():
+    return {reverse(url_name) for url_name in ARCHIVED_URL_NAMES}
+
+
+def is_season_over(season):
+    """A season is over once its end date has passed and all of its matches have ended. Nothing in it changes after that."""
+    if season.end_date >= timezone.now().date():
+        return False
+
+    return not Match.objects.filter(match_day__season=season, has_ended=False).exists()
+
+
+def render_endpoint(path, params):
+    """Call the view of an endpoint directly, as a GET request, and render its response.
+
+    Args:
+        path: The path of the endpoint.
+        params: A dictionary of query parameters, e.g. {'season_id': 1}.
+
+    Returns:
+        A tuple of (status code, rendered JSON content).
+    """
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.GET = QueryDict(mutable=True)
+    for name, value in params.items():
+        request.GET[name] = str(value)
+    request.META['QUERY_STRING'] = request.GET.urlencode()
+    request.META['HTTP_ACCEPT'] = 'application/json'
+
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    response.render()
+
+    return response.status_code, response.content.decode()
+
+
+def store_season_archive(season):
+    """Store the response of every archived endpoint for a season. The responses are rendered once, by the views themselves, so an archived response is exactly what the view returned when the season ended.
+
+    Args:
+        season: A season that is over. See is_season_over.
+
+    Returns:
+        The number of responses stored.
+    """
+    archives = []
+
+    for path in sorted(get_archived_paths()):
+        status_code, content = render_endpoint(path, {'season_id': season.id})
+        archives.append(SeasonArchive(
+            season=season,
+            path=path,
+            status_code=status_code,
+            content=content,
+            etag=hashlib.md5(content.encode()).hexdigest(),
+        ))
+
+    with transaction.atomic():
+        SeasonArchive.objects.filter(season=season).delete()
+        SeasonArchive.objects.bulk_create(archives)
+
+    archived_responses.forget(season.id)
+    return len(archives)
+
+
+def delete_season_archive(season):
+    """Delete a season's archived responses, e.g. to correct a result. The endpoints are served by their views again once every process has refreshed its list of archived seasons."""
+    SeasonArchive.objects.filter(season=season).delete()
+    archived_responses.forget(season.id)
+
+
+class ArchivedResponses:
+    """Archived responses kept in memory, so an archived season is served without touching the database.
+    The ids of the archived seasons are reloaded every SEASON_ARCHIVE_REFRESH_INTERVAL seconds. A season's responses are loaded with a single query the first time one of them is requested, and kept, since they never change.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.paths = None
+        self.season_ids = set()
+        self.loaded_at = None
+        # season id -> {path: (status code, content, etag)}
+        self.responses = {}
+
+    def is_archived_path(self, path):
+        if self.paths is None:
+            self.paths = get_archived_paths()
+        return path in self.paths
+
+    def refresh(self):
+        season_ids = set(SeasonArchive.objects.values_list('season_id', flat=True).distinct())
+
+        with self.lock:
+            self.season_ids = season_ids
+            self.responses = {season_id: responses for season_id, responses in self.responses.items() if season_id in season_ids}
+            self.loaded_at = time.monotonic()
+
+    def forget(self, season_id):
+        """Drop a season's responses and reload the archived seasons on next use. Other processes pick up the change on their next refresh."""
+        with self.lock:
+            self.responses.pop(season_id, None)
+            self.loaded_at = None
+
+    def get(self, season_id, path):
+        """Get the archived response of an endpoint for a season.
+
+        Returns:
+            A tuple of (status code, content, etag), or None if the season isn't archived.
+        """
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > settings.SEASON_ARCHIVE_REFRESH_INTERVAL:
+            self.refresh()
+
+        if season_id not in self.season_ids:
+            return None
+
+        responses = self.responses.get(season_id)
+
+        if responses is None:
+            responses = {
+                archive_path: (status_code, content, etag)
+                for archive_path, status_code, content, etag in SeasonArchive.objects.filter(season_id=season_id).values_list('path', 'status_code', 'content', 'etag')
+            }
+            with self.lock:
+                self.responses[season_id] = responses
+
+        return responses.get(path)
+
+
+archived_responses = ArchivedResponses()
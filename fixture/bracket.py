@@ -0,0 +1,219 @@
+# bracket.py
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from fixture.models import KnockoutTie, Match, Stage
+
+
+# The knockout rounds, in the order they are played
+KNOCKOUT_STAGES = ['Round of 16', 'Quarter Finals', 'Semi Finals', 'Finals']
+
+# The first knockout round for each number of qualified teams
+FIRST_ROUNDS = {16: 'Round of 16', 8: 'Quarter Finals', 4: 'Semi Finals', 2: 'Finals'}
+
+
+def get_group_tables(season, competition):
+    """Get the final tables of a competition's groups in a season. The groups' records and positions are brought up to date first, so teams level on points are separated by the same tiebreakers as the standings (see standings.ranking).
+
+    Args:
+        season: The season.
+        competition: The competition, e.g. the men's FA Cup.
+
+    Returns:
+        A list of lists of team ids, one list per group in group name order, best team first.
+    """
+    from standings.groups import update_group_standings
+    from standings.models import Standings, StandingsTeam
+
+    update_group_standings(season, competition)
+
+    groups = Standings.objects.filter(season=season, competition=competition).order_by('name').prefetch_related(
+        Prefetch('standings_teams', queryset=StandingsTeam.objects.order_by('position'))
+    )
+
+    return [[standings_team.team_id for standings_team in standings.standings_teams.all()] for standings in groups]
+
+
+def get_seeding_order(no_of_teams):
+    """Get the order seeds are placed in the first round so the best seeds meet as late as possible, e.g. [0, 3, 1, 2] for 4 teams: seed 0 plays seed 3 and seed 1 plays seed 2 in the other half of the bracket.
+
+    Args:
+        no_of_teams: The number of teams in the first round. It must be a power of two.
+    """
+    order = [0]
+
+    while len(order) < no_of_teams:
+        order = [seed for top_seed in order for seed in (top_seed, 2 * len(order) - 1 - top_seed)]
+
+    return order
+
+
+def seed_bracket(season, competition, qualifiers_per_group=2):
+    """Create a competition's knockout bracket for a season from its final group standings. The best qualifiers_per_group teams of each group qualify: group winners are seeded first, then runners-up and so on, so a group winner plays a team that finished lower in another group. Every round is created at once, with each tie linked to the tie its winner plays next.
+
+    Args:
+        season: The season.
+        competition: The competition.
+        qualifiers_per_group: The number of teams from each group that qualify.
+
+    Returns:
+        The number of ties created. Raises a ValueError if the bracket can't be seeded.
+    """
+    if KnockoutTie.objects.filter(season=season, competition=competition).exists():
+        raise ValueError('Knockout bracket already exists')
+
+    if Match.objects.filter(competition=competition, match_day__season=season, stage__name='Group Stage', has_ended=False).exists():
+        raise ValueError('The group stage has not ended yet')
+
+    group_tables = get_group_tables(season, competition)
+
+    if not group_tables:
+        raise ValueError('Group standings not found')
+
+    if any(len(group_table) < qualifiers_per_group for group_table in group_tables):
+        raise ValueError('Every group must have at least ' + str(qualifiers_per_group) + ' teams')
+
+    seeds = [group_table[place] for place in range(qualifiers_per_group) for group_table in group_tables]
+
+    if len(seeds) not in FIRST_ROUNDS:
+        raise ValueError('The number of qualified teams must be 2, 4, 8 or 16')
+
+    first_round = KNOCKOUT_STAGES.index(FIRST_ROUNDS[len(seeds)])
+    stages = Stage.objects.in_bulk(KNOCKOUT_STAGES[first_round:], field_name='name')
+    seeding_order = get_seeding_order(len(seeds))
+    no_of_ties = 0
+
+    with transaction.atomic():
+        # create the final first, so each earlier tie can be linked to the tie its winner plays next
+        next_ties = []
+
+        for round_index, stage_name in reversed(list(enumerate(KNOCKOUT_STAGES[first_round:]))):
+            ties = []
+
+            for position in range(len(seeds) // 2 ** (round_index + 1)):
+                tie = KnockoutTie(
+                    competition=competition,
+                    season=season,
+                    stage=stages[stage_name],
+                    position=position,
+                    next_tie=next_ties[position // 2] if next_ties else None,
+                    next_tie_slot=('home' if position % 2 == 0 else 'away') if next_ties else None,
+                )
+
+                if round_index == 0:
+                    tie.home_team_id = seeds[seeding_order[2 * position]]
+                    tie.away_team_id = seeds[seeding_order[2 * position + 1]]
+
+                tie.save()
+                ties.append(tie)
+
+            next_ties = ties
+            no_of_ties += len(ties)
+
+    return no_of_ties
+
+
+def find_knockout_tie(match):
+    """Find the knockout tie a match is played for. A match that isn't linked to a tie yet is linked to the undecided tie of its competition, season and stage between its two teams, so knockout matches created by hand are picked up too.
+
+    Returns:
+        The tie, or None if the match isn't a knockout match.
+    """
+    tie = KnockoutTie.objects.filter(match=match).first()
+
+    if tie is not None or match.stage_id is None:
+        return tie
+
+    tie = KnockoutTie.objects.filter(
+        Q(home_team_id=match.home_team_id, away_team_id=match.away_team_id) |
+        Q(home_team_id=match.away_team_id, away_team_id=match.home_team_id),
+        competition_id=match.competition_id,
+        season__match_days__id=match.match_day_id,
+        stage_id=match.stage_id,
+        match__isnull=True,
+    ).first()
+
+    if tie is not None:
+        tie.match = match
+        tie.save(update_fields=['match'])
+
+    return tie
+
+
+def set_tie_winner(tie, winner_id):
+    """Set or clear the winner of a tie, and move the winner into their slot of the next tie.
+    If the winner of a decided tie changes, e.g. after a result is corrected, the next tie's match was played by the old winner, so it no longer decides that tie: the match is unlinked from it and its winner is cleared, and so on down the bracket.
+
+    Args:
+        tie: The tie.
+        winner_id: The id of the winning team, or None if the tie isn't decided.
+    """
+    if tie.winner_id == winner_id:
+        return
+
+    tie.winner_id = winner_id
+    tie.save(update_fields=['winner'])
+
+    if tie.next_tie_id is None:
+        return
+
+    next_tie = KnockoutTie.objects.get(id=tie.next_tie_id)
+    slot = tie.next_tie_slot + '_team'
+
+    if getattr(next_tie, slot + '_id') == winner_id:
+        return
+
+    setattr(next_tie, slot + '_id', winner_id)
+    update_fields = [slot]
+
+    if next_tie.match_id is not None:
+        next_tie.match = None
+        update_fields.append('match')
+
+    next_tie.save(update_fields=update_fields)
+    set_tie_winner(next_tie, None)
+
+
+def update_knockout_tie(match):
+    """Decide a match's knockout tie from its result, and advance the winner to the next tie. It's called whenever a match ends, or an ended match changes or is reopened.
+    A drawn tie is left undecided, unless its winner was already set, e.g. after a penalty shootout (see fixture.views.update_knockout_tie_winner).
+
+    Args:
+        match: The match.
+    """
+    tie = find_knockout_tie(match)
+
+    if tie is None:
+        return
+
+    # the score may have been changed by an F() update since the match was loaded (see fixture.events.change_score), so it's read again
+    home_team_score, away_team_score, has_ended = Match.objects.filter(id=match.id).values_list('home_team_score', 'away_team_score', 'has_ended').get()
+    home_team_score, away_team_score = home_team_score or 0, away_team_score or 0
+
+    if not has_ended:
+        winner_id = None
+    elif home_team_score > away_team_score:
+        winner_id = match.home_team_id
+    elif away_team_score > home_team_score:
+        winner_id = match.away_team_id
+    else:
+        winner_id = tie.winner_id if tie.winner_id in (match.home_team_id, match.away_team_id) else None
+
+    set_tie_winner(tie, winner_id)
+
+
+def get_bracket(season, competition):
+    """Get a competition's knockout bracket in a season, round by round. The rounds and their ties, teams and matches are loaded with one query for the rounds and one for the ties.
+
+    Returns:
+        A list of stages, in the order they are played, each with its ties prefetched as `bracket_ties`.
+    """
+    ties = KnockoutTie.objects.filter(season=season, competition=competition).select_related(
+        'home_team', 'away_team', 'winner', 'match__match_day',
+    ).order_by('position')
+
+    stages = Stage.objects.filter(
+        knockout_ties__season=season,
+        knockout_ties__competition=competition,
+    ).distinct().prefetch_related(Prefetch('knockout_ties', queryset=ties, to_attr='bracket_ties'))
+
+    return sorted(stages, key=lambda stage: KNOCKOUT_STAGES.index(stage.name))
@@ -0,0 +1,198 @@
+# events.py
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce
+from export.models import record_changes
+from fixture.models import Goal, Match, MatchEvent
+from transfer.squads import get_squad_on
+
+
+# The event types that can be recorded in a batch
+BATCH_EVENT_TYPES = ['Goal', 'Yellow Card', 'Red Card']
+
+
+def get_squads(match):
+    """Get the players who can be involved in a match's events: the players who were in either team's squad on the match day, of the competition's gender, with the team they were in. Players transferred since then still count for the team they played for. This is a single query.
+
+    Returns:
+        A dictionary of player id -> team id.
+    """
+    return dict(get_squad_on([match.home_team_id, match.away_team_id], match.match_day.date).filter(
+        gender=match.competition.gender,
+    ).values_list('id', 'squad_team_id'))
+
+
+def validate_batch_events(match, events, squads):
+    """Validate a batch of events against a match and its squads, the same way create_goal and create_match_event validate a single event.
+
+    Args:
+        match: The match.
+        events: A list of event dictionaries. Each must contain client_id, event_type, player, team and minute. A goal can also contain assist_provider.
+        squads: The players who can be involved in the match's events, with their teams. See get_squads.
+
+    Returns:
+        A list of errors, one string per invalid event, e.g. 'Event 2: Player is not playing in the match'. The list is empty if every event is valid.
+    """
+    errors = []
+    client_ids = set()
+    team_ids = {match.home_team_id, match.away_team_id}
+
+    for index, event in enumerate(events):
+        def add_error(message):
+            errors.append(f'Event {index}: {message}')
+
+        if not isinstance(event, dict):
+            add_error('Event must be an object')
+            continue
+
+        if not event.get('client_id') or not event.get('event_type') or not event.get('player') or not event.get('team') or event.get('minute') is None:
+            add_error('Client ID, event type, player, team and minute are required')
+            continue
+
+        client_id = str(event['client_id'])
+
+        if len(client_id) > 64:
+            add_error('Client ID must be at most 64 characters')
+        elif client_id in client_ids:
+            add_error('Client ID is repeated in the batch')
+        client_ids.add(client_id)
+
+        if event['event_type'] not in BATCH_EVENT_TYPES:
+            add_error('Event type must be one of ' + ', '.join(BATCH_EVENT_TYPES))
+
+        try:
+            minute = int(event['minute'])
+            player_id = int(event['player'])
+            team_id = int(event['team'])
+            assist_provider_id = int(event['assist_provider']) if event.get('assist_provider') else None
+        except (TypeError, ValueError):
+            add_error('Invalid player, team, assist provider or minute')
+            continue
+
+        if minute < 0:
+            add_error('Invalid minute')
+
+        if team_id not in team_ids:
+            add_error('Team is not playing in the match')
+
+        if player_id not in squads:
+            add_error('Player is not playing in the match')
+        elif squads[player_id] != team_id:
+            add_error('Player is not playing for the team')
+
+        if assist_provider_id is not None:
+            if event['event_type'] != 'Goal':
+                add_error('Only goals can have an assist provider')
+            elif assist_provider_id == player_id:
+                add_error('Player and assist provider cannot be the same')
+            elif assist_provider_id not in squads:
+                add_error('Assist provider is not playing in the match')
+            elif squads[assist_provider_id] != team_id:
+                add_error('Assist provider is not playing for the team')
+
+    return errors
+
+
+def change_score(match, team_id, change):
+    """Add to or take away from one team's score in a match. This is a single UPDATE of the form score = score + change, so goals recorded at the same time can't overwrite each other's changes.
+
+    Args:
+        match: The match.
+        team_id: The id of the team whose score changes.
+        change: The number of goals to add, e.g. 1, or -1 when a goal is deleted.
+    """
+    field = 'home_team_score' if team_id == match.home_team_id else 'away_team_score'
+    Match.objects.filter(id=match.id).update(**{field: Coalesce(F(field), 0) + change})
+    record_changes(Match)
+
+    # update() doesn't send post_save, so for an ended match, e.g. when one of its goals is deleted, the match is saved with its new score to update its head-to-head, team form and knockout tie (see fixture.models.update_match_records)
+    if match.has_ended:
+        match.home_team_score, match.away_team_score = Match.objects.filter(id=match.id).values_list('home_team_score', 'away_team_score').get()
+        match.save(update_fields=['home_team_score', 'away_team_score'])
+
+
+def get_scores_from_goals(matches):
+    """Count the goals recorded for each team in some matches. This is a single grouped query.
+
+    Args:
+        matches: A queryset of matches.
+
+    Returns:
+        A dictionary of match id -> (home team score, away team score).
+    """
+    matches = matches.annotate(
+        no_of_home_team_goals=Count('events__goal', filter=Q(events__team_id=F('home_team_id'))),
+        no_of_away_team_goals=Count('events__goal', filter=Q(events__team_id=F('away_team_id'))),
+    ).values_list('id', 'no_of_home_team_goals', 'no_of_away_team_goals')
+
+    return {match_id: (home_team_score, away_team_score) for match_id, home_team_score, away_team_score in matches}
+
+
+def create_batch_events(match, events):
+    """Record a batch of validated events in a match, in one transaction. Events whose client id is already recorded in the match are skipped, so the same batch can be sent again safely. The match's score is recounted once at the end.
+    The match is locked while the batch is recorded, so two batches for the same match are recorded one after the other.
+
+    Args:
+        match: The match.
+        events: A list of valid event dictionaries. See validate_batch_events.
+
+    Returns:
+        A tuple of (list of client ids recorded, list of client ids that were already recorded).
+    """
+    with transaction.atomic():
+        match = Match.objects.select_for_update().get(id=match.id)
+
+        client_ids = [str(event['client_id']) for event in events]
+        recorded_client_ids = set(MatchEvent.objects.filter(match=match, client_id__in=client_ids).values_list('client_id', flat=True))
+        new_events = [event for event in events if str(event['client_id']) not in recorded_client_ids]
+
+        MatchEvent.objects.bulk_create([
+            MatchEvent(
+                match=match,
+                client_id=str(event['client_id']),
+                event_type=event['event_type'],
+                player_id=int(event['player']),
+                team_id=int(event['team']),
+                minute=int(event['minute']),
+            )
+            for event in new_events
+        ])
+
+        # bulk_create doesn't set ids on every database, so the new events' ids are looked up by client id
+        match_event_ids = dict(MatchEvent.objects.filter(
+            match=match,
+            client_id__in=[str(event['client_id']) for event in new_events],
+        ).values_list('client_id', 'id'))
+
+        Goal.objects.bulk_create([
+            Goal(
+                match_event_id=match_event_ids[str(event['client_id'])],
+                assist_provider_id=int(event['assist_provider']) if event.get('assist_provider') else None,
+            )
+            for event in new_events if event['event_type'] == 'Goal'
+        ])
+
+        # bulk_create doesn't send post_save, so the changes are recorded for the static export here
+        if new_events:
+            record_changes(MatchEvent)
+            record_changes(Goal)
+
+        if new_events:
+            match.home_team_score, match.away_team_score = get_scores_from_goals(Match.objects.filter(id=match.id))[match.id]
+            match.save()
+
+    # bulk_create doesn't send post_save, so the card counts kept by stats.models are updated here, and the cached careers of the players involved are dropped
+    from stats.career import invalidate_player_careers
+    from stats.discipline import recompute_player_discipline
+
+    invalidate_player_careers({int(event['player']) for event in new_events} | {int(event['assist_provider']) for event in new_events if event.get('assist_provider')})
+
+    for player_id in {int(event['player']) for event in new_events if event['event_type'] != 'Goal'}:
+        recompute_player_discipline(player_id, match.id)
+
+    # and a red card takes the player off, which changes the match's appearances (see stats.appearances)
+    if any(event['event_type'] == 'Red Card' for event in new_events):
+        from stats.appearances import recompute_appearances
+        recompute_appearances(match.id)
+
+    return [str(event['client_id']) for event in new_events], sorted(recorded_client_ids)
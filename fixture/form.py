@@ -0,0 +1,99 @@
+# form.py
+import datetime
+from django.db.models import Q
+from fixture.models import Match, TeamForm
+
+
+# The number of results kept in a team's form
+FORM_LENGTH = 5
+
+
+def get_kickoff(match):
+    """Get a sortable string of when a match was played, e.g. '2023-10-01 15:00:00'. Matches on the same date and time are ordered by id."""
+    match_time = match.match_time
+    if isinstance(match_time, str):
+        match_time = datetime.time.fromisoformat(match_time)
+    return f'{match.match_day.date.isoformat()} {match_time.isoformat()} {match.id:010d}'
+
+
+def get_result(match, team_id):
+    """Get a form entry for one team's result in an ended match."""
+    is_home = match.home_team_id == team_id
+    home_team_score = match.home_team_score or 0
+    away_team_score = match.away_team_score or 0
+    goals_for = home_team_score if is_home else away_team_score
+    goals_against = away_team_score if is_home else home_team_score
+    opponent = match.away_team if is_home else match.home_team
+
+    if goals_for > goals_against:
+        result = 'W'
+    elif goals_for < goals_against:
+        result = 'L'
+    else:
+        result = 'D'
+
+    return {
+        'match': match.id,
+        'result': result,
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+        'is_home': is_home,
+        'opponent': opponent.id,
+        'opponent_name_abbreviation': opponent.name_abbreviation,
+        'kickoff': get_kickoff(match),
+    }
+
+
+def set_results(team_form, results):
+    team_form.results = results[-FORM_LENGTH:]
+    team_form.form = ''.join(result['result'] for result in team_form.results)
+
+
+def rebuild_team_form(team_form):
+    """Recompute a team's form from its last FORM_LENGTH ended matches in the competition and season."""
+    matches = Match.objects.filter(
+        Q(home_team_id=team_form.team_id) | Q(away_team_id=team_form.team_id),
+        competition_id=team_form.competition_id,
+        match_day__season_id=team_form.season_id,
+        has_ended=True,
+    ).select_related('home_team', 'away_team', 'match_day').order_by('-match_day__date', '-match_time', '-id')[:FORM_LENGTH]
+
+    set_results(team_form, [get_result(match, team_form.team_id) for match in reversed(matches)])
+
+
+def update_team_forms(match):
+    """Update the forms of both teams in a match after the match is saved.
+    When a match ends after every match already in a team's form, its result is pushed onto the buffer and the oldest result drops off.
+    Anything else (a reopened match, a corrected score, a match ending out of order) rebuilds the buffer from the team's last few matches.
+
+    Args:
+        match: The match that was saved.
+    """
+    season_id = match.match_day.season_id
+
+    for team_id in (match.home_team_id, match.away_team_id):
+        team_form, created = TeamForm.objects.get_or_create(team_id=team_id, competition_id=match.competition_id, season_id=season_id)
+        results = team_form.results
+        already_included = any(result['match'] == match.id for result in results)
+
+        if match.has_ended and not already_included and (not results or results[-1]['kickoff'] < get_kickoff(match)):
+            set_results(team_form, results + [get_result(match, team_id)])
+        else:
+            rebuild_team_form(team_form)
+
+        team_form.save()
+
+
+def rebuild_team_forms(match, team_ids=None, competition_id=None, match_day_id=None):
+    """Rebuild the forms of both teams in a match, e.g. after the match is deleted, or of the given teams in the match's competition and season, e.g. the teams a match no longer involves.
+    The competition and the match day, whose season is used, default to the match's. Others are given for the competition or season a match was moved out of.
+    """
+    team_forms = TeamForm.objects.filter(
+        team_id__in=team_ids or [match.home_team_id, match.away_team_id],
+        competition_id=competition_id or match.competition_id,
+        season__match_days__id=match_day_id or match.match_day_id,
+    )
+
+    for team_form in team_forms:
+        rebuild_team_form(team_form)
+        team_form.save()
@@ -0,0 +1,96 @@
+# head_to_head.py
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, When
+from fixture.models import HeadToHead, Match
+
+
+def get_team_pair(team_1_id, team_2_id):
+    """Order two team ids the way HeadToHead stores them: (team_a_id, team_b_id), lowest id first."""
+    return (team_1_id, team_2_id) if team_1_id < team_2_id else (team_2_id, team_1_id)
+
+
+def get_matches_between(team_1_id, team_2_id):
+    """Get all matches between two teams, whichever team was at home."""
+    return Match.objects.filter(
+        Q(home_team_id=team_1_id, away_team_id=team_2_id) |
+        Q(home_team_id=team_2_id, away_team_id=team_1_id)
+    )
+
+
+def update_head_to_head(team_1_id, team_2_id):
+    """Recompute the head-to-head records of two teams, one per competition, from their ended matches. This is a single grouped query over the two teams' matches.
+
+    Args:
+        team_1_id: The id of one of the teams.
+        team_2_id: The id of the other team.
+    """
+    team_a_id, team_b_id = get_team_pair(team_1_id, team_2_id)
+
+    def goals_of(team_id):
+        return Sum(Case(
+            When(home_team_id=team_id, then=F('home_team_score')),
+            default=F('away_team_score'),
+            output_field=IntegerField(),
+        ))
+
+    def wins_of(team_id):
+        return Count('id', filter=(
+            Q(home_team_id=team_id, home_team_score__gt=F('away_team_score')) |
+            Q(away_team_id=team_id, away_team_score__gt=F('home_team_score'))
+        ))
+
+    records = get_matches_between(team_a_id, team_b_id).filter(has_ended=True).values('competition').annotate(
+        matches_played=Count('id'),
+        team_a_wins=wins_of(team_a_id),
+        team_b_wins=wins_of(team_b_id),
+        draws=Count('id', filter=Q(home_team_score=F('away_team_score'))),
+        team_a_goals=goals_of(team_a_id),
+        team_b_goals=goals_of(team_b_id),
+    ).order_by()
+
+    with transaction.atomic():
+        HeadToHead.objects.filter(team_a_id=team_a_id, team_b_id=team_b_id).delete()
+        HeadToHead.objects.bulk_create([
+            HeadToHead(
+                team_a_id=team_a_id,
+                team_b_id=team_b_id,
+                competition_id=record['competition'],
+                matches_played=record['matches_played'],
+                team_a_wins=record['team_a_wins'],
+                team_b_wins=record['team_b_wins'],
+                draws=record['draws'],
+                team_a_goals=record['team_a_goals'] or 0,
+                team_b_goals=record['team_b_goals'] or 0,
+            )
+            for record in records
+        ])
+
+
+def get_head_to_head_records(team_1_id, team_2_id):
+    """Get the head-to-head records of two teams from the HeadToHead table, from team_1's point of view.
+
+    Args:
+        team_1_id: The id of the team whose point of view the records are given from.
+        team_2_id: The id of the other team.
+
+    Returns:
+        A list of dictionaries, one per competition. Each has the competition, matches_played, team_1_wins, team_2_wins, draws, team_1_goals and team_2_goals.
+    """
+    team_a_id, team_b_id = get_team_pair(team_1_id, team_2_id)
+    is_team_1_a = team_1_id == team_a_id
+
+    head_to_heads = HeadToHead.objects.filter(team_a_id=team_a_id, team_b_id=team_b_id).select_related('competition')
+
+    records = []
+    for head_to_head in head_to_heads:
+        records.append({
+            'competition': head_to_head.competition,
+            'matches_played': head_to_head.matches_played,
+            'team_1_wins': head_to_head.team_a_wins if is_team_1_a else head_to_head.team_b_wins,
+            'team_2_wins': head_to_head.team_b_wins if is_team_1_a else head_to_head.team_a_wins,
+            'draws': head_to_head.draws,
+            'team_1_goals': head_to_head.team_a_goals if is_team_1_a else head_to_head.team_b_goals,
+            'team_2_goals': head_to_head.team_b_goals if is_team_1_a else head_to_head.team_a_goals,
+        })
+
+    return records
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from fixture.archive import delete_season_archive, is_season_over, store_season_archive
+from fixture.models import Season
+
+
+class Command(BaseCommand):
+    help = "Archive a season that is over, so that its fixtures, results, standings and leaderboards are served from stored responses. Use --delete to unarchive it, e.g. to correct a result."
+
+    def add_arguments(self, parser):
+        parser.add_argument('season_id', type=int)
+        parser.add_argument('--delete', action='store_true', help="Delete the season's archive instead of creating it")
+
+    def handle(self, *args, **options):
+        try:
+            season = Season.objects.get(id=options['season_id'])
+        except Season.DoesNotExist:
+            raise CommandError('Season not found')
+
+        if options['delete']:
+            delete_season_archive(season)
+            self.stdout.write(f'Deleted the archive of {season}')
+            return
+
+        if not is_season_over(season):
+            raise CommandError('Only a season that has ended, and whose matches have all ended, can be archived')
+
+        self.stdout.write(f'Archived {store_season_archive(season)} response(s) of {season}')
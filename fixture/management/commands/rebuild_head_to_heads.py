@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from fixture.head_to_head import get_team_pair, update_head_to_head
+from fixture.models import Match
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the head-to-head records of every pair of teams that have played each other. Records are updated automatically when matches end, so this is only needed for matches that ended before the records existed.'
+
+    def handle(self, *args, **options):
+        team_pairs = {
+            get_team_pair(home_team_id, away_team_id)
+            for home_team_id, away_team_id in Match.objects.filter(has_ended=True).values_list('home_team_id', 'away_team_id')
+        }
+
+        for team_a_id, team_b_id in team_pairs:
+            update_head_to_head(team_a_id, team_b_id)
+
+        self.stdout.write(f'Rebuilt head-to-head records for {len(team_pairs)} pair(s) of teams')
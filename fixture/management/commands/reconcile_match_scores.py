@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from fixture.events import get_scores_from_goals
+from fixture.models import Match
+
+
+class Command(BaseCommand):
+    help = "Repair match scores that have drifted from the goals recorded in the match, e.g. after goals were edited in the admin. Scores are recounted with one grouped query, and only the matches whose score is wrong are saved."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--match-id', type=int, help='Only check this match')
+        parser.add_argument('--dry-run', action='store_true', help='Report the wrong scores without repairing them')
+
+    def handle(self, *args, **options):
+        matches = Match.objects.all()
+
+        if options['match_id']:
+            matches = matches.filter(id=options['match_id'])
+
+        scores = get_scores_from_goals(matches)
+        wrong_matches = Match.objects.filter(id__in=[
+            match_id for match_id, home_team_score, away_team_score in matches.values_list('id', 'home_team_score', 'away_team_score')
+            if scores.get(match_id) != (home_team_score or 0, away_team_score or 0)
+        ]).select_related('home_team', 'away_team', 'competition')
+
+        for match in wrong_matches:
+            home_team_score, away_team_score = scores[match.id]
+            self.stdout.write(f'{match}: {match.home_team_score}-{match.away_team_score} should be {home_team_score}-{away_team_score}')
+
+            if not options['dry_run']:
+                match.home_team_score = home_team_score
+                match.away_team_score = away_team_score
+                # saved one at a time, so head-to-heads and forms are updated for ended matches
+                match.save()
+
+        self.stdout.write(f"{'Found' if options['dry_run'] else 'Repaired'} {len(wrong_matches)} wrong score(s)")
@@ -0,0 +1,37 @@
+# middleware.py
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from fixture.archive import archived_responses
+
+
+class SeasonArchiveMiddleware:
+    """Serve GET requests for an archived season's endpoints from the stored responses (see fixture.archive), without calling the view. Only requests whose sole query parameter is season_id are served, so e.g. a paginated request still goes to the view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method == 'GET' and list(request.GET.keys()) == ['season_id'] and archived_responses.is_archived_path(request.path_info):
+            try:
+                season_id = int(request.GET['season_id'])
+            except ValueError:
+                season_id = None
+
+            archived_response = archived_responses.get(season_id, request.path_info) if season_id is not None else None
+
+            if archived_response is not None:
+                return self.get_archived_response(request, *archived_response)
+
+        return self.get_response(request)
+
+    def get_archived_response(self, request, status_code, content, etag):
+        etag = '"' + etag + '"'
+
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, status=status_code, content_type='application/json')
+
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={settings.SEASON_ARCHIVE_MAX_AGE}, immutable'
+        return response
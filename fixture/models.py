@@ -1,9 +1,13 @@
 from django.db import models
-from django.db.models.signals import post_migrate
-from django.dispatch import receiver
+from django.db.models.signals import post_migrate, post_init, post_save, post_delete
+from django.dispatch import receiver, Signal
 from django.core.exceptions import ValidationError
 
 
+# Sent when a match is saved with has_ended=True and it hadn't ended before. The match is passed as the instance argument.
+match_ended = Signal()
+
+
 class Referee(models.Model):
     id = models.AutoField(primary_key=True)
     first_name = models.CharField(max_length=50, null=False, blank=False, default=None)
@@ -115,6 +119,9 @@ class Match (models.Model):
     
     class Meta:
         ordering = ['match_day']
+        indexes = [
+            models.Index(fields=['home_team', 'away_team']),
+        ]
         
         
 class MatchEvent(models.Model):
@@ -132,12 +139,15 @@ class MatchEvent(models.Model):
     player = models.ForeignKey('player.Player', on_delete=models.SET_DEFAULT, related_name='events', null=True, blank=True, default=None)
     team = models.ForeignKey('team.Team', on_delete=models.SET_DEFAULT, related_name='events', null=False, blank=False, default=None)
     minute = models.IntegerField(null=False, blank=False)
+    # An id generated by the scorer's app, so a batch of events replayed after going offline is only recorded once
+    client_id = models.CharField(max_length=64, null=True, blank=True, default=None)
     
     def __str__(self):
         return self.event_type + " - " + self.player.first_name + " " + self.player.last_name + " (" + self.match.home_team.name + " vs " + self.match.away_team.name + ")"
     
     class Meta:
         ordering = ['minute']
+        unique_together = ['match', 'client_id']
             
 
 class Goal(models.Model):
@@ -176,4 +186,153 @@ class StartingXI(models.Model):
         return f"Starting XI for {self.team.name} in {self.match}"
 
     class Meta:
-        unique_together = ['match', 'team']
\ No newline at end of file
+        unique_together = ['match', 'team']
+        
+        
+class HeadToHead(models.Model):
+    """The record between two teams in a competition. team_a is always the team with the lower id, so each pair of teams has one row per competition.
+    The rows are recomputed from the pair's ended matches whenever one of those matches changes. See fixture.head_to_head.
+    """
+    
+    team_a = models.ForeignKey('team.Team', on_delete=models.CASCADE, related_name='head_to_heads_as_team_a')
+    team_b = models.ForeignKey('team.Team', on_delete=models.CASCADE, related_name='head_to_heads_as_team_b')
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name='head_to_heads')
+    matches_played = models.PositiveIntegerField(default=0)
+    team_a_wins = models.PositiveIntegerField(default=0)
+    team_b_wins = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    team_a_goals = models.PositiveIntegerField(default=0)
+    team_b_goals = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return self.team_a.name + " vs " + self.team_b.name + " (" + self.competition.name + ")"
+    
+    class Meta:
+        unique_together = ['team_a', 'team_b', 'competition']
+
+
+class TeamForm(models.Model):
+    """A team's last few results in a competition and season, oldest first. It's a fixed-size buffer that is updated whenever one of the team's matches ends. See fixture.form."""
+    
+    team = models.ForeignKey('team.Team', on_delete=models.CASCADE, related_name='forms')
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name='team_forms')
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='team_forms')
+    # e.g. 'WWDLW', most recent result last
+    form = models.CharField(max_length=10, blank=True, default='')
+    results = models.JSONField(default=list)
+    
+    def __str__(self):
+        return self.team.name + " - " + self.competition.name + " " + self.season.name + " - " + self.form
+    
+    class Meta:
+        unique_together = ['team', 'competition', 'season']
+
+
+class KnockoutTie(models.Model):
+    """One tie of a competition's knockout bracket in a season, e.g. the second semi final. The first round is seeded from the final group standings, and the winner of a tie moves into its next tie when the tie's match ends. See fixture.bracket.
+    """
+    
+    SLOT_CHOICES = [
+        ('home', 'Home'),
+        ('away', 'Away'),
+    ]
+    
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name='knockout_ties')
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='knockout_ties')
+    stage = models.ForeignKey(Stage, on_delete=models.CASCADE, related_name='knockout_ties')
+    # the tie's place in its round, from the top of the bracket, starting at 0
+    position = models.PositiveSmallIntegerField()
+    # the teams are unknown until the ties before this one are decided
+    home_team = models.ForeignKey('team.Team', on_delete=models.SET_NULL, related_name='home_knockout_ties', null=True, blank=True, default=None)
+    away_team = models.ForeignKey('team.Team', on_delete=models.SET_NULL, related_name='away_knockout_ties', null=True, blank=True, default=None)
+    match = models.OneToOneField(Match, on_delete=models.SET_NULL, related_name='knockout_tie', null=True, blank=True, default=None)
+    winner = models.ForeignKey('team.Team', on_delete=models.SET_NULL, related_name='won_knockout_ties', null=True, blank=True, default=None)
+    # the tie the winner plays next, and whether they play it as the home or away team. The final has no next tie.
+    next_tie = models.ForeignKey('self', on_delete=models.SET_NULL, related_name='previous_ties', null=True, blank=True, default=None)
+    next_tie_slot = models.CharField(max_length=4, choices=SLOT_CHOICES, null=True, blank=True, default=None)
+    
+    def __str__(self):
+        return self.competition.name + " " + self.season.name + " - " + self.stage.name + " " + str(self.position + 1)
+    
+    class Meta:
+        ordering = ['stage', 'position']
+        unique_together = ['competition', 'season', 'stage', 'position']
+
+
+class SeasonArchive(models.Model):
+    """The stored response of one public endpoint for a season that is over. Archived responses never change, and are served by fixture.middleware.SeasonArchiveMiddleware instead of the view. See fixture.archive."""
+    
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='archives')
+    # The path of the endpoint, e.g. '/season/results/get'
+    path = models.CharField(max_length=200)
+    status_code = models.PositiveSmallIntegerField()
+    content = models.TextField()
+    etag = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.season.name + " - " + self.path
+    
+    class Meta:
+        unique_together = ['season', 'path']
+
+
+# Remember whether a match had ended when it was loaded, and its teams, competition and match day, so a match being reopened or moved can be detected on save
+@receiver(post_init, sender=Match)
+def remember_match_state(sender, instance, **kwargs):
+    # the values are read from __dict__, so a match loaded with deferred fields, e.g. by refresh_from_db(fields=...), isn't loaded again here
+    instance._loaded_has_ended = instance.__dict__.get('has_ended')
+    instance._loaded_team_ids = (instance.__dict__.get('home_team_id'), instance.__dict__.get('away_team_id'))
+    instance._loaded_competition_id = instance.__dict__.get('competition_id')
+    instance._loaded_match_day_id = instance.__dict__.get('match_day_id')
+
+
+@receiver(post_save, sender=Match)
+def update_match_records(sender, instance, **kwargs):
+    loaded_team_ids = instance._loaded_team_ids
+    loaded_competition_id = instance._loaded_competition_id
+    loaded_match_day_id = instance._loaded_match_day_id
+    instance._loaded_team_ids = (instance.home_team_id, instance.away_team_id)
+    instance._loaded_competition_id = instance.competition_id
+    instance._loaded_match_day_id = instance.match_day_id
+    
+    # only ended matches count towards records, so there is nothing to do for a match that hasn't ended and wasn't ended before
+    if not instance.has_ended and not instance._loaded_has_ended:
+        return
+    
+    from fixture.head_to_head import update_head_to_head
+    from fixture.form import rebuild_team_forms, update_team_forms
+    from fixture.bracket import update_knockout_tie
+    from standings.groups import update_match_group_standings
+    update_head_to_head(instance.home_team_id, instance.away_team_id)
+    update_team_forms(instance)
+    update_knockout_tie(instance)
+    update_match_group_standings(instance)
+    
+    # if an ended match's teams were changed, the old pair's record and the old teams' forms no longer include it
+    removed_team_ids = set(loaded_team_ids) - {instance.home_team_id, instance.away_team_id}
+    if instance._loaded_has_ended and removed_team_ids:
+        update_head_to_head(*loaded_team_ids)
+        rebuild_team_forms(instance, removed_team_ids)
+    
+    # likewise, if its competition or match day were changed, the old teams' forms in the old competition and season no longer include it
+    is_moved = (loaded_competition_id, loaded_match_day_id) != (instance.competition_id, instance.match_day_id)
+    if instance._loaded_has_ended and is_moved and loaded_competition_id and loaded_match_day_id:
+        rebuild_team_forms(instance, [team_id for team_id in loaded_team_ids if team_id], loaded_competition_id, loaded_match_day_id)
+    
+    has_just_ended = instance.has_ended and not instance._loaded_has_ended
+    instance._loaded_has_ended = instance.has_ended
+    
+    if has_just_ended:
+        match_ended.send(sender=Match, instance=instance)
+
+
+@receiver(post_delete, sender=Match)
+def remove_match_from_records(sender, instance, **kwargs):
+    if instance.has_ended:
+        from fixture.head_to_head import update_head_to_head
+        from fixture.form import rebuild_team_forms
+        from standings.groups import update_match_group_standings
+        update_head_to_head(instance.home_team_id, instance.away_team_id)
+        rebuild_team_forms(instance)
+        update_match_group_standings(instance)
@@ -1,4 +1,5 @@
-from fixture.models import ManOfTheMatch, Referee, Season, Competition, MatchDay, Match, MatchEvent, Stage, Goal, Substitution, StartingXI
+from ashesi_premier_league.loader import BatchedListSerializer
+from fixture.models import KnockoutTie, ManOfTheMatch, Referee, Season, Competition, MatchDay, Match, MatchEvent, Stage, Goal, Substitution, StartingXI
 from rest_framework import serializers
 from player.models import Player
 from player.serializers import PlayerSerializer
@@ -8,6 +9,40 @@ from django.utils import timezone
 
 from team.serializers import TeamSerializer
 
+
+def get_player_summary(player):
+    """Get the fields of a player needed to show them in a match. Unlike PlayerSerializer, this doesn't query the database, so the player's position should be loaded with select_related.
+
+    Args:
+    player: The player.
+
+    Returns:
+        A dictionary with the player's id, name, position abbreviation, team id and image url.
+    """
+    return {
+        'id': player.id,
+        'first_name': player.first_name,
+        'last_name': player.last_name,
+        'position': player.position.name_abbreviation if player.position else None,
+        'team': player.team_id,
+        'image': player.image.url if player.image else None,
+    }
+
+
+def get_team_summary(team):
+    """Get the fields of a team needed to show it in a bracket, or None if the team isn't known yet. Unlike TeamSerializer, this doesn't query the database."""
+    if team is None:
+        return None
+
+    return {
+        'id': team.id,
+        'name': team.name,
+        'name_abbreviation': team.name_abbreviation,
+        'logo_url': team.logo_url.url if team.logo_url else None,
+        'color': team.color,
+    }
+
+
 class RefereeSerializer(serializers.ModelSerializer):
         
     class Meta:
@@ -67,6 +102,11 @@ class MatchDaySerializer(serializers.ModelSerializer):
     class Meta:
         model = MatchDay
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+        
+    @classmethod
+    def prime_relations(cls, match_days, loader):
+        loader.load_related(match_days, 'season')
         
     def to_representation(self, instance):
         # When retrieving a match day, include the season associated with the match day.
@@ -86,6 +126,12 @@ class MatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Match
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+        
+    @classmethod
+    def prime_relations(cls, matches, loader):
+        # load everything to_representation nests for many matches, with one query per model (see ashesi_premier_league.loader)
+        loader.load_related(matches, 'home_team', 'away_team', 'match_day__season', 'competition', 'referee', 'stage')
         
     # set required fields
     home_team = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all(), required=True)
@@ -142,6 +188,16 @@ class MatchEventSerializer(serializers.ModelSerializer):
     class Meta:
         model = MatchEvent
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+        
+    @classmethod
+    def prime_relations(cls, match_events, loader):
+        loader.load_related(match_events, 'match', 'player', 'team', 'goal__assist_provider')
+        MatchSerializer.prime_relations([match_event.match for match_event in match_events if match_event.match is not None], loader)
+        
+        players = [match_event.player for match_event in match_events if match_event.player is not None]
+        players += [match_event.goal.assist_provider for match_event in match_events if hasattr(match_event, 'goal') and match_event.goal.assist_provider is not None]
+        PlayerSerializer.prime_relations(players, loader)
         
     def to_representation(self, instance):
         # When retrieving a match event, include the match and the player associated with the match event.
@@ -166,6 +222,12 @@ class GoalSerializer(serializers.ModelSerializer):
     class Meta:
         model = Goal
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+        
+    @classmethod
+    def prime_relations(cls, goals, loader):
+        loader.load_related(goals, 'match_event')
+        MatchEventSerializer.prime_relations([goal.match_event for goal in goals], loader)
         
     
         
@@ -198,14 +260,10 @@ class StartingXISerializer(serializers.ModelSerializer):
         fields = '__all__'
         
     def to_representation(self, instance):
-        # When retrieving a starting XI, include the match and all players associated with the starting XI.
+        # When retrieving a starting XI, include a summary of each player. The match and team are returned as ids.
+        # Prefetch the players with their positions (see fixture.views.get_starting_xis), so that no query is made per player.
         representation = super().to_representation(instance)
-        representation['match'] = MatchSerializer(instance.match).data
-        
-        # Include player data for all players
-        player_data = representation.pop('players')
-        representation['players'] = PlayerSerializer(player_data, many=True).data
-        
+        representation['players'] = [get_player_summary(player) for player in instance.players.all()]
         return representation
     
         
@@ -217,12 +275,34 @@ class ManOfTheMatchSerializer (serializers.ModelSerializer):
         fields = '__all__'
         
     def to_representation(self, instance):
+        # The match is returned as its id. Load the player with their position (select_related('player__position')), so that no query is made per award.
         representation = super().to_representation(instance)
-        representation['match'] = MatchSerializer(instance.match).data
-        representation['player'] = TeamSerializer(instance.player).data
+        representation['player'] = get_player_summary(instance.player)
         
         return representation
-    
-    
-    
-    
\ No newline at end of file
+
+
+class KnockoutTieSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = KnockoutTie
+        fields = ['id', 'position', 'home_team', 'away_team', 'match', 'winner', 'next_tie', 'next_tie_slot']
+
+    def to_representation(self, instance):
+        # Load the teams and the match with select_related (see fixture.bracket.get_bracket), so that no query is made per tie.
+        representation = super().to_representation(instance)
+        representation['home_team'] = get_team_summary(instance.home_team)
+        representation['away_team'] = get_team_summary(instance.away_team)
+
+        match = instance.match
+        representation['match'] = None if match is None else {
+            'id': match.id,
+            'date': match.match_day.date,
+            'match_time': match.match_time,
+            'home_team_score': match.home_team_score,
+            'away_team_score': match.away_team_score,
+            'has_started': match.has_started,
+            'has_ended': match.has_ended,
+        }
+
+        return representation
@@ -1,3 +1,390 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import threading
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from ashesi_premier_league.loader import RelationLoader
+from ashesi_premier_league.testing import create_match, create_match_day, create_player, create_season, get_teams
+from fixture.archive import ARCHIVED_URL_NAMES, archived_responses
+from fixture.models import Competition, Goal, HeadToHead, KnockoutTie, ManOfTheMatch, Match, MatchEvent, SeasonArchive, Stage, TeamForm
+from team.models import Team
+from transfer.models import SquadMembership, Transfer
+from transfer.squads import rebuild_squad_memberships
 
-# Create your tests here.
+
+class MatchTestMixin:
+    """Create a started match between two teams, with 8 players in the home team and 2 in the away team."""
+
+    def setUp(self):
+        self.home_team, self.away_team = get_teams(2)
+        self.players = [create_player(self.home_team, last_name=str(number)) for number in range(8)]
+        self.away_players = [create_player(self.away_team, last_name=str(number)) for number in range(8, 10)]
+        self.match = create_match(self.home_team, self.away_team, create_match_day(create_season()))
+
+
+class GoalScoreTests(MatchTestMixin, TransactionTestCase):
+    """Goals change the score with one UPDATE each (see fixture.events.change_score). These tests use real transactions and threads, so goals can be recorded at the same time."""
+
+    def create_goal(self, player):
+        return APIClient().post('/match_event/goal/create/', {
+            'match': self.match.id,
+            'scoring_team': self.home_team.id,
+            'player': player.id,
+            'minute': 10,
+        }, format='json')
+
+    def test_parallel_goals_are_all_counted(self):
+        barrier = threading.Barrier(len(self.players))
+        status_codes = []
+
+        def post_goal(player):
+            try:
+                # start every request at once
+                barrier.wait()
+                status_codes.append(self.create_goal(player).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post_goal, args=(player,)) for player in self.players]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(status_codes, [201] * len(self.players))
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.home_team_score, len(self.players))
+        self.assertEqual(Goal.objects.filter(match_event__match=self.match).count(), len(self.players))
+
+    def test_deleting_a_goal_of_an_ended_match_updates_its_records(self):
+        for player in self.players[:2]:
+            self.assertEqual(self.create_goal(player).status_code, 201)
+
+        self.match.refresh_from_db()
+        self.match.has_ended = True
+        self.match.save()
+
+        head_to_head = HeadToHead.objects.get(competition=self.match.competition)
+        self.assertEqual(head_to_head.team_a_goals + head_to_head.team_b_goals, 2)
+
+        match_event = MatchEvent.objects.filter(match=self.match).first()
+        response = APIClient().delete(f'/match_event/delete/{match_event.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.home_team_score, 1)
+        # the records are recomputed, so the row is read again
+        head_to_head = HeadToHead.objects.get(competition=self.match.competition)
+        self.assertEqual(head_to_head.team_a_goals + head_to_head.team_b_goals, 1)
+
+
+class BatchEventTests(MatchTestMixin, TestCase):
+
+    def create_events(self, events):
+        return APIClient().post('/match_event/batch/create/', {'match': self.match.id, 'events': events}, format='json')
+
+    def goal(self, client_id, player, team, assist_provider=None):
+        return {'client_id': client_id, 'event_type': 'Goal', 'player': player.id, 'team': team.id, 'minute': 10, 'assist_provider': assist_provider.id if assist_provider else None}
+
+    def test_players_must_play_for_the_event_team(self):
+        response = self.create_events([self.goal('a', self.players[0], self.away_team)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], ['Event 0: Player is not playing for the team'])
+
+        response = self.create_events([self.goal('a', self.players[0], self.home_team, assist_provider=self.away_players[0])])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], ['Event 0: Assist provider is not playing for the team'])
+
+        self.assertFalse(MatchEvent.objects.exists())
+
+    def test_players_without_squad_memberships_count_for_their_current_team(self):
+        # e.g. players created before memberships were recorded
+        SquadMembership.objects.all().delete()
+
+        response = self.create_events([self.goal('a', self.players[0], self.home_team, assist_provider=self.players[1]), self.goal('b', self.away_players[0], self.away_team)])
+        self.assertEqual(response.status_code, 201)
+
+        response = self.create_events([self.goal('c', self.away_players[0], self.home_team)])
+        self.assertEqual(response.data['errors'], ['Event 0: Player is not playing for the team'])
+
+    def test_events_of_an_ended_match_update_its_records(self):
+        self.match.has_ended = True
+        self.match.save()
+
+        response = self.create_events([self.goal('a', self.players[0], self.home_team), self.goal('b', self.away_players[0], self.away_team), self.goal('c', self.players[1], self.home_team)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['data']['home_team_score'], response.data['data']['away_team_score']), (2, 1))
+
+        head_to_head = HeadToHead.objects.get(competition=self.match.competition)
+        self.assertEqual(head_to_head.team_a_goals + head_to_head.team_b_goals, 3)
+        self.assertEqual(head_to_head.matches_played, 1)
+
+
+class KnockoutBracketTests(TestCase):
+
+    def setUp(self):
+        self.season = create_season()
+        self.match_day = create_match_day(self.season)
+        self.competition = Competition.objects.get(name='FA Cup', gender='M')
+        self.teams = get_teams(3)
+
+        def create_tie(stage_name, **fields):
+            return KnockoutTie.objects.create(competition=self.competition, season=self.season, stage=Stage.objects.get(name=stage_name), position=0, **fields)
+
+        self.final = create_tie('Finals', away_team=self.teams[2])
+        self.semi_final = create_tie('Semi Finals', home_team=self.teams[0], away_team=self.teams[1], next_tie=self.final, next_tie_slot='home')
+
+        self.semi_final_match = self.play(self.semi_final, 'Semi Finals', 1, 0)
+        self.final.refresh_from_db()
+        self.final_match = self.play(self.final, 'Finals', 2, 0)
+
+    def play(self, tie, stage_name, home_team_score, away_team_score):
+        return create_match(
+            tie.home_team, tie.away_team, self.match_day, self.competition, stage_name,
+            home_team_score=home_team_score, away_team_score=away_team_score, has_ended=True,
+        )
+
+    def test_changing_a_played_tie_winner_clears_the_ties_after_it(self):
+        self.final.refresh_from_db()
+        self.assertEqual((self.final.home_team, self.final.winner, self.final.match), (self.teams[0], self.teams[0], self.final_match))
+
+        # the semi final's result is corrected after the final was played
+        self.semi_final_match.away_team_score = 2
+        self.semi_final_match.save()
+
+        self.final.refresh_from_db()
+        self.assertEqual((self.final.home_team, self.final.winner, self.final.match), (self.teams[1], None, None))
+
+
+class StartingXITests(MatchTestMixin, TestCase):
+
+    def create_starting_xi(self, players):
+        return APIClient().post('/starting_xi/create/', {'match': self.match.id, 'team': self.home_team.id, 'players': [player.id for player in players]}, format='json')
+
+    def transfer(self, player, to_team):
+        transfer = Transfer.objects.create(player=player, from_team=player.team, to_team=to_team)
+        # the day after the match day. The date is set on creation, so it's moved back afterwards
+        Transfer.objects.filter(id=transfer.id).update(date=datetime.date(2023, 10, 2))
+        player.team = to_team
+        player.save()
+        rebuild_squad_memberships(player.id)
+
+    def test_players_are_checked_against_the_squads_on_the_match_day(self):
+        self.transfer(self.players[0], self.away_team)
+        self.transfer(self.away_players[0], self.home_team)
+
+        self.assertEqual(self.create_starting_xi([self.away_players[0]]).status_code, 400)
+        self.assertEqual(self.create_starting_xi([self.players[0], self.players[1]]).status_code, 201)
+
+
+class TeamFormTests(TestCase):
+
+    def setUp(self):
+        self.teams = get_teams(2)
+        self.season = create_season()
+        self.match = create_match(self.teams[0], self.teams[1], create_match_day(self.season), home_team_score=1, away_team_score=0, has_ended=True)
+
+    def get_form(self, team, competition, season):
+        return TeamForm.objects.get(team=team, competition=competition, season=season).form
+
+    def test_moving_an_ended_match_rebuilds_the_old_forms(self):
+        premier_league = self.match.competition
+        self.assertEqual(self.get_form(self.teams[0], premier_league, self.season), 'W')
+
+        fa_cup = Competition.objects.get(name='FA Cup', gender='M')
+        self.match.competition = fa_cup
+        self.match.save()
+
+        self.assertEqual(self.get_form(self.teams[0], premier_league, self.season), '')
+        self.assertEqual(self.get_form(self.teams[1], fa_cup, self.season), 'L')
+
+        next_season = create_season('2024/25', datetime.date(2024, 9, 1), datetime.date(2025, 6, 1))
+        self.match.match_day = create_match_day(next_season, date=datetime.date(2024, 10, 1))
+        self.match.save()
+
+        self.assertEqual(self.get_form(self.teams[1], fa_cup, self.season), '')
+        self.assertEqual(self.get_form(self.teams[1], fa_cup, next_season), 'L')
+
+
+class ManOfTheMatchTests(MatchTestMixin, TestCase):
+
+    def award(self, player):
+        return APIClient().post('/man_of_the_match/create/', {'match': self.match.id, 'player': player.id}, format='json')
+
+    def test_awarding_again_replaces_the_award(self):
+        response = self.award(self.players[0])
+        self.assertEqual(response.status_code, 201)
+
+        response = self.award(self.away_players[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['message'], 'Man of the match replaced successfully')
+        self.assertEqual(list(ManOfTheMatch.objects.filter(match=self.match).values_list('player_id', flat=True)), [self.away_players[0].id])
+
+    def test_the_player_must_play_in_the_match(self):
+        other_team = Team.objects.exclude(id__in=[self.home_team.id, self.away_team.id]).first()
+
+        response = self.award(create_player(other_team))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ManOfTheMatch.objects.exists())
+
+
+class MatchCentreTests(MatchTestMixin, TestCase):
+
+    def post(self, path, data):
+        response = APIClient().post(path, data, format='json')
+        self.assertIn(response.status_code, (200, 201), response.data)
+
+    def get_match_centre(self):
+        response = APIClient().get('/match/centre/get', {'id': self.match.id})
+        self.assertEqual(response.status_code, 200)
+        return response.data['data']
+
+    def goal(self, client_id, player, team, minute, assist_provider=None):
+        return {'client_id': client_id, 'event_type': 'Goal', 'player': player.id, 'team': team.id, 'minute': minute, 'assist_provider': assist_provider.id if assist_provider else None}
+
+    def test_the_match_centre_has_the_timeline_lineups_and_man_of_the_match(self):
+        self.post('/starting_xi/create/', {'match': self.match.id, 'team': self.home_team.id, 'players': [self.players[0].id, self.players[1].id]})
+        self.post('/match_event/substitution/create/', {'match': self.match.id, 'team': self.home_team.id, 'player_out': self.players[1].id, 'player_in': self.players[2].id, 'minute': 60})
+        self.post('/match_event/batch/create/', {'match': self.match.id, 'events': [
+            self.goal('a', self.players[0], self.home_team, 70, assist_provider=self.players[2]),
+            self.goal('b', self.away_players[0], self.away_team, 10),
+        ]})
+        self.post('/man_of_the_match/create/', {'match': self.match.id, 'player': self.players[0].id})
+
+        match_centre = self.get_match_centre()
+
+        self.assertEqual(match_centre['match']['id'], self.match.id)
+        self.assertEqual([(event['minute'], event['event_type']) for event in match_centre['timeline']], [(10, 'Goal'), (60, 'Substitution'), (70, 'Goal')])
+        self.assertEqual(match_centre['timeline'][1]['player_in'], self.players[2].id)
+        self.assertEqual(match_centre['timeline'][2]['assist_provider'], self.players[2].id)
+        self.assertEqual(match_centre['starting_xis'], [{'team': self.home_team.id, 'players': [self.players[0].id, self.players[1].id]}])
+        self.assertEqual(match_centre['man_of_the_match'], [self.players[0].id])
+        # every player and team referred to is in the lookups
+        self.assertEqual(set(match_centre['players']), {self.players[0].id, self.players[1].id, self.players[2].id, self.away_players[0].id})
+        self.assertEqual(set(match_centre['teams']), {self.home_team.id, self.away_team.id})
+
+    def test_the_number_of_queries_does_not_grow_with_the_events(self):
+        self.post('/starting_xi/create/', {'match': self.match.id, 'team': self.home_team.id, 'players': [self.players[0].id]})
+        self.post('/match_event/batch/create/', {'match': self.match.id, 'events': [self.goal('a', self.players[0], self.home_team, 10)]})
+
+        # the match, its events, the starting XIs and their players, the man of the match and the players referred to
+        with self.assertNumQueries(6):
+            self.get_match_centre()
+
+        self.post('/match_event/batch/create/', {'match': self.match.id, 'events': [
+            self.goal(str(number), player, self.home_team, 20 + number, assist_provider=self.players[0]) for number, player in enumerate(self.players[1:])
+        ]})
+
+        with self.assertNumQueries(6):
+            self.get_match_centre()
+
+    def test_unknown_matches_are_not_found(self):
+        response = APIClient().get('/match/centre/get', {'id': self.match.id + 1})
+        self.assertEqual(response.status_code, 404)
+
+
+class SeasonArchiveTests(TestCase):
+
+    def setUp(self):
+        # the archived responses outlive each test's database, so they're forgotten before and after every test
+        self.forget_archived_responses()
+        self.addCleanup(self.forget_archived_responses)
+        self.season = create_season()
+        self.match = create_match(*get_teams(2), create_match_day(self.season), home_team_score=2, away_team_score=1, has_ended=True)
+
+    def forget_archived_responses(self):
+        archived_responses.season_ids = set()
+        archived_responses.responses = {}
+        archived_responses.loaded_at = None
+
+    def get_results(self):
+        return APIClient().get('/season/results/get', {'season_id': self.season.id})
+
+    def archive(self):
+        return APIClient().post(f'/season/archive/{self.season.id}/')
+
+    def test_a_season_with_unfinished_matches_is_not_archived(self):
+        create_match(*get_teams(2), create_match_day(self.season, 2))
+
+        self.assertEqual(self.archive().status_code, 400)
+        self.assertFalse(SeasonArchive.objects.exists())
+
+    def test_archived_responses_are_served_as_stored(self):
+        response = self.archive()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['no_of_archived_responses'], len(ARCHIVED_URL_NAMES))
+
+        # update() sends no signals, so the stored response keeps the score the season ended with
+        Match.objects.filter(id=self.match.id).update(home_team_score=3)
+        # the first request loads the season's responses
+        self.get_results()
+
+        with self.assertNumQueries(0):
+            response = self.get_results()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['data'][0]['home_team_score'], 2)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(APIClient().get('/season/results/get', {'season_id': self.season.id}, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # requests with other parameters go to the view
+        response = APIClient().get('/season/results/get', {'season_id': self.season.id, 'page': 1})
+        self.assertEqual(response.data['data'][0]['home_team_score'], 3)
+
+    def test_a_deleted_archive_is_no_longer_served(self):
+        self.archive()
+        Match.objects.filter(id=self.match.id).update(home_team_score=3)
+
+        call_command('archive_season', self.season.id, delete=True, stdout=io.StringIO())
+
+        self.assertEqual(self.get_results().data['data'][0]['home_team_score'], 3)
+
+
+class RelationLoaderTests(MatchTestMixin, TestCase):
+
+    def create_events(self, players):
+        for player in players:
+            MatchEvent.objects.create(match=self.match, player=player, team=player.team, event_type='Yellow Card', minute=10)
+
+    def count_queries(self, function):
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            function()
+
+        return len(queries)
+
+    def test_relations_are_loaded_with_one_query_per_model(self):
+        self.create_events(self.players)
+        loader = RelationLoader()
+        match_events = list(MatchEvent.objects.all())
+
+        # the matches, their teams and the players
+        with self.assertNumQueries(3):
+            loader.load_related(match_events, 'match__home_team', 'player')
+
+        with self.assertNumQueries(0):
+            self.assertEqual({match_event.match.home_team for match_event in match_events}, {self.home_team})
+            self.assertEqual({match_event.player for match_event in match_events}, set(self.players))
+
+            # the loaded objects are kept, so the same relations of other instances are found without a query
+            loader.load_related([MatchEvent(match_id=self.match.id, player_id=self.players[0].id)], 'match', 'player')
+
+    def test_the_number_of_queries_of_a_list_does_not_grow_with_its_items(self):
+        def get_match_events():
+            response = APIClient().get('/match_event/get', {'match_id': self.match.id})
+            self.assertEqual(response.status_code, 200)
+
+        self.create_events(self.players[:1])
+        no_of_queries = self.count_queries(get_match_events)
+
+        self.create_events(self.players[1:] + self.away_players)
+        self.assertLessEqual(self.count_queries(get_match_events), no_of_queries)
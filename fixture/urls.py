@@ -1,5 +1,5 @@
 from django.urls import path
-from fixture.views import create_referee, create_season, get_seasons, update_season, get_referees, get_season, get_referee, create_match_day, get_match_days, get_match_day, update_match_day, get_match_day_matches, get_season_match_days, get_season_fixtures, get_season_results, get_latest_results, create_match, get_matches, get_match, update_match, delete_match, create_goal, create_yellow_card_event, create_red_card_event, get_match_events_in_match, get_team_match_events, get_goals_in_match, get_goals_in_match_by_team, delete_match_event, get_competitions, get_stages
+from fixture.views import create_referee, create_season, get_seasons, update_season, archive_season, get_referees, get_season, get_referee, create_match_day, get_match_days, get_match_day, update_match_day, get_match_day_matches, get_season_match_days, get_season_fixtures, get_season_results, get_latest_results, create_match, get_matches, get_match, update_match, delete_match, create_goal, create_yellow_card_event, create_red_card_event, create_match_events, create_substitution, get_match_events_in_match, get_team_match_events, get_goals_in_match, get_goals_in_match_by_team, delete_match_event, get_competitions, get_stages, get_match_centre, create_starting_xi, get_match_starting_xis, get_match_day_starting_xis, create_man_of_the_match, get_man_of_the_match, create_knockout_bracket, get_knockout_bracket, update_knockout_tie_winner
 
 
 urlpatterns = [
@@ -11,6 +11,7 @@ urlpatterns = [
     path('season/get/', get_seasons, name='get_seasons'),
     path('season/get', get_season, name='get_season'),
     path('season/update/<int:id>/', update_season, name='update_season'),
+    path('season/archive/<int:id>/', archive_season, name='archive_season'),
     path('season/match_days/get', get_season_match_days, name='get_season_match_days'),
     path('season/fixtures/get/', get_season_fixtures, name='get_season_fixtures'),
     path('season/results/get', get_season_results, name='get_season_results'),
@@ -25,12 +26,27 @@ urlpatterns = [
     path('match/create/', create_match, name='create_match'),
     path('match/get/', get_matches, name='get_matches'),
     path('match/get', get_match, name='get_match'),
+    path('match/centre/get', get_match_centre, name='get_match_centre'),
     path('match/update/<int:id>/', update_match, name='update_match'),
     path('match/delete/<int:id>/', delete_match, name='delete_match'),
     
     path('match_event/goal/create/', create_goal, name='create_goal'),
     path('match_event/yellow_card/create/', create_yellow_card_event, name='create_yellow_card_event'),
     path('match_event/red_card/create/', create_red_card_event, name='create_red_card_event'),
+    path('match_event/substitution/create/', create_substitution, name='create_substitution'),
+    path('match_event/batch/create/', create_match_events, name='create_match_events'),
+    
+    path('starting_xi/create/', create_starting_xi, name='create_starting_xi'),
+    path('starting_xi/get', get_match_starting_xis, name='get_match_starting_xis'),
+    path('starting_xi/match_day/get', get_match_day_starting_xis, name='get_match_day_starting_xis'),
+    
+    path('man_of_the_match/create/', create_man_of_the_match, name='create_man_of_the_match'),
+    path('man_of_the_match/get', get_man_of_the_match, name='get_man_of_the_match'),
+    
+    path('knockout/bracket/create/', create_knockout_bracket, name='create_knockout_bracket'),
+    path('knockout/bracket/get', get_knockout_bracket, name='get_knockout_bracket'),
+    path('knockout/tie/winner/update/<int:id>/', update_knockout_tie_winner, name='update_knockout_tie_winner'),
+    
     path('match_event/get', get_match_events_in_match, name='get_match_events_in_match'),
     path('match_event/team/get', get_team_match_events, name='get_team_match_events'),
     path('match_event/delete/<int:id>/', delete_match_event, name='delete_match_event'),
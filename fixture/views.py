@@ -1,14 +1,21 @@
 from django.shortcuts import render
+from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.conf import settings
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from fixture.models import Competition, Goal, Match, MatchDay, MatchEvent, Referee, Season, Stage
+from fixture.bracket import get_bracket, seed_bracket, set_tie_winner
+from fixture.archive import is_season_over, store_season_archive
+from fixture.events import change_score, create_batch_events, get_squads, validate_batch_events
+from fixture.models import Competition, Goal, KnockoutTie, ManOfTheMatch, Match, MatchDay, MatchEvent, Referee, Season, Stage, StartingXI, Substitution
 
-from fixture.serializers import CompetitionSerializer, GoalSerializer, MatchDaySerializer, MatchEventSerializer, MatchSerializer, RefereeSerializer, SeasonSerializer, StageSerializer
+from fixture.serializers import get_player_summary, CompetitionSerializer, KnockoutTieSerializer, ManOfTheMatchSerializer, StartingXISerializer, GoalSerializer, MatchDaySerializer, MatchEventSerializer, MatchSerializer, RefereeSerializer, SeasonSerializer, StageSerializer
 from player.models import Player
+from transfer.squads import get_squad_on
 from team.models import Team
+from team.serializers import TeamSerializer
 
 # REFEREE VIEWS
 @api_view(['POST'])
@@ -188,6 +195,28 @@ def update_season(request, id):
         return Response({'message': 'Season update failed', 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
     
     
+@api_view(['POST'])
+def archive_season(request, id):
+    """Archive a season that is over. The responses of the season's fixtures, results, standings and leaderboards are stored, and from then on they are served as they are, without being recomputed. See fixture.archive.
+
+    Args:
+    id: The id of the season.
+
+    Returns:
+    A response object containing a JSON object and a status code. The JSON object contains a message. The message is either 'Season archived successfully' or why the season can't be archived.
+    """
+    try:
+        season = Season.objects.get(id=id)
+    except Season.DoesNotExist:
+        return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if not is_season_over(season):
+        return Response({'message': 'Only a season that has ended, and whose matches have all ended, can be archived'}, status=status.HTTP_400_BAD_REQUEST)
+
+    no_of_archived_responses = store_season_archive(season)
+    return Response({'message': 'Season archived successfully', 'data': {'no_of_archived_responses': no_of_archived_responses}}, status=status.HTTP_200_OK)
+    
+    
     
 # MATCH DAY VIEWS
 @api_view(['POST'])
@@ -541,6 +570,94 @@ def get_match(request):
     return Response({'message': 'Match retrieved successfully', 'data': serializer.data}, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+def get_match_centre(request):
+    """Retrieve everything needed to render a match screen in one call: the match, a timeline of its events, the starting XIs and the man of the match.
+    Players and teams are returned once each in the 'players' and 'teams' lookups, keyed by id. Events, starting XIs and the man of the match refer to them by id.
+    The data is loaded with a fixed number of queries, however many events the match has.
+
+    Args:
+    A GET request. The request must contain the following fields:
+    id: The id of the match.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and the match centre data. The message is either 'Match centre retrieved successfully' or 'Match not found'.
+    """
+
+    id_param = request.query_params.get('id')
+
+    if not id_param:
+        return Response({'message': 'Match ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        id = int(id_param)
+    except ValueError:
+        return Response({'message': 'Invalid Match ID'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match = Match.objects.select_related(
+            'home_team', 'away_team', 'match_day__season', 'competition', 'referee', 'stage'
+        ).get(id=id)
+    except Match.DoesNotExist:
+        return Response({'message': 'Match not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    match_events = MatchEvent.objects.filter(match=match).select_related('goal', 'substitution').order_by('minute', 'id')
+    starting_xis = StartingXI.objects.filter(match=match).prefetch_related('players')
+    men_of_the_match = ManOfTheMatch.objects.filter(match=match)
+
+    player_ids = set()
+    timeline = []
+
+    for match_event in match_events:
+        event_data = {
+            'id': match_event.id,
+            'event_type': match_event.event_type,
+            'minute': match_event.minute,
+            'team': match_event.team_id,
+            'player': match_event.player_id,
+        }
+
+        goal = getattr(match_event, 'goal', None) if match_event.event_type == 'Goal' else None
+        if goal:
+            event_data['assist_provider'] = goal.assist_provider_id
+
+        substitution = getattr(match_event, 'substitution', None) if match_event.event_type == 'Substitution' else None
+        if substitution:
+            event_data['player_in'] = substitution.player_in_id
+            event_data['player_out'] = substitution.player_out_id
+
+        player_ids.update(value for key, value in event_data.items() if key in ('player', 'assist_provider', 'player_in', 'player_out'))
+        timeline.append(event_data)
+
+    starting_xi_data = []
+    for starting_xi in starting_xis:
+        starting_xi_player_ids = [player.id for player in starting_xi.players.all()]
+        player_ids.update(starting_xi_player_ids)
+        starting_xi_data.append({'team': starting_xi.team_id, 'players': starting_xi_player_ids})
+
+    man_of_the_match_data = [man_of_the_match.player_id for man_of_the_match in men_of_the_match]
+    player_ids.update(man_of_the_match_data)
+    player_ids.discard(None)
+
+    players = Player.objects.filter(id__in=player_ids).select_related('team', 'position')
+
+    teams = {match.home_team.id: match.home_team, match.away_team.id: match.away_team}
+    for player in players:
+        if player.team and player.team.id not in teams:
+            teams[player.team.id] = player.team
+
+    match_centre = {
+        'match': MatchSerializer(match).data,
+        'timeline': timeline,
+        'starting_xis': starting_xi_data,
+        'man_of_the_match': man_of_the_match_data,
+        'players': {player.id: get_player_summary(player) for player in players},
+        'teams': {team.id: TeamSerializer(team).data for team in teams.values()},
+    }
+
+    return Response({'message': 'Match centre retrieved successfully', 'data': match_centre}, status=status.HTTP_200_OK)
+
+
 @api_view(['PATCH'])
 def update_match(request, id):
     """Update a match. Its argument is a JSON request which is deserialized into a Django model.
@@ -667,17 +784,58 @@ def create_goal(request):
     if scoring_team != match.home_team and scoring_team != match.away_team:
         return Response({'message': 'Scoring team is not playing in the match'}, status=status.HTTP_400_BAD_REQUEST)
     
-    match_event = MatchEvent.objects.create(match=match, player=player, minute=minute, team=scoring_team, event_type='Goal')
-    
-    goal = Goal.objects.create(match_event=match_event, assist_provider=assist_provider)
-    
-    match.home_team_score = Goal.objects.filter(match_event__match=match, match_event__team=match.home_team).count()
-    match.away_team_score = Goal.objects.filter(match_event__match=match, match_event__team=match.away_team).count()
-    match.save()
+    # the score is incremented in the database, so goals recorded at the same time are all counted
+    with transaction.atomic():
+        match_event = MatchEvent.objects.create(match=match, player=player, minute=minute, team=scoring_team, event_type='Goal')
+        goal = Goal.objects.create(match_event=match_event, assist_provider=assist_provider)
+        change_score(match, scoring_team.id, 1)
             
     return Response({'message': 'Goal created successfully'}, status=status.HTTP_201_CREATED)
 
 
+@api_view(['POST'])
+def create_match_events(request):
+    """Record a batch of goals and cards in a match, e.g. when the scorer's app comes back online, which may be after the match has ended. The events are validated against the match's squads, which are loaded once, and recorded together in one transaction, in the order they are given. The match's score is recounted once. Every event has an id generated by the app, and events already recorded with the same id are skipped, so sending the same batch again is safe.
+
+    Args:
+    A JSON request. The request must contain the following fields:
+    match: The match the events occurred in.
+    events: A list of events. Each event must contain client_id, event_type ('Goal', 'Yellow Card' or 'Red Card'), player, team and minute. A goal can also contain assist_provider.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message, a list of errors if any, and the client ids of the events recorded and of those that were already recorded, with the match's score. No event is recorded if any event is invalid.
+    """
+    data = request.data
+    events = data.get('events')
+
+    if not data.get('match') or not isinstance(events, list) or not events:
+        return Response({'message': 'Match and a list of events are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match = Match.objects.select_related('competition', 'match_day').get(id=data.get('match'))
+    except (Match.DoesNotExist, ValueError, TypeError):
+        return Response({'message': 'Match not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if not match.has_started:
+        return Response({'message': 'Match has not started yet'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # an ended match is accepted, since the app often comes back online after the final whistle. Saving the recounted score updates the ended match's records (see fixture.models.update_match_records).
+    errors = validate_batch_events(match, events, get_squads(match))
+
+    if errors:
+        return Response({'message': 'Match events creation failed', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    created, duplicates = create_batch_events(match, events)
+    match.refresh_from_db(fields=['home_team_score', 'away_team_score'])
+
+    return Response({'message': 'Match events created successfully', 'data': {
+        'created': created,
+        'duplicates': duplicates,
+        'home_team_score': match.home_team_score,
+        'away_team_score': match.away_team_score,
+    }}, status=status.HTTP_201_CREATED)
+
+
 @api_view(['DELETE'])
 def delete_match_event(request, id):
     """
@@ -690,38 +848,23 @@ def delete_match_event(request, id):
     Returns:
         A response object containing a JSON object and a status code. The JSON object contains a message. The message is either 'Match event deleted successfully' or 'Match event deletion failed'.
     """
-    match_event = MatchEvent.objects.get(id=id)
-    
     try:
-        if not match_event:
-            return Response({'message': 'Match event not found', 'status':status.HTTP_404_NOT_FOUND})
-        
-        if match_event.event_type == 'Goal':
-            # get the goal
-            goal = Goal.objects.get(match_event=match_event)
+        # the event is locked until it's deleted, so deleting it twice at the same time only takes its goal off the score once
+        with transaction.atomic():
+            try:
+                match_event = MatchEvent.objects.select_for_update().select_related('match').get(id=id)
+            except MatchEvent.DoesNotExist:
+                return Response({'message': 'Match event not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            if not goal:
-                return Response({'message': 'Goal not found', 'status':status.HTTP_404_NOT_FOUND})
+            if match_event.event_type == 'Goal' and Goal.objects.filter(match_event=match_event).exists():
+                change_score(match_event.match, match_event.team_id, -1)
             
-            # get the match
-            match = match_event.match
-            
-            # get team that scored the goal
-            scoring_team = goal.match_event.team
-            
-            if scoring_team == match.home_team:
-                match.home_team_score -= 1
-            else:
-                match.away_team_score -= 1
-            
-            match.save()
-        
-        # delete the match event
-        match_event.delete()
+            # delete the match event
+            match_event.delete()
         
         return Response({'message': 'Match Event deleted successfully'}, status=status.HTTP_200_OK)
     
-    except:
+    except Exception:
         return Response({'message': 'Match Event deletion failed'}, status=status.HTTP_400_BAD_REQUEST)
     
     
@@ -763,6 +906,67 @@ def create_yellow_card_event(request):
     return create_match_event(request, 'Yellow Card')
 
 
+@api_view(['POST'])
+def create_substitution(request):
+    """Record a substitution. The players' minutes played are worked out from the starting XIs, substitutions and red cards of the match (see stats.appearances).
+
+    Args:
+    A JSON request. The request must contain the following fields:
+    match: The match the substitution was made in.
+    team: The team that made the substitution.
+    player_out: The player who went off.
+    player_in: The player who came on.
+    minute: The minute the substitution was made in.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message. The message is either 'Substitution created successfully' or why the substitution is invalid.
+    """
+    data = request.data
+
+    if not data.get('match') or not data.get('team') or not data.get('player_out') or not data.get('player_in') or data.get('minute') is None:
+        return Response({'message': 'Match, team, player out, player in and minute are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match_id = int(data.get('match'))
+        team_id = int(data.get('team'))
+        player_out_id = int(data.get('player_out'))
+        player_in_id = int(data.get('player_in'))
+        minute = int(data.get('minute'))
+    except (TypeError, ValueError):
+        return Response({'message': 'Invalid match, team, player or minute'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match = Match.objects.select_related('competition', 'match_day').get(id=match_id)
+    except Match.DoesNotExist:
+        return Response({'message': 'Match not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if not match.has_started:
+        return Response({'message': 'Match has not started yet'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if match.has_ended:
+        return Response({'message': 'Match has ended'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if team_id != match.home_team_id and team_id != match.away_team_id:
+        return Response({'message': 'Team is not playing in the match'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if player_out_id == player_in_id:
+        return Response({'message': 'Player out and player in cannot be the same'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if minute < 0:
+        return Response({'message': 'Invalid minute'}, status=status.HTTP_400_BAD_REQUEST)
+
+    players = get_squad_on([team_id], match.match_day.date).filter(id__in=[player_out_id, player_in_id], gender=match.competition.gender).in_bulk()
+
+    if len(players) != 2:
+        return Response({'message': 'Both players must play for the team in the competition'}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        match_event = MatchEvent.objects.create(match=match, player=players[player_in_id], minute=minute, team_id=team_id, event_type='Substitution')
+        Substitution.objects.create(match_event=match_event, player_out=players[player_out_id], player_in=players[player_in_id])
+
+    return Response({'message': 'Substitution created successfully'}, status=status.HTTP_201_CREATED)
+
+
 @api_view(['GET'])
 def get_match_events_in_match(request):
     """Retrieve all match events. Its argument is a GET request.
@@ -904,11 +1108,328 @@ def get_goals_in_match_by_team(request):
     except Team.DoesNotExist:
         return Response({'message': 'Team not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    goals = Goal.objects.filter(match_event__match=match, scoring_team=team)
+    goals = Goal.objects.filter(match_event__match=match, match_event__team=team)
     serializer = GoalSerializer(goals, many=True)
     return Response({'data': serializer.data, 'message': 'Goals retrieved successfully'}, status=status.HTTP_200_OK)
 
 
+# STARTING XI VIEWS
+@api_view(['POST'])
+def create_starting_xi(request):
+    """Submit a team's starting XI for a match. Submitting it again replaces it. The players are checked with one query and added with one bulk insert.
+
+    Args:
+    A JSON request. The request must contain the following fields:
+    match: The match.
+    team: The team the starting XI is for. It must be playing in the match.
+    players: A list of the ids of at most 11 players who were in the team's squad on the match day (see transfer.squads).
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message. The message is either 'Starting XI created successfully', 'Starting XI updated successfully' or why the starting XI is invalid.
+    """
+    data = request.data
+    player_ids = data.get('players')
+
+    if not data.get('match') or not data.get('team') or not isinstance(player_ids, list) or not player_ids:
+        return Response({'message': 'Match, team and a list of players are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match_id = int(data.get('match'))
+        team_id = int(data.get('team'))
+        player_ids = [int(player_id) for player_id in player_ids]
+    except (TypeError, ValueError):
+        return Response({'message': 'Invalid match, team or player ID'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match = Match.objects.select_related('competition', 'match_day').get(id=match_id)
+    except Match.DoesNotExist:
+        return Response({'message': 'Match not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if team_id != match.home_team_id and team_id != match.away_team_id:
+        return Response({'message': 'Team is not playing in the match'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(set(player_ids)) != len(player_ids):
+        return Response({'message': 'A player cannot be named twice'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(player_ids) > 11:
+        return Response({'message': 'A starting XI cannot have more than 11 players'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # the squad on the match day, as for substitutions and events, so a past match's XI is checked against the team the players were in then
+    no_of_team_players = get_squad_on([team_id], match.match_day.date).filter(id__in=player_ids, gender=match.competition.gender).count()
+
+    if no_of_team_players != len(player_ids):
+        return Response({'message': 'Every player must play for the team in the competition'}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        starting_xi, created = StartingXI.objects.get_or_create(match=match, team_id=team_id)
+        starting_xi.players.set(player_ids)
+
+    if created:
+        return Response({'message': 'Starting XI created successfully'}, status=status.HTTP_201_CREATED)
+
+    return Response({'message': 'Starting XI updated successfully'}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_match_starting_xis(request):
+    """Retrieve the starting XIs of a match. Its argument is a GET request.
+
+    Args:
+    A GET request. The request must contain the following fields:
+    match_id: The id of the match.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a list of starting XIs and a message.
+    """
+    match_id = request.query_params.get('match_id')
+
+    if not match_id:
+        return Response({'message': 'Match ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match_id = int(match_id)
+    except ValueError:
+        return Response({'message': 'Invalid Match ID'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not Match.objects.filter(id=match_id).exists():
+        return Response({'message': 'Match not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = StartingXISerializer(get_starting_xis(match_id=match_id), many=True)
+    return Response({'data': serializer.data, 'message': 'Starting XIs retrieved successfully'}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_match_day_starting_xis(request):
+    """Retrieve the starting XIs of every match of a match day. Its argument is a GET request.
+
+    Args:
+    A GET request. The request must contain the following fields:
+    match_day_id: The id of the match day.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a list of starting XIs and a message.
+    """
+    match_day_id = request.query_params.get('match_day_id')
+
+    if not match_day_id:
+        return Response({'message': 'Match day ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match_day_id = int(match_day_id)
+    except ValueError:
+        return Response({'message': 'Invalid Match day ID'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not MatchDay.objects.filter(id=match_day_id).exists():
+        return Response({'message': 'Match day not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = StartingXISerializer(get_starting_xis(match__match_day_id=match_day_id), many=True)
+    return Response({'data': serializer.data, 'message': 'Starting XIs retrieved successfully'}, status=status.HTTP_200_OK)
+
+
+# MAN OF THE MATCH VIEWS
+@api_view(['POST'])
+def create_man_of_the_match(request):
+    """Award the man of the match of a match. A match has one man of the match, so awarding it again replaces the award.
+
+    Args:
+    A JSON request. The request must contain the following fields:
+    match: The match.
+    player: The player awarded. They must play for one of the teams in the match.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message. The message is either 'Man of the match awarded successfully', 'Man of the match replaced successfully' or why the award is invalid.
+    """
+    data = request.data
+
+    if not data.get('match') or not data.get('player'):
+        return Response({'message': 'Match and player are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match_id = int(data.get('match'))
+        player_id = int(data.get('player'))
+    except (TypeError, ValueError):
+        return Response({'message': 'Invalid match or player ID'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match = Match.objects.select_related('competition', 'match_day').get(id=match_id)
+    except Match.DoesNotExist:
+        return Response({'message': 'Match not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if not match.has_started:
+        return Response({'message': 'Match has not started yet'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if player_id not in get_squads(match):
+        return Response({'message': 'Player is not playing in the match'}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        # lock the match, so two awards at the same time don't both create one
+        Match.objects.select_for_update().filter(id=match.id).first()
+        man_of_the_match = ManOfTheMatch.objects.filter(match=match).first()
+
+        if man_of_the_match is None:
+            ManOfTheMatch.objects.create(match=match, player_id=player_id)
+            return Response({'message': 'Man of the match awarded successfully'}, status=status.HTTP_201_CREATED)
+
+        if man_of_the_match.player_id != player_id:
+            man_of_the_match.player_id = player_id
+            man_of_the_match.save()
+
+    return Response({'message': 'Man of the match replaced successfully'}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_man_of_the_match(request):
+    """Retrieve the man of the match of a match. Its argument is a GET request.
+
+    Args:
+    A GET request. The request must contain the following fields:
+    match_id: The id of the match.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains the man of the match and a message.
+    """
+    match_id = request.query_params.get('match_id')
+
+    if not match_id:
+        return Response({'message': 'Match ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        match_id = int(match_id)
+    except ValueError:
+        return Response({'message': 'Invalid Match ID'}, status=status.HTTP_400_BAD_REQUEST)
+
+    man_of_the_match = ManOfTheMatch.objects.filter(match_id=match_id).select_related('player__position').first()
+
+    if man_of_the_match is None:
+        return Response({'message': 'Man of the match not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = ManOfTheMatchSerializer(man_of_the_match)
+    return Response({'data': serializer.data, 'message': 'Man of the match retrieved successfully'}, status=status.HTTP_200_OK)
+
+
+# KNOCKOUT BRACKET VIEWS
+@api_view(['POST'])
+def create_knockout_bracket(request):
+    """Seed a competition's knockout bracket for a season from its final group standings. Every knockout round is created at once, and winners advance automatically when their matches end. See fixture.bracket.
+
+    Args:
+    A JSON request. The request must contain the following fields:
+    season: The season.
+    competition: The competition, e.g. the men's FA Cup.
+    qualifiers_per_group: The number of teams from each group that qualify. This is optional and defaults to 2.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message. The message is either 'Knockout bracket created successfully' or why the bracket can't be seeded.
+    """
+    data = request.data
+
+    if not data.get('season') or not data.get('competition'):
+        return Response({'message': 'Season and competition are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        season_id = int(data.get('season'))
+        competition_id = int(data.get('competition'))
+        qualifiers_per_group = int(data.get('qualifiers_per_group') or 2)
+    except (TypeError, ValueError):
+        return Response({'message': 'Invalid season, competition or number of qualifiers per group'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if qualifiers_per_group < 1:
+        return Response({'message': 'Invalid number of qualifiers per group'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        season = Season.objects.get(id=season_id)
+    except Season.DoesNotExist:
+        return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        competition = Competition.objects.get(id=competition_id)
+    except Competition.DoesNotExist:
+        return Response({'message': 'Competition not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        no_of_ties = seed_bracket(season, competition, qualifiers_per_group)
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'message': 'Knockout bracket created successfully', 'data': {'no_of_ties': no_of_ties}}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+def get_knockout_bracket(request):
+    """Retrieve a competition's knockout bracket in a season, round by round, with each tie's teams, match and winner. Its argument is a GET request.
+
+    Args:
+    A GET request. The request must contain the following fields:
+    season_id: The id of the season.
+    competition_id: The id of the competition.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a list of rounds and a message.
+    """
+    season_id = request.query_params.get('season_id')
+    competition_id = request.query_params.get('competition_id')
+
+    if not season_id or not competition_id:
+        return Response({'message': 'Season ID and competition ID are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        season_id = int(season_id)
+        competition_id = int(competition_id)
+    except ValueError:
+        return Response({'message': 'Invalid Season ID or competition ID'}, status=status.HTTP_400_BAD_REQUEST)
+
+    stages = get_bracket(season_id, competition_id)
+
+    if not stages:
+        return Response({'message': 'Knockout bracket not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    bracket = [
+        {'stage': stage.name, 'ties': KnockoutTieSerializer(stage.bracket_ties, many=True).data}
+        for stage in stages
+    ]
+
+    return Response({'data': bracket, 'message': 'Knockout bracket retrieved successfully'}, status=status.HTTP_200_OK)
+
+
+@api_view(['PATCH'])
+def update_knockout_tie_winner(request, id):
+    """Set the winner of a knockout tie whose match ended in a draw, e.g. after a penalty shootout. The winner advances to the next tie. Changing the winner after the next tie was played clears that tie's result, and those after it (see fixture.bracket.set_tie_winner). Ties whose match had a winner are decided automatically.
+
+    Args:
+    A JSON request. The request must contain the following fields:
+    winner: The winning team. It must be one of the tie's teams.
+    id: The id of the tie. This is passed in the URL.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message. The message is either 'Knockout tie winner updated successfully' or why the winner can't be set.
+    """
+    try:
+        winner_id = int(request.data.get('winner'))
+    except (TypeError, ValueError):
+        return Response({'message': 'Invalid winner ID'}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        try:
+            tie = KnockoutTie.objects.select_for_update().select_related('match').get(id=id)
+        except KnockoutTie.DoesNotExist:
+            return Response({'message': 'Knockout tie not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        match = tie.match
+
+        if match is None or not match.has_ended:
+            return Response({'message': "The tie's match has not ended yet"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if (match.home_team_score or 0) != (match.away_team_score or 0):
+            return Response({'message': "The tie's match did not end in a draw"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if winner_id not in (tie.home_team_id, tie.away_team_id):
+            return Response({'message': 'Winner is not playing in the tie'}, status=status.HTTP_400_BAD_REQUEST)
+
+        set_tie_winner(tie, winner_id)
+
+    return Response({'message': 'Knockout tie winner updated successfully'}, status=status.HTTP_200_OK)
+
+
 # COMPETITIONS
 @api_view(['GET'])
 def get_competitions(request):
@@ -1010,4 +1531,18 @@ def create_match_event(request, event_type):
     
     match_event = MatchEvent.objects.create(match=match, player=player, minute=minute, event_type=event_type, team=team)
     
-    return Response({'message': event_type + ' event created successfully'}, status=status.HTTP_201_CREATED)
\ No newline at end of file
+    return Response({'message': event_type + ' event created successfully'}, status=status.HTTP_201_CREATED)
+
+
+def get_starting_xis(**filters):
+    """Get starting XIs with their players and the players' positions prefetched. Serializing them takes two queries, however many starting XIs and players there are.
+
+    Args:
+    filters: The filters of the starting XIs, e.g. match_id=1.
+
+    Returns:
+        A queryset of starting XIs.
+    """
+    return StartingXI.objects.filter(**filters).order_by('match_id', 'team_id').prefetch_related(
+        Prefetch('players', queryset=Player.objects.select_related('position'))
+    )
@@ -0,0 +1,172 @@
+# feed.py
+import heapq
+import threading
+import time
+from bisect import insort
+from django.conf import settings
+from django.db import transaction
+from ashesi_premier_league.versions import bump_shared_version, get_shared_version
+
+# The name of the timelines' shared version (see ashesi_premier_league.versions)
+NEWS_TIMELINES_VERSION = 'news_timelines'
+
+
+class NewsTimelines:
+    """Per-tag lists of news item ids, newest first, kept in memory.
+    The timelines are built from the database on first use and then kept up to date by the NewsItem signal handlers in news.models, whose changes are applied when the transaction commits, so a feed page is a merge of cached lists followed by a single id__in query.
+    Every process has its own timelines, so each change also bumps the timelines' shared version. A process rebuilds its timelines before using them if the version has moved on because of a change made by another process, or if they're older than NEWS_TIMELINES_REBUILD_INTERVAL.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.is_built = False
+        # the shared version the timelines were built at, or have been kept up to date with
+        self.version = None
+        self.built_at = None
+        # tag id -> list of (-pub_date timestamp, -news item id), i.e. newest first
+        self.timelines = {}
+        # news item id -> (tag id, timeline entry), to find an item's old entry when it changes
+        self.entries = {}
+        # tag name -> tag id
+        self.tag_ids = {}
+        # team id -> tag id, for teams that have a tag of the same name
+        self.team_tag_ids = None
+
+    def build(self):
+        from news.models import NewsItem, NewsItemTag
+
+        with self.lock:
+            # the version is read first, so a change made during the build makes the next read rebuild again
+            self.version = get_shared_version(NEWS_TIMELINES_VERSION)
+            self.built_at = time.monotonic()
+            self.timelines = {}
+            self.entries = {}
+            self.tag_ids = dict(NewsItemTag.objects.values_list('name', 'id'))
+            self.team_tag_ids = None
+
+            for id, tag_id, pub_date in NewsItem.objects.values_list('id', 'tag_id', 'pub_date'):
+                self.add(id, tag_id, pub_date)
+
+            for timeline in self.timelines.values():
+                timeline.sort()
+
+            self.is_built = True
+
+    def is_up_to_date(self):
+        return (
+            self.is_built
+            and time.monotonic() - self.built_at < settings.NEWS_TIMELINES_REBUILD_INTERVAL
+            and self.version == get_shared_version(NEWS_TIMELINES_VERSION)
+        )
+
+    def ensure_built(self):
+        if not self.is_up_to_date():
+            with self.lock:
+                if not self.is_up_to_date():
+                    self.build()
+
+    def changed(self):
+        """Bump the shared version after a change this process has applied to its own timelines, so the other processes rebuild theirs."""
+        version = bump_shared_version(NEWS_TIMELINES_VERSION)
+
+        with self.lock:
+            # these timelines already have the change, so they're still up to date unless another process changed something in between
+            if self.is_built and version is not None and version == self.version + 1:
+                self.version = version
+
+    def get_entry(self, id, pub_date):
+        # negated so that ascending order is newest first
+        return (-pub_date.timestamp(), -id)
+
+    def add(self, id, tag_id, pub_date):
+        entry = self.get_entry(id, pub_date)
+        self.entries[id] = (tag_id, entry)
+        if tag_id is not None:
+            insort(self.timelines.setdefault(tag_id, []), entry)
+
+    def remove(self, id):
+        with self.lock:
+            old = self.entries.pop(id, None)
+
+            if old is None:
+                return
+
+            tag_id, entry = old
+            timeline = self.timelines.get(tag_id)
+            if timeline and entry in timeline:
+                timeline.remove(entry)
+
+    def update_news_item(self, news_item):
+        # the news item as it was saved
+        id, tag_id, pub_date = news_item.id, news_item.tag_id, news_item.pub_date
+
+        def update():
+            if self.is_built:
+                with self.lock:
+                    self.remove(id)
+                    self.add(id, tag_id, pub_date)
+            self.changed()
+
+        transaction.on_commit(update)
+
+    def remove_news_item(self, news_item):
+        id = news_item.id
+
+        def remove():
+            if self.is_built:
+                self.remove(id)
+            self.changed()
+
+        transaction.on_commit(remove)
+
+    def reset_tags(self):
+        """Forget the tag and team lookups, in every process, when the transaction commits. They are reloaded on next use."""
+        def reset():
+            with self.lock:
+                self.is_built = False
+            self.changed()
+
+        transaction.on_commit(reset)
+
+    def get_tag_ids(self, tag_names):
+        self.ensure_built()
+        return [self.tag_ids[name] for name in tag_names if name in self.tag_ids]
+
+    def get_team_tag_id(self, team_id):
+        """Get the id of the tag named after a team, e.g. 'Kasanoma', or None if there isn't one."""
+        from team.models import Team
+
+        self.ensure_built()
+
+        with self.lock:
+            if self.team_tag_ids is None:
+                self.team_tag_ids = {
+                    id: self.tag_ids[name]
+                    for id, name in Team.objects.values_list('id', 'name')
+                    if name in self.tag_ids
+                }
+            return self.team_tag_ids.get(team_id)
+
+    def get_page(self, tag_ids, offset, limit):
+        """Get a page of news item ids from one or more tags' timelines.
+
+        Args:
+            tag_ids: The ids of the tags to include.
+            offset: The number of news items to skip.
+            limit: The number of news items to return.
+
+        Returns:
+            A tuple of (list of news item ids, newest first, total number of news items).
+        """
+        self.ensure_built()
+
+        with self.lock:
+            timelines = [self.timelines.get(tag_id, []) for tag_id in set(tag_ids)]
+            total = sum(len(timeline) for timeline in timelines)
+            merged = heapq.merge(*timelines)
+            page = [entry for index, entry in zip(range(offset + limit), merged)][offset:]
+
+        return [-negated_id for timestamp, negated_id in page], total
+
+
+news_timelines = NewsTimelines()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from news.models import NewsItem, index_news_item
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the news search index from every news item. New and updated news items are indexed automatically, so this is only needed for news items created before the index existed.'
+
+    def handle(self, *args, **options):
+        count = 0
+
+        with transaction.atomic():
+            for news_item in NewsItem.objects.all().iterator():
+                index_news_item(news_item)
+                count += 1
+
+        self.stdout.write(f'Indexed {count} news item(s)')
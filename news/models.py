@@ -1,8 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from cloudinary.models import CloudinaryField
 from django.utils import timezone
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete
 from django.dispatch import receiver
+from news.search import get_term_weights
+from news.feed import news_timelines
 
 class NewsItemTag(models.Model):
     
@@ -85,3 +87,63 @@ class NewsItem(models.Model):
     class Meta:
         ordering = ['-pub_date']
         verbose_name_plural = 'news items'
+
+
+class NewsSearchTerm(models.Model):
+    """An entry in the news search index. There is one row per term per news item. The weight reflects how often and where (title, subtitle or text) the term appears. See news.search."""
+    
+    term = models.CharField(max_length=50, null=False, blank=False)
+    news_item = models.ForeignKey(NewsItem, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return self.term + ' - ' + str(self.news_item_id)
+    
+    class Meta:
+        unique_together = ('term', 'news_item')
+        indexes = [
+            models.Index(fields=['term', 'weight']),
+        ]
+
+
+def index_news_item(news_item):
+    """Replace a news item's entries in the search index."""
+    NewsSearchTerm.objects.filter(news_item=news_item).delete()
+    NewsSearchTerm.objects.bulk_create([
+        NewsSearchTerm(term=term, news_item=news_item, weight=weight)
+        for term, weight in get_term_weights(news_item).items()
+    ])
+
+
+# Reindex a news item whenever it's created or updated, once the transaction commits. Deleted news items lose their entries through the cascade.
+@receiver(post_save, sender=NewsItem)
+def update_news_search_index(sender, instance, **kwargs):
+    news_item_id = instance.id
+
+    def reindex():
+        # read again, as the news item may have been changed or deleted later in the same transaction
+        news_item = NewsItem.objects.filter(id=news_item_id).first()
+        if news_item is not None:
+            with transaction.atomic():
+                index_news_item(news_item)
+
+    transaction.on_commit(reindex)
+
+
+# Keep the cached per-tag news timelines (see news.feed) up to date. The changes are applied when the transaction commits.
+@receiver(post_save, sender=NewsItem)
+def update_news_timelines(sender, instance, **kwargs):
+    news_timelines.update_news_item(instance)
+
+
+@receiver(post_delete, sender=NewsItem)
+def remove_from_news_timelines(sender, instance, **kwargs):
+    news_timelines.remove_news_item(instance)
+
+
+@receiver(post_save, sender=NewsItemTag)
+@receiver(post_delete, sender=NewsItemTag)
+@receiver(post_save, sender='team.Team')
+@receiver(post_delete, sender='team.Team')
+def reset_news_timeline_tags(sender, instance, **kwargs):
+    news_timelines.reset_tags()
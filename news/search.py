@@ -0,0 +1,78 @@
+# search.py
+import re
+
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# How much a single occurrence of a word counts towards a news item's score, by field
+TITLE_WEIGHT = 5
+SUBTITLE_WEIGHT = 3
+TEXT_WEIGHT = 1
+
+# The number of characters shown either side of the first match in a snippet
+SNIPPET_RADIUS = 80
+
+MAX_TERM_LENGTH = 50
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'has', 'have', 'he', 'her', 'his',
+    'in', 'is', 'it', 'its', 'of', 'on', 'or', 'she', 'that', 'the', 'their', 'they', 'this', 'to', 'was',
+    'were', 'will', 'with',
+}
+
+
+def tokenize(value):
+    """Split a string into lowercase search terms, leaving out stop words."""
+    return [word[:MAX_TERM_LENGTH] for word in WORD_PATTERN.findall((value or '').lower()) if word not in STOP_WORDS]
+
+
+def get_term_weights(news_item):
+    """Get the weight of every term in a news item. Terms in the title count more than terms in the subtitle, which count more than terms in the text.
+
+    Args:
+        news_item: The news item to index.
+
+    Returns:
+        A dictionary of term -> weight.
+    """
+    weights = {}
+
+    for value, weight in ((news_item.title, TITLE_WEIGHT), (news_item.subtitle, SUBTITLE_WEIGHT), (news_item.text, TEXT_WEIGHT)):
+        for term in tokenize(value):
+            weights[term] = weights.get(term, 0) + weight
+
+    return weights
+
+
+def get_snippet(text, terms):
+    """Get the part of a news item's text around the first occurrence of any of the search terms.
+
+    Args:
+        text: The text of the news item.
+        terms: The search terms.
+
+    Returns:
+        A string. It starts/ends with '...' when text has been cut off.
+    """
+    text = text or ''
+    first_match = None
+
+    for match in WORD_PATTERN.finditer(text):
+        if match.group().lower() in terms:
+            first_match = match
+            break
+
+    if first_match is None:
+        start = 0
+    else:
+        start = max(first_match.start() - SNIPPET_RADIUS, 0)
+
+    end = min(start + 2 * SNIPPET_RADIUS, len(text))
+    snippet = text[start:end].strip()
+
+    if start > 0:
+        snippet = '...' + snippet
+    if end < len(text):
+        snippet = snippet + '...'
+
+    return snippet
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from ashesi_premier_league.loader import BatchedListSerializer
 from account.models import Fan
 from account.serializers import FanSerializer
 from django.utils.html import strip_tags
@@ -16,6 +17,11 @@ class NewsItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = NewsItem
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+    
+    @classmethod
+    def prime_relations(cls, news_items, loader):
+        loader.load_related(news_items, 'tag', 'author')
     
     def to_representation(self, instance):
         # When retrieving a news item, include the tag associated with the news item.
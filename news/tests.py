@@ -1,3 +1,131 @@
+import datetime
+import io
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ashesi_premier_league.versions import bump_shared_version
+from news.feed import NEWS_TIMELINES_VERSION, news_timelines
+from news.models import NewsItem, NewsItemTag, NewsSearchTerm
 
-# Create your tests here.
+
+class NewsFeedTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # the timelines outlive each test's database, so every test starts with fresh ones
+        news_timelines.is_built = False
+        self.tag = NewsItemTag.objects.get(name='APL')
+        self.news_item = self.create_news_item('Kasanoma win the league')
+
+    def create_news_item(self, title, tag=None):
+        # the timelines and search terms are updated when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return NewsItem.objects.create(featured_image='image.jpg', title=title, subtitle=title, text=title, tag=tag or self.tag)
+
+    def get_feed(self, tags='APL'):
+        response = APIClient().get('/news-item/feed/get', {'tags': tags})
+        self.assertEqual(response.status_code, 200)
+        return [news_item['id'] for news_item in response.data['data']]
+
+    def test_repeated_tags_are_found(self):
+        self.assertEqual(self.get_feed('APL,APL, APL'), [self.news_item.id])
+
+    def test_changes_made_in_this_process_keep_the_timelines(self):
+        self.assertEqual(news_timelines.get_page([self.tag.id], 0, 10)[0], [self.news_item.id])
+
+        news_item = self.create_news_item('Elite sign a new coach')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(news_timelines.get_page([self.tag.id], 0, 10)[0], [news_item.id, self.news_item.id])
+
+    def test_rolled_back_changes_are_not_seen(self):
+        news_item_id = self.news_item.id
+        self.assertEqual(self.get_feed(), [news_item_id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    NewsItem.objects.create(featured_image='image.jpg', title='Elite sign a new coach', subtitle='', text='', tag=self.tag)
+                    self.news_item.delete()
+                    raise ValueError
+            except ValueError:
+                pass
+
+        with self.assertNumQueries(0):
+            self.assertEqual(news_timelines.get_page([self.tag.id], 0, 10)[0], [news_item_id])
+
+        response = APIClient().get('/news-item/search/get', {'q': 'coach'})
+        self.assertEqual(response.data['count'], 0)
+
+    def test_changes_made_in_another_process_rebuild_the_timelines(self):
+        self.assertEqual(self.get_feed(), [self.news_item.id])
+
+        # update() sends no signals, so only the shared version tells this process about the change
+        other_tag = NewsItemTag.objects.get(name='Transfer')
+        NewsItem.objects.filter(id=self.news_item.id).update(tag=other_tag)
+        bump_shared_version(NEWS_TIMELINES_VERSION)
+
+        self.assertEqual(self.get_feed(), [])
+        self.assertEqual(self.get_feed('Transfer'), [self.news_item.id])
+
+
+class NewsSearchTests(TestCase):
+
+    def create_news_item(self, title, subtitle='Match report', text='', tag='APL', days_ago=0):
+        # the search terms are written when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return NewsItem.objects.create(
+                featured_image='image.jpg', title=title, subtitle=subtitle, text=text,
+                tag=NewsItemTag.objects.get(name=tag), pub_date=timezone.now() - datetime.timedelta(days=days_ago),
+            )
+
+    def search(self, q, **params):
+        response = APIClient().get('/news-item/search/get', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [news_item['id'] for news_item in response.data['data']]
+
+    def test_results_are_ranked_by_terms_matched_then_weight_then_date(self):
+        in_text = self.create_news_item('Derby day', text='Kasanoma beat Elite')
+        in_title = self.create_news_item('Kasanoma win', days_ago=2)
+        older_in_title = self.create_news_item('Kasanoma draw', days_ago=3)
+        both_terms = self.create_news_item('Elite lose', text='Kasanoma', days_ago=5)
+
+        self.assertEqual(self.search('kasanoma elite'), [both_terms.id, in_text.id, in_title.id, older_in_title.id])
+        self.assertEqual(self.search('kasanoma'), [in_title.id, older_in_title.id, in_text.id, both_terms.id])
+
+    def test_edits_are_reindexed(self):
+        news_item = self.create_news_item('Kasanoma win')
+
+        news_item.title = 'Elite win'
+        with self.captureOnCommitCallbacks(execute=True):
+            news_item.save()
+
+        self.assertEqual(self.search('kasanoma'), [])
+        self.assertEqual(self.search('elite'), [news_item.id])
+
+    def test_results_can_be_filtered_and_paged(self):
+        news_items = [self.create_news_item('Kasanoma win', days_ago=days_ago) for days_ago in range(3)]
+        transfer = self.create_news_item('Kasanoma sign a striker', tag='Transfer', days_ago=10)
+
+        self.assertEqual(self.search('kasanoma', tag='Transfer'), [transfer.id])
+        self.assertEqual(self.search('kasanoma', to_date=(timezone.now() - datetime.timedelta(days=5)).date().isoformat()), [transfer.id])
+        self.assertEqual(self.search('kasanoma', page=2, page_size=2), [news_items[2].id, transfer.id])
+
+    def test_snippets_show_the_text_around_the_first_match(self):
+        self.create_news_item('Derby day', text='word ' * 100 + 'Kasanoma scored late')
+
+        response = APIClient().get('/news-item/search/get', {'q': 'kasanoma'})
+        snippet = response.data['data'][0]['snippet']
+        self.assertTrue(snippet.startswith('...'))
+        self.assertIn('Kasanoma scored late', snippet)
+
+    def test_the_rebuild_command_indexes_every_news_item(self):
+        news_item = self.create_news_item('Kasanoma win')
+        NewsSearchTerm.objects.all().delete()
+
+        call_command('rebuild_news_search_index', stdout=io.StringIO())
+
+        self.assertEqual(self.search('kasanoma'), [news_item.id])
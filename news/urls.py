@@ -1,5 +1,5 @@
 from django.urls import path
-from news.views import create_news_item, update_news_item, delete_news_item, get_news_items, get_news_item, create_news_item_tag, get_tags
+from news.views import create_news_item, update_news_item, delete_news_item, get_news_items, get_news_item, create_news_item_tag, get_tags, search_news_items, get_news_feed
 
 
 urlpatterns = [
@@ -8,6 +8,8 @@ urlpatterns = [
     path('news-item/delete/<int:id>/', delete_news_item, name='delete_news_item'),
     path('news-item/get/', get_news_items, name='get_news_items'),
     path('news-item/get', get_news_item, name='get_news_item'),
+    path('news-item/search/get', search_news_items, name='search_news_items'),
+    path('news-item/feed/get', get_news_feed, name='get_news_feed'),
     
     path('news-item-tag/create/', create_news_item_tag, name='create_news_item_tag'),
     path('news-item-tag/get/', get_tags, name='get_tags'),
@@ -4,8 +4,12 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework.authtoken.models import Token
-from news.models import NewsItem, NewsItemTag
+from django.db.models import Count, Max, Sum
+from django.utils.dateparse import parse_date
+from news.models import NewsItem, NewsItemTag, NewsSearchTerm
 from news.serializers import NewsItemSerializer, NewsItemTagSerializer
+from news.search import tokenize, get_snippet
+from news.feed import news_timelines
 from cloudinary.uploader import upload
 import os
 
@@ -187,4 +191,114 @@ def get_news_item(request):
         return Response({'message': 'News item not found'}, status=status.HTTP_404_NOT_FOUND)
 
     serializer = NewsItemSerializer(news_item)
-    return Response({'message': 'News item retrieved successfully', 'data': serializer.data}, status=status.HTTP_200_OK)
\ No newline at end of file
+    return Response({'message': 'News item retrieved successfully', 'data': serializer.data}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def search_news_items(request):
+    """Search news items by their title, subtitle and text. Results are ranked by the number of search terms they contain, then by how often and where the terms appear (title matches count the most), then by publication date. The search is served from the NewsSearchTerm index, which is updated when a transaction that saves a news item commits.
+
+    Args:
+    request: A get request. The request must contain the following fields:
+    q: The search text.
+    The request can contain any combination of the following fields:
+    tag: The name of a news item tag, e.g. 'APL'.
+    from_date: Only include news items published on or after this date (YYYY-MM-DD).
+    to_date: Only include news items published on or before this date (YYYY-MM-DD).
+    page: The page of results. Defaults to 1.
+    page_size: The number of results per page. Defaults to 10, up to a maximum of 50.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message, the total number of results, and a page of news items. Each news item includes its score and a snippet of its text around the first match.
+    """
+    params = request.query_params
+    terms = tokenize(params.get('q'))
+
+    if not terms:
+        return Response({'message': 'Search text is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        page = max(int(params.get('page', 1)), 1)
+        page_size = min(max(int(params.get('page_size', 10)), 1), 50)
+    except ValueError:
+        return Response({'message': 'Invalid page or page size'}, status=status.HTTP_400_BAD_REQUEST)
+
+    search_terms = NewsSearchTerm.objects.filter(term__in=terms)
+
+    if params.get('tag'):
+        search_terms = search_terms.filter(news_item__tag__name=params.get('tag'))
+
+    for param, lookup in (('from_date', 'news_item__pub_date__date__gte'), ('to_date', 'news_item__pub_date__date__lte')):
+        if params.get(param):
+            date = parse_date(params.get(param))
+            if date is None:
+                return Response({'message': 'Invalid ' + param.replace('_', ' ')}, status=status.HTTP_400_BAD_REQUEST)
+            search_terms = search_terms.filter(**{lookup: date})
+
+    ranked_news_items = search_terms.values('news_item').annotate(
+        matched_terms=Count('term'),
+        score=Sum('weight'),
+        latest_pub_date=Max('news_item__pub_date'),
+    ).order_by('-matched_terms', '-score', '-latest_pub_date')
+
+    no_of_results = ranked_news_items.count()
+    offset = (page - 1) * page_size
+    ranked_page = list(ranked_news_items[offset:offset + page_size])
+
+    news_items = NewsItem.objects.select_related('tag', 'author').in_bulk([row['news_item'] for row in ranked_page])
+
+    results = []
+    for row in ranked_page:
+        news_item = news_items[row['news_item']]
+        result = NewsItemSerializer(news_item).data
+        result['score'] = row['score']
+        result['snippet'] = get_snippet(news_item.text, set(terms))
+        results.append(result)
+
+    return Response({'message': 'News items retrieved successfully', 'count': no_of_results, 'page': page, 'page_size': page_size, 'data': results}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_news_feed(request):
+    """Get a feed of the latest news items for one or more tags, e.g. 'APL' or 'Kasanoma'. If no tags are given, the feed is personalized: it contains the news for the signed in fan's favourite team. The feed is served from cached per-tag timelines (see news.feed), so a page costs a single database query.
+
+    Args:
+    request: A get request. The request can contain any combination of the following fields:
+    tags: A comma-separated list of tag names. Required if the request is not authenticated.
+    page: The page of the feed. Defaults to 1.
+    page_size: The number of news items per page. Defaults to 10, up to a maximum of 50.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message, the total number of news items in the feed, and a page of news items, newest first.
+    """
+    params = request.query_params
+
+    try:
+        page = max(int(params.get('page', 1)), 1)
+        page_size = min(max(int(params.get('page_size', 10)), 1), 50)
+    except ValueError:
+        return Response({'message': 'Invalid page or page size'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if params.get('tags'):
+        # deduplicated, so that e.g. 'APL,APL' has one tag id per name
+        tag_names = list(dict.fromkeys(name.strip() for name in params.get('tags').split(',') if name.strip()))
+        tag_ids = news_timelines.get_tag_ids(tag_names)
+
+        if len(tag_ids) != len(tag_names):
+            return Response({'message': 'Tag not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    elif request.user.is_authenticated:
+        tag_id = news_timelines.get_team_tag_id(request.user.fav_team_id)
+        tag_ids = [tag_id] if tag_id is not None else []
+
+    else:
+        return Response({'message': 'Tags are required, or sign in to get your favourite team\'s news'}, status=status.HTTP_400_BAD_REQUEST)
+
+    ids, no_of_news_items = news_timelines.get_page(tag_ids, (page - 1) * page_size, page_size)
+
+    news_items = NewsItem.objects.select_related('tag', 'author').in_bulk(ids)
+    # keep the timeline order, skipping any news item deleted by another process
+    news_items = [news_items[id] for id in ids if id in news_items]
+
+    serializer = NewsItemSerializer(news_items, many=True)
+    return Response({'message': 'News feed retrieved successfully', 'count': no_of_news_items, 'page': page, 'page_size': page_size, 'data': serializer.data}, status=status.HTTP_200_OK)
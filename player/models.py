@@ -1,7 +1,8 @@
 from django.db import models
 from cloudinary.models import CloudinaryField
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete
 from django.dispatch import receiver
+from player.search import search_index
 
 class PlayerPosition(models.Model):
     id = models.AutoField(primary_key=True)
@@ -73,4 +74,40 @@ class Coach(models.Model):
     last_name = models.CharField(max_length=100, default=None)
     team = models.ForeignKey('team.Team', on_delete=models.SET_DEFAULT, related_name='coaches', null=True, blank=True, default=None)
     is_active = models.BooleanField(default=True)
-    gender = models.CharField(max_length = 1, choices = GENDER_CHOICES)
\ No newline at end of file
+    gender = models.CharField(max_length = 1, choices = GENDER_CHOICES)
+
+
+# Keep the search index (see player.search) up to date
+@receiver(post_save, sender=Player)
+def index_player(sender, instance, **kwargs):
+    search_index.update_player(instance)
+
+
+@receiver(post_delete, sender=Player)
+def unindex_player(sender, instance, **kwargs):
+    search_index.remove('player', instance.id)
+
+
+@receiver(post_save, sender=Coach)
+def index_coach(sender, instance, **kwargs):
+    search_index.update_coach(instance)
+
+
+@receiver(post_delete, sender=Coach)
+def unindex_coach(sender, instance, **kwargs):
+    search_index.remove('coach', instance.id)
+
+
+@receiver(post_save, sender='team.Team')
+def index_team(sender, instance, **kwargs):
+    search_index.update_team(instance)
+
+
+@receiver(post_delete, sender='team.Team')
+def unindex_team(sender, instance, **kwargs):
+    search_index.remove('team', instance.id)
+
+
+@receiver(post_save, sender=PlayerPosition)
+def index_position(sender, instance, **kwargs):
+    search_index.update_position(instance)
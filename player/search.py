@@ -0,0 +1,352 @@
+# search.py
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from django.conf import settings
+from django.db import transaction
+from ashesi_premier_league.versions import bump_shared_version, get_shared_version
+
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# Query terms shorter than this are only matched exactly or by prefix
+MIN_FUZZY_TERM_LENGTH = 3
+
+# Scores for the different ways a query term can match an indexed word
+EXACT_MATCH_SCORE = 3
+PREFIX_MATCH_SCORE = 2
+FUZZY_MATCH_SCORE = 1
+
+# The name of the index's shared version (see ashesi_premier_league.versions)
+SEARCH_INDEX_VERSION = 'search_index'
+
+
+def tokenize(value):
+    """Split a string into lowercase words."""
+    return WORD_PATTERN.findall((value or '').lower())
+
+
+def get_deletes(word):
+    """Get every variant of a word with one character removed. Two words within one edit of each other share at least one of these variants (or the word itself)."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def is_within_one_edit(a, b):
+    """Check whether two words are at most one insertion, deletion, substitution or adjacent transposition apart."""
+    if a == b:
+        return True
+
+    if abs(len(a) - len(b)) > 1:
+        return False
+
+    if len(a) == len(b):
+        differences = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(differences) == 1:
+            return True
+        # adjacent transposition e.g. 'kawme' -> 'kwame'
+        if len(differences) == 2:
+            i, j = differences
+            return j == i + 1 and a[i] == b[j] and a[j] == b[i]
+        return False
+
+    # one insertion/deletion
+    if len(a) > len(b):
+        a, b = b, a
+    for i in range(len(b)):
+        if b[:i] + b[i + 1:] == a:
+            return True
+    return False
+
+
+class SearchIndex:
+    """An in-memory search index over players, coaches and teams.
+    The index is built from the database on the first search and then kept up to date by the save/delete signal handlers in player.models. Their changes are applied when the transaction commits, so a rolled back change is never searchable.
+    Every process has its own index, so each change also bumps the index's shared version. A process rebuilds its index before searching if the version has moved on because of a change made by another process, or if the index is older than SEARCH_INDEX_REBUILD_INTERVAL, which catches changes that send no signals.
+    Each document is keyed by (type, id), e.g. ('player', 4).
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.is_built = False
+        # the shared version the index was built at, or has been kept up to date with
+        self.version = None
+        self.built_at = None
+        self.documents = {}
+        # word -> set of document keys
+        self.postings = {}
+        # all indexed words, sorted, for prefix lookups
+        self.words = []
+        # one-character deletion -> set of words, for typo-tolerant lookups
+        self.deletes = {}
+        # position id -> position abbreviation
+        self.positions = {}
+
+    # BUILDING
+
+    def build(self):
+        """Rebuild the whole index from the database."""
+        from player.models import Coach, Player, PlayerPosition
+        from team.models import Team
+
+        with self.lock:
+            # the version is read first, so a change made during the build makes the next search rebuild again
+            self.version = get_shared_version(SEARCH_INDEX_VERSION)
+            self.built_at = time.monotonic()
+            self.documents = {}
+            self.postings = {}
+            self.words = []
+            self.deletes = {}
+            self.positions = {position.id: position.name_abbreviation for position in PlayerPosition.objects.all()}
+
+            for team in Team.objects.all():
+                self.add_document(('team', team.id), self.get_team_document(team))
+
+            for player in Player.objects.all():
+                self.add_document(('player', player.id), self.get_player_document(player))
+
+            for coach in Coach.objects.all():
+                self.add_document(('coach', coach.id), self.get_coach_document(coach))
+
+            self.is_built = True
+
+    def is_up_to_date(self):
+        return (
+            self.is_built
+            and time.monotonic() - self.built_at < settings.SEARCH_INDEX_REBUILD_INTERVAL
+            and self.version == get_shared_version(SEARCH_INDEX_VERSION)
+        )
+
+    def ensure_built(self):
+        if not self.is_up_to_date():
+            with self.lock:
+                if not self.is_up_to_date():
+                    self.build()
+
+    def changed(self):
+        """Bump the shared version after a change this process has applied to its own index, so the other processes rebuild theirs."""
+        version = bump_shared_version(SEARCH_INDEX_VERSION)
+
+        with self.lock:
+            # this index already has the change, so it's still up to date unless another process changed something in between
+            if self.is_built and version is not None and version == self.version + 1:
+                self.version = version
+
+    def get_player_document(self, player):
+        return {
+            'type': 'player',
+            'id': player.id,
+            'first_name': player.first_name,
+            'last_name': player.last_name,
+            'gender': player.gender,
+            'team_id': player.team_id,
+            'position_id': player.position_id,
+            'is_active': player.is_active,
+            'words': tokenize(player.first_name) + tokenize(player.last_name),
+        }
+
+    def get_coach_document(self, coach):
+        return {
+            'type': 'coach',
+            'id': coach.id,
+            'first_name': coach.first_name,
+            'last_name': coach.last_name,
+            'gender': coach.gender,
+            'team_id': coach.team_id,
+            'position_id': None,
+            'is_active': coach.is_active,
+            'words': tokenize(coach.first_name) + tokenize(coach.last_name),
+        }
+
+    def get_team_document(self, team):
+        return {
+            'type': 'team',
+            'id': team.id,
+            'name': team.name,
+            'name_abbreviation': team.name_abbreviation,
+            'gender': None,
+            'team_id': team.id,
+            'position_id': None,
+            'is_active': team.is_active,
+            'words': tokenize(team.name) + tokenize(team.name_abbreviation),
+        }
+
+    # INCREMENTAL UPDATES
+
+    def add_document(self, key, document):
+        with self.lock:
+            self.remove_document(key)
+            self.documents[key] = document
+
+            for word in set(document['words']):
+                if word not in self.postings:
+                    self.postings[word] = set()
+                    insort(self.words, word)
+                    for deleted in get_deletes(word):
+                        self.deletes.setdefault(deleted, set()).add(word)
+                self.postings[word].add(key)
+
+    def remove_document(self, key):
+        with self.lock:
+            document = self.documents.pop(key, None)
+
+            if document is None:
+                return
+
+            for word in set(document['words']):
+                keys = self.postings.get(word)
+                if keys is None:
+                    continue
+                keys.discard(key)
+
+                # drop words no longer used by any document
+                if not keys:
+                    del self.postings[word]
+                    del self.words[bisect_left(self.words, word)]
+                    for deleted in get_deletes(word):
+                        words = self.deletes.get(deleted)
+                        if words is not None:
+                            words.discard(word)
+                            if not words:
+                                del self.deletes[deleted]
+
+    def update_player(self, player):
+        self.update_document(('player', player.id), self.get_player_document(player))
+
+    def update_coach(self, coach):
+        self.update_document(('coach', coach.id), self.get_coach_document(coach))
+
+    def update_team(self, team):
+        self.update_document(('team', team.id), self.get_team_document(team))
+
+    def update_position(self, position):
+        position_id, name_abbreviation = position.id, position.name_abbreviation
+
+        def update():
+            if self.is_built:
+                with self.lock:
+                    self.positions[position_id] = name_abbreviation
+            self.changed()
+
+        transaction.on_commit(update)
+
+    def update_document(self, key, document):
+        """Add or replace a document when the current transaction commits. The document is made now, from the object as it was saved."""
+        def update():
+            if self.is_built:
+                self.add_document(key, document)
+            self.changed()
+
+        transaction.on_commit(update)
+
+    def remove(self, document_type, id):
+        def remove():
+            if self.is_built:
+                self.remove_document((document_type, id))
+            self.changed()
+
+        transaction.on_commit(remove)
+
+    # SEARCHING
+
+    def match_term(self, term):
+        """Find the documents matching one query term.
+
+        Returns:
+            A dictionary of document key -> score for the term's best match in that document.
+        """
+        scores = {}
+
+        def add_matches(word, score):
+            for key in self.postings.get(word, ()):
+                if scores.get(key, 0) < score:
+                    scores[key] = score
+
+        # words starting with the term (includes the exact match)
+        start = bisect_left(self.words, term)
+        for word in self.words[start:]:
+            if not word.startswith(term):
+                break
+            add_matches(word, EXACT_MATCH_SCORE if word == term else PREFIX_MATCH_SCORE)
+
+        # words within one typo of the term
+        if len(term) >= MIN_FUZZY_TERM_LENGTH:
+            candidates = set(self.deletes.get(term, ()))
+            for deleted in get_deletes(term):
+                if deleted in self.postings:
+                    candidates.add(deleted)
+                candidates.update(self.deletes.get(deleted, ()))
+
+            for word in candidates:
+                if word != term and is_within_one_edit(term, word):
+                    add_matches(word, FUZZY_MATCH_SCORE)
+
+        return scores
+
+    def matches_filters(self, document, filters):
+        if filters.get('type') and document['type'] != filters['type']:
+            return False
+        if filters.get('gender') and document['gender'] != filters['gender']:
+            return False
+        if filters.get('team_id') is not None and document['team_id'] != filters['team_id']:
+            return False
+        if filters.get('position_id') is not None and document['position_id'] != filters['position_id']:
+            return False
+        if filters.get('is_active') is not None and document['is_active'] != filters['is_active']:
+            return False
+        return True
+
+    def search(self, query, filters=None, limit=20):
+        """Search the index. Every term in the query must match a word in a document, exactly, by prefix or within one typo.
+
+        Args:
+            query: The search text.
+            filters: A dictionary with any of the keys type, gender, team_id, position_id and is_active.
+            limit: The maximum number of results.
+
+        Returns:
+            A list of result dictionaries, best match first.
+        """
+        self.ensure_built()
+        filters = filters or {}
+        terms = tokenize(query)
+
+        if not terms:
+            return []
+
+        with self.lock:
+            scores = None
+            for term in terms:
+                term_scores = self.match_term(term)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+                if not scores:
+                    return []
+
+            results = []
+            for key, score in scores.items():
+                document = self.documents[key]
+                if self.matches_filters(document, filters):
+                    results.append((score, document))
+
+            results.sort(key=lambda result: (-result[0], ' '.join(result[1]['words'])))
+            return [self.get_result(document, score) for score, document in results[:limit]]
+
+    def get_result(self, document, score):
+        result = {key: value for key, value in document.items() if key != 'words'}
+        result['score'] = score
+
+        if document['type'] != 'team':
+            team = self.documents.get(('team', document['team_id']))
+            result['team_name'] = team['name'] if team else None
+            result['team_name_abbreviation'] = team['name_abbreviation'] if team else None
+
+        if document['type'] == 'player':
+            result['position'] = self.positions.get(document['position_id'])
+
+        return result
+
+
+search_index = SearchIndex()
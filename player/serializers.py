@@ -1,3 +1,5 @@
+from ashesi_premier_league.loader import BatchedListSerializer, get_loader
+from django.db.models import Count
 from fixture.models import Goal
 from player.models import Player, PlayerPosition, Coach
 from rest_framework import serializers
@@ -7,6 +9,14 @@ import re
 from django.utils import timezone
 year_group_pattern = re.compile(r'^\d{4}$')
 
+
+def get_player_goal_counts(player_ids):
+    """Get the number of goals each of some players scored in history, with one grouped query. Players without goals are left out."""
+    return dict(
+        Goal.objects.filter(match_event__player_id__in=player_ids).values('match_event__player_id').annotate(no_of_goals=Count('id')).values_list('match_event__player_id', 'no_of_goals').order_by()
+    )
+
+
 class PlayerPositionSerializer(serializers.ModelSerializer):
     class Meta:
         model = PlayerPosition
@@ -19,6 +29,13 @@ class PlayerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Player
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+        
+    @classmethod
+    def prime_relations(cls, players, loader):
+        # load the positions and teams of many players, and register them for one goal count query (see ashesi_premier_league.loader)
+        loader.load_related(players, 'position', 'team')
+        loader.prime('player_goal_counts', (player.id for player in players))
         
         
     def to_representation(self, instance):
@@ -33,9 +50,8 @@ class PlayerSerializer(serializers.ModelSerializer):
             player_image = representation.get('image', '')
             representation['image'] = representation['image'].url
         
-        # get no of goals scored in history
-        goals = Goal.objects.filter(match_event__player=instance)
-        representation['no_of_goals_in_history'] = len(goals)
+        # get no of goals scored in history. The counts of every player being serialized are loaded together.
+        representation['no_of_goals_in_history'] = get_loader().get('player_goal_counts', instance.id, get_player_goal_counts, default=0)
         return representation
     
     def extract_image_url(self, value):
@@ -53,6 +69,11 @@ class CoachSerializer(serializers.ModelSerializer):
     class Meta:
         model = Coach
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+        
+    @classmethod
+    def prime_relations(cls, coaches, loader):
+        loader.load_related(coaches, 'team')
         
         
     def to_representation(self, instance):
@@ -1,3 +1,73 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from ashesi_premier_league.versions import bump_shared_version
+from ashesi_premier_league.testing import create_player
+from player.models import Player
+from player.search import SEARCH_INDEX_VERSION, search_index
+from team.models import Team
 
-# Create your tests here.
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # the index outlives each test's database, so every test starts with a fresh one
+        search_index.is_built = False
+        self.player = create_player(Team.objects.first())
+
+    def search(self, query):
+        return [result['id'] for result in search_index.search(query, {'type': 'player'}, 20)]
+
+    def test_changes_made_in_this_process_keep_the_index(self):
+        self.assertEqual(self.search('kofi'), [self.player.id])
+
+        self.player.first_name = 'Kwame'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.player.save()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search('kwame'), [self.player.id])
+
+    def test_changes_are_searchable_once_committed(self):
+        self.assertEqual(self.search('kofi'), [self.player.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.player.first_name = 'Kwame'
+                    self.player.save()
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.player.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search('kofi'), [self.player.id])
+            self.assertEqual(self.search('kwame'), [])
+
+    def test_changes_made_in_another_process_rebuild_the_index(self):
+        self.assertEqual(self.search('kofi'), [self.player.id])
+
+        # update() sends no signals, so only the shared version tells this process about the change
+        Player.objects.filter(id=self.player.id).update(first_name='Kwame')
+        bump_shared_version(SEARCH_INDEX_VERSION)
+
+        self.assertEqual(self.search('kwame'), [self.player.id])
+
+    @override_settings(SEARCH_INDEX_REBUILD_INTERVAL=0)
+    def test_the_index_is_rebuilt_after_the_rebuild_interval(self):
+        self.assertEqual(self.search('kofi'), [self.player.id])
+
+        Player.objects.filter(id=self.player.id).update(first_name='Kwame')
+
+        self.assertEqual(self.search('kwame'), [self.player.id])
+
+    def test_limit_must_be_at_least_1(self):
+        response = APIClient().get('/search/get', {'q': 'kofi', 'limit': -3})
+        self.assertEqual(response.status_code, 400)
+
+        response = APIClient().get('/search/get', {'q': 'kofi', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 1)
@@ -1,5 +1,5 @@
 from django.urls import path
-from player.views import create_player, update_player, get_players, get_player, create_coach, get_coaches, get_coach, update_coach, get_positions
+from player.views import create_player, update_player, get_players, get_player, create_coach, get_coaches, get_coach, update_coach, get_positions, search, get_player_career
 
 
 urlpatterns = [
@@ -7,6 +7,7 @@ urlpatterns = [
     path('player/update/<int:id>/', update_player, name='update_player'),
     path('player/get/', get_players, name='get_players'),
     path('player/get', get_player, name='get_player'),
+    path('player/career/get', get_player_career, name='get_player_career'),
     
     path('coach/create/', create_coach, name='create_coach'),
     path('coach/update/<int:id>/', update_coach, name='update_coach'),
@@ -15,4 +16,6 @@ urlpatterns = [
     
     path('position/get/', get_positions, name='get_positions'),
     
+    path('search/get', search, name='search'),
+    
 ]
\ No newline at end of file
@@ -5,6 +5,8 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from player.models import Player, PlayerPosition
 from player.serializers import PlayerSerializer, PlayerPositionSerializer
+from player.search import search_index
+from stats.career import get_career
 from cloudinary.uploader import upload
 
 
@@ -172,6 +174,34 @@ def get_player(request):
     return Response({'message': 'Player retrieved successfully', 'data': serializer.data}, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+def get_player_career(request):
+    """Get a player's career: their appearances, minutes, goals, assists, cards and man of the match awards in each season and competition, and the teams they played for. The career is cached until one of the player's events changes. See stats.career.
+
+    Args:
+    request: A get request. The request must contain the id of the player.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and the player's career.
+    """
+    id_param = request.query_params.get('id')
+
+    if not id_param:
+        return Response({'message': 'Player ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        id = int(id_param)
+    except ValueError:
+        return Response({'message': 'Invalid Player ID'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        player = Player.objects.get(id=id)
+    except Player.DoesNotExist:
+        return Response({'message': 'Player not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'message': 'Player career retrieved successfully', 'data': get_career(player)}, status=status.HTTP_200_OK)
+
+
 # COACHES
 from player.models import Coach
 from player.serializers import CoachSerializer
@@ -278,3 +308,59 @@ def get_coach(request):
 
     serializer = CoachSerializer(coach)
     return Response({'message': 'Coach retrieved successfully', 'data': serializer.data}, status=status.HTTP_200_OK)
+
+
+# SEARCH
+@api_view(['GET'])
+def search(request):
+    """Search players, coaches and teams by name. Matches are exact, by prefix (e.g. 'kwa' finds 'Kwame') or within one typo (e.g. 'kwmae' finds 'Kwame'). The search is served from an in-memory index (see player.search).
+
+    Args:
+    A GET request. The request must contain the following fields:
+    q: The search text.
+    The request can contain any combination of the following fields:
+    type: 'player', 'coach' or 'team'.
+    gender: It's either M or W.
+    team_id: Only return results for this team.
+    position_id: Only return players in this position.
+    is_active: 'true' or 'false'.
+    limit: The maximum number of results, at least 1. Defaults to 20, up to a maximum of 100.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and a list of results, best match first.
+    """
+    params = request.query_params
+    query = params.get('q')
+
+    if not query:
+        return Response({'message': 'Search text is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    filters = {}
+
+    if params.get('type'):
+        if params.get('type') not in ('player', 'coach', 'team'):
+            return Response({'message': 'Invalid type'}, status=status.HTTP_400_BAD_REQUEST)
+        filters['type'] = params.get('type')
+
+    if params.get('gender'):
+        if params.get('gender') not in ('M', 'W'):
+            return Response({'message': 'Invalid gender'}, status=status.HTTP_400_BAD_REQUEST)
+        filters['gender'] = params.get('gender')
+
+    try:
+        if params.get('team_id'):
+            filters['team_id'] = int(params.get('team_id'))
+        if params.get('position_id'):
+            filters['position_id'] = int(params.get('position_id'))
+        limit = min(int(params.get('limit', 20)), 100)
+    except ValueError:
+        return Response({'message': 'Invalid team ID, position ID or limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if limit < 1:
+        return Response({'message': 'Limit must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if params.get('is_active'):
+        filters['is_active'] = params.get('is_active').lower() == 'true'
+
+    results = search_index.search(query, filters, limit)
+    return Response({'data': results, 'message': 'Search results retrieved successfully'}, status=status.HTTP_200_OK)
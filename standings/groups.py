@@ -0,0 +1,163 @@
+# groups.py
+import random
+import string
+from django.db import transaction
+from django.db.models import Q
+from export.models import record_changes
+from fixture.models import Match, Stage
+from standings.models import Standings, StandingsTeam
+from standings.ranking import update_positions
+from team.models import Team
+
+
+# Groups are named A, B, C and so on
+GROUP_NAMES = string.ascii_uppercase
+
+
+def get_eligible_teams(gender):
+    """Get the ids of the teams that can be drawn into a competition of a gender: the teams with at least one active player of that gender.
+    The players are counted here rather than read from Team.no_of_mens_players and no_of_womens_players, which are only correct for teams whose players have been saved since the counts were added, or recounted with manage.py rebuild_team_player_counts.
+    """
+    from player.models import Player
+
+    players = Player.objects.filter(gender=gender, is_active=True, team__isnull=False)
+    return list(Team.objects.filter(id__in=players.values('team_id')).order_by('id').values_list('id', flat=True))
+
+
+def draw_groups(season, competition, no_of_groups, pots=None, seed=None):
+    """Draw the teams of a competition's group stage in a season into groups, and create every group's standings in one transaction, with one bulk insert for the groups and one for their teams.
+    The teams of each pot are shuffled and dealt across the groups in turn, so the teams of a pot are spread over as many groups as possible and the groups differ in size by at most one team. The shuffle uses a random number generator seeded with seed, so the same teams, pots and seed always give the same draw.
+
+    Args:
+        season: The season.
+        competition: The competition, e.g. the women's FA Cup.
+        no_of_groups: The number of groups.
+        pots: A list of lists of team ids, strongest pot first. It's optional. By default every team of the competition's gender is drawn from a single pot.
+        seed: The seed of the draw. It's optional. By default a random seed is used.
+
+    Returns:
+        A tuple of (list of group standings, seed). The seed is stored on each group, so the draw can be repeated. Raises a ValueError if the draw isn't possible.
+    """
+    if Standings.objects.filter(season=season, competition=competition).exists():
+        raise ValueError('Group standings already exist')
+
+    eligible_teams = set(get_eligible_teams(competition.gender))
+
+    if pots is None:
+        pots = [sorted(eligible_teams)]
+
+    team_ids = [team_id for pot in pots for team_id in pot]
+
+    if len(team_ids) != len(set(team_ids)):
+        raise ValueError('A team is in more than one pot')
+
+    if any(team_id not in eligible_teams for team_id in team_ids):
+        raise ValueError('Every team must have ' + competition.get_gender_display().lower() + "'s players")
+
+    if not 1 <= no_of_groups <= len(GROUP_NAMES) or len(team_ids) < 2 * no_of_groups:
+        raise ValueError('Every group must have at least 2 teams')
+
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 31)
+
+    rng = random.Random(seed)
+    groups = [[] for _ in range(no_of_groups)]
+    next_group = 0
+
+    for pot in pots:
+        pot = sorted(pot)
+        rng.shuffle(pot)
+
+        for team_id in pot:
+            groups[next_group].append(team_id)
+            next_group = (next_group + 1) % no_of_groups
+
+    group_names = GROUP_NAMES[:no_of_groups]
+
+    with transaction.atomic():
+        Standings.objects.bulk_create([
+            Standings(season=season, competition=competition, name=name, draw_seed=seed)
+            for name in group_names
+        ])
+
+        # bulk_create doesn't set ids on every database, so the new groups are looked up by name
+        standings = list(Standings.objects.filter(season=season, competition=competition).order_by('name'))
+
+        StandingsTeam.objects.bulk_create([
+            StandingsTeam(standings=group_standings, team_id=team_id)
+            for group_standings, group in zip(standings, groups)
+            for team_id in group
+        ])
+
+        for group_standings in standings:
+            update_positions(group_standings)
+
+        # bulk_create doesn't send post_save, so the changes are recorded for the static export here
+        record_changes(Standings)
+        record_changes(StandingsTeam)
+
+    return standings, seed
+
+
+def update_group_standings(season, competition):
+    """Recompute the records of every team in a competition's group stage in a season from its ended group-stage matches, with one query for the matches and one bulk update, then the positions in each group.
+
+    Args:
+        season: The season.
+        competition: The competition.
+
+    Returns:
+        The number of teams updated.
+    """
+    standings_teams = list(StandingsTeam.objects.filter(standings__season=season, standings__competition=competition))
+    records = {standings_team.team_id: {'matches_played': 0, 'matches_won': 0, 'matches_lost': 0, 'goals_for': 0, 'goals_against': 0} for standings_team in standings_teams}
+
+    matches = Match.objects.filter(
+        Q(home_team_id__in=records) | Q(away_team_id__in=records),
+        competition=competition,
+        match_day__season=season,
+        stage__name='Group Stage',
+        has_ended=True,
+    ).values_list('home_team_id', 'away_team_id', 'home_team_score', 'away_team_score')
+
+    for home_team_id, away_team_id, home_team_score, away_team_score in matches:
+        home_team_score, away_team_score = home_team_score or 0, away_team_score or 0
+
+        for team_id, goals_for, goals_against in ((home_team_id, home_team_score, away_team_score), (away_team_id, away_team_score, home_team_score)):
+            record = records.get(team_id)
+            if record is None:
+                continue
+            record['matches_played'] += 1
+            record['matches_won'] += goals_for > goals_against
+            record['matches_lost'] += goals_for < goals_against
+            record['goals_for'] += goals_for
+            record['goals_against'] += goals_against
+
+    for standings_team in standings_teams:
+        for field, value in records[standings_team.team_id].items():
+            setattr(standings_team, field, value)
+        # bulk_update doesn't call save, so the derived values are calculated here
+        standings_team.calculate_derived_values()
+
+    StandingsTeam.objects.bulk_update(standings_teams, [
+        'matches_played', 'matches_won', 'matches_drawn', 'matches_lost', 'goals_for', 'goals_against', 'goal_difference', 'points',
+    ])
+    # bulk_update doesn't send post_save, so the change is recorded for the static export here
+    record_changes(StandingsTeam)
+
+    for standings in Standings.objects.filter(season=season, competition=competition):
+        update_positions(standings)
+
+    return len(standings_teams)
+
+
+def update_match_group_standings(match):
+    """Update the group standings of a group-stage match's competition and season. It's called whenever a match ends, or an ended match changes, is reopened or is deleted (see fixture.models), so reading the standings never has to update them.
+
+    Args:
+        match: The match.
+    """
+    if match.stage_id is None or not Stage.objects.filter(id=match.stage_id, name='Group Stage').exists():
+        return
+
+    update_group_standings(match.match_day.season_id, match.competition_id)
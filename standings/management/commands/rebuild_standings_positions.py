@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from standings.models import Standings
+from standings.ranking import update_positions
+
+
+class Command(BaseCommand):
+    help = "Recompute the position of every team in every table. Positions are updated automatically whenever a table's records are updated, so this is only needed for tables created before positions were stored, or after changing STANDINGS_TIEBREAKERS."
+
+    def handle(self, *args, **options):
+        no_of_tables = 0
+        no_of_changes = 0
+
+        for standings in Standings.objects.all():
+            no_of_changes += update_positions(standings)
+            no_of_tables += 1
+
+        self.stdout.write(f'Recomputed the positions of {no_of_tables} table(s), {no_of_changes} position(s) changed')
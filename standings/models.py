@@ -5,6 +5,8 @@ class Standings(models.Model):
     season = models.ForeignKey('fixture.Season', on_delete=models.CASCADE, related_name='standings')
     competition = models.ForeignKey('fixture.Competition', on_delete=models.CASCADE, related_name='standings')
     name = models.CharField(max_length=200)
+    # the seed of the draw that created a group, so the draw can be repeated. See standings.groups.draw_groups.
+    draw_seed = models.BigIntegerField(null=True, blank=True, default=None)
     
     
     def __str__(self):
@@ -23,6 +25,8 @@ class StandingsTeam (models.Model):
     goals_against = models.PositiveIntegerField(blank=True, null=True, default=0)
     goal_difference = models.IntegerField(blank=True, null=True, default=0)
     points = models.IntegerField(blank=True, null=True, default=0)
+    # the team's place in the table, recomputed whenever the table's records change. See standings.ranking.
+    position = models.PositiveIntegerField(blank=True, null=True, default=None)
     
     def calculate_derived_values(self):
         self.goal_difference = self.goals_for - self.goals_against
@@ -38,5 +42,8 @@ class StandingsTeam (models.Model):
     
     class Meta:
         unique_together = ('standings', 'team')
-        ordering = ['points', 'goal_difference', 'goals_for', 'team__name']
+        ordering = ['position']
+        indexes = [
+            models.Index(fields=['standings', 'position']),
+        ]
     
\ No newline at end of file
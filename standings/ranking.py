@@ -0,0 +1,117 @@
+# ranking.py
+from django.conf import settings
+from django.db.models import Q
+from export.models import record_changes
+from fixture.models import Match
+from standings.models import StandingsTeam
+
+
+def get_table_matches(standings, team_ids):
+    """Get the scores of a table's started matches between its teams: the league matches, or the group-stage matches of a group. This is a single query."""
+    matches = Match.objects.filter(
+        Q(stage__isnull=True) | Q(stage__name='Group Stage'),
+        competition_id=standings.competition_id,
+        match_day__season_id=standings.season_id,
+        home_team_id__in=team_ids,
+        away_team_id__in=team_ids,
+        has_started=True,
+    ).values_list('home_team_id', 'away_team_id', 'home_team_score', 'away_team_score')
+
+    return [(home_team_id, away_team_id, home_team_score or 0, away_team_score or 0) for home_team_id, away_team_id, home_team_score, away_team_score in matches]
+
+
+# Each tiebreaker takes the teams that are level and a function returning the table's matches, and returns the sort key of a team, lowest first
+def by_points(teams, get_matches):
+    return lambda team: -team.points
+
+
+def by_goal_difference(teams, get_matches):
+    return lambda team: -team.goal_difference
+
+
+def by_goals_for(teams, get_matches):
+    return lambda team: -team.goals_for
+
+
+def by_head_to_head(teams, get_matches):
+    """Rank teams that are level by the points they earned in the matches between them alone."""
+    points = {team.team_id: 0 for team in teams}
+
+    for home_team_id, away_team_id, home_team_score, away_team_score in get_matches():
+        if home_team_id not in points or away_team_id not in points:
+            continue
+
+        if home_team_score > away_team_score:
+            points[home_team_id] += 3
+        elif away_team_score > home_team_score:
+            points[away_team_id] += 3
+        else:
+            points[home_team_id] += 1
+            points[away_team_id] += 1
+
+    return lambda team: -points[team.team_id]
+
+
+def by_name(teams, get_matches):
+    return lambda team: team.team.name
+
+
+TIEBREAKERS = {
+    'points': by_points,
+    'goal_difference': by_goal_difference,
+    'goals_for': by_goals_for,
+    'head_to_head': by_head_to_head,
+    'name': by_name,
+}
+
+
+def rank_teams(teams, tiebreakers, get_matches):
+    """Sort the teams of a table by the first tiebreaker, then sort each group of teams still level by the next one, and so on. A tiebreaker only ever compares the teams that are still level, so head-to-head is worked out between the tied teams alone."""
+    if len(teams) <= 1 or not tiebreakers:
+        return teams
+
+    key = TIEBREAKERS[tiebreakers[0]](teams, get_matches)
+    ranked_teams = []
+    tied_teams = []
+
+    for team in sorted(teams, key=key):
+        if tied_teams and key(team) != key(tied_teams[0]):
+            ranked_teams += rank_teams(tied_teams, tiebreakers[1:], get_matches)
+            tied_teams = []
+        tied_teams.append(team)
+
+    return ranked_teams + rank_teams(tied_teams, tiebreakers[1:], get_matches)
+
+
+def update_positions(standings):
+    """Recompute and store the position of every team in a table, using the tiebreakers in settings.STANDINGS_TIEBREAKERS. It's called once whenever a table's records change, so reading a table is an ORDER BY position.
+    The table's matches are only loaded if a head-to-head tiebreaker is needed.
+
+    Args:
+        standings: The table, e.g. a league table or an FA Cup group.
+
+    Returns:
+        The number of teams whose position changed.
+    """
+    teams = list(StandingsTeam.objects.filter(standings=standings).select_related('team'))
+    matches = []
+
+    def get_matches():
+        if not matches:
+            matches.append(get_table_matches(standings, [team.team_id for team in teams]))
+        return matches[0]
+
+    changed_teams = []
+
+    for position, team in enumerate(rank_teams(teams, settings.STANDINGS_TIEBREAKERS, get_matches), start=1):
+        if team.position != position:
+            team.position = position
+            changed_teams.append(team)
+
+    StandingsTeam.objects.bulk_update(changed_teams, ['position'])
+
+    # bulk_update doesn't send post_save, so the change is recorded for the static export here
+    if changed_teams:
+        record_changes(StandingsTeam)
+
+    return len(changed_teams)
@@ -1,3 +1,5 @@
+from ashesi_premier_league.loader import BatchedListSerializer
+from fixture.models import TeamForm
 from fixture.serializers import CompetitionSerializer, SeasonSerializer
 from standings.models import Standings, StandingsTeam
 from rest_framework import serializers
@@ -10,6 +12,11 @@ class StandingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Standings
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+        
+    @classmethod
+    def prime_relations(cls, standings, loader):
+        loader.load_related(standings, 'season', 'competition')
         
     def to_representation(self, instance):
         # When retrieving a standings, include the season and competition associated with the standings.
@@ -17,11 +24,14 @@ class StandingsSerializer(serializers.ModelSerializer):
         representation['season'] = SeasonSerializer(instance.season).data
         representation['competition'] = CompetitionSerializer(instance.competition).data
         
-        standings_teams = StandingsTeam.objects.filter(standings=instance)
+        # the positions are stored whenever the table changes (see standings.ranking), so the table is read in order
+        standings_teams = StandingsTeam.objects.filter(standings=instance).select_related('team').order_by('position')
+        
+        # the form of every team in the table, loaded in one query
+        forms = TeamForm.objects.filter(season_id=instance.season_id, competition_id=instance.competition_id)
+        forms = {team_form.team_id: team_form for team_form in forms}
         
-        # sort the standings teams by points, goal difference, goals for, and team name
-        standings_teams = sorted(standings_teams, key=lambda x: (x.points, x.goal_difference, x.goals_for, x.team.name), reverse=True)
-        representation['standings_teams'] = StandingsTeamSerializer(standings_teams, many=True).data
+        representation['standings_teams'] = StandingsTeamSerializer(standings_teams, many=True, context={'forms': forms}).data
         return representation
     
     
@@ -29,10 +39,20 @@ class StandingsTeamSerializer(serializers.ModelSerializer):
     class Meta:
         model = StandingsTeam
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+        
+    @classmethod
+    def prime_relations(cls, standings_teams, loader):
+        loader.load_related(standings_teams, 'team')
         
         
     def to_representation(self, instance):
         # When retrieving a standings team, include the team associated with the standings team.
         representation = super().to_representation(instance)
         representation['team'] = TeamSerializer(instance.team).data
+        
+        # the team's last few results, e.g. 'WWDLW'. See fixture.form.
+        team_form = self.context.get('forms', {}).get(instance.team_id)
+        representation['form'] = team_form.form if team_form else ''
+        representation['form_results'] = team_form.results if team_form else []
         return representation
@@ -1,3 +1,97 @@
-from django.test import TestCase
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from ashesi_premier_league.testing import create_match, create_match_day, create_player, create_season, get_teams
+from fixture.models import Competition
+from standings.groups import draw_groups
+from standings.models import Standings, StandingsTeam
+from standings.ranking import update_positions
+from team.models import Team
 
-# Create your tests here.
+
+class GroupStandingsTests(TestCase):
+
+    def setUp(self):
+        self.season = create_season()
+        self.competition = Competition.objects.get(name='FA Cup', gender='M')
+        self.teams = get_teams(4)
+
+        for team in self.teams:
+            create_player(team)
+
+    def draw(self):
+        return draw_groups(self.season, self.competition, 1, pots=[[team.id for team in self.teams[:2]]], seed=1)
+
+    def get_record(self, team):
+        return StandingsTeam.objects.get(standings__season=self.season, team=team)
+
+    def test_the_draw_counts_players_when_the_team_counts_are_out_of_date(self):
+        # e.g. teams whose players were created before the counts existed
+        Team.objects.update(no_of_mens_players=0)
+
+        standings, seed = self.draw()
+        self.assertEqual(len(standings), 1)
+
+    def test_group_standings_are_updated_when_a_group_stage_match_ends(self):
+        standings, seed = self.draw()
+        match = create_match(
+            self.teams[0], self.teams[1], create_match_day(self.season), self.competition, 'Group Stage', home_team_score=2, away_team_score=1,
+        )
+
+        # a match that hasn't ended doesn't count
+        self.assertEqual(self.get_record(self.teams[0]).matches_played, 0)
+
+        match.has_ended = True
+        match.save()
+        self.assertEqual(self.get_record(self.teams[0]).points, 3)
+        self.assertEqual(self.get_record(self.teams[1]).matches_lost, 1)
+
+        match.delete()
+        self.assertEqual(self.get_record(self.teams[0]).matches_played, 0)
+
+    def test_reading_group_standings_does_not_write(self):
+        standings, seed = self.draw()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get('/standings/group/get', {'season_id': self.season.id, 'competition_id': self.competition.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+
+
+class RankingTests(TestCase):
+
+    def setUp(self):
+        self.season = create_season()
+        self.competition = Competition.objects.get(name='Premier League', gender='M')
+        self.standings = Standings.objects.create(season=self.season, competition=self.competition, name="Men's Premier League")
+        self.teams = get_teams(4)
+
+        # every team is on 6 points; teams[2] has the best goal difference, teams[3] the fewest goals, and teams[0] and teams[1] are level on everything
+        for team, goals_for, goals_against in zip(self.teams, (5, 5, 5, 4), (3, 3, 2, 2)):
+            StandingsTeam.objects.create(standings=self.standings, team=team, matches_played=2, matches_won=2, matches_lost=0, goals_for=goals_for, goals_against=goals_against)
+
+    def get_table(self):
+        return [team.team_id for team in StandingsTeam.objects.filter(standings=self.standings)]
+
+    def test_level_teams_are_split_by_goal_difference_goals_for_then_head_to_head(self):
+        create_match(self.teams[1], self.teams[0], create_match_day(self.season), self.competition, home_team_score=1, away_team_score=0)
+
+        update_positions(self.standings)
+
+        self.assertEqual(self.get_table(), [self.teams[2].id, self.teams[1].id, self.teams[0].id, self.teams[3].id])
+
+    @override_settings(STANDINGS_TIEBREAKERS=['points', 'name'])
+    def test_the_tiebreakers_are_configurable(self):
+        with mock.patch('standings.ranking.get_table_matches') as get_table_matches:
+            update_positions(self.standings)
+
+        # the matches are only loaded for a head-to-head tiebreaker
+        get_table_matches.assert_not_called()
+        self.assertEqual(self.get_table(), [team.id for team in sorted(self.teams, key=lambda team: team.name)])
+
+    def test_positions_are_only_written_when_they_change(self):
+        self.assertEqual(update_positions(self.standings), 4)
+        self.assertEqual(update_positions(self.standings), 0)
@@ -4,22 +4,24 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from fixture.models import Competition, MatchEvent, Season, Match, Goal, Stage
+from standings.groups import draw_groups, update_group_standings
 from standings.models import Standings, StandingsTeam
+from standings.ranking import update_positions
 from standings.serializers import StandingsSerializer
 from team.models import Team
 from django.db.models import Q, F, Sum
-import random
 
 
 
 # Create your views here.
 @api_view(['POST'])
 def create_fa_cup_mens_group_standings(request):
-    """This function creates the group standings for the FA Cup. The FA Cup is a knockout competition, but the group standings are used to determine the teams that progress to the knockout stages. The group standings are created by randomly assigning the six men's teams to two groups of three teams each. The group standings are created for a season.
+    """This function creates the group standings for the men's FA Cup. The FA Cup is a knockout competition, but the group standings are used to determine the teams that progress to the knockout stages. The men's teams are drawn into two groups. See create_group_standings for documentation.
 
     Args:
     A JSON request. The request must contain the following fields:
     season: The season of the FA Cup group standings. This is a foreign key to the Season model.
+    seed: The seed of the draw. This is optional.
     
     Returns:
         A response object containing a JSON object and a status code. The JSON object contains a message and a list of errors if any. The message is either 'FA Cup group standings created successfully' or 'FA Cup group standings creation failed'.
@@ -27,52 +29,113 @@ def create_fa_cup_mens_group_standings(request):
     
     data = request.data
     
-    # get the season
-    season = Season.objects.get(id=data.get('season'))
-    
-    if not season:
+    try:
+        season = Season.objects.get(id=data.get('season'))
+    except (Season.DoesNotExist, TypeError, ValueError):
         return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    # get the men's FA Cup competition
     competition = Competition.objects.get(
         name='FA Cup',
         gender='M'
     )
     
-    if not competition:
-        return Response({'message': 'FA Cup not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        standings, seed = draw_groups(season, competition, 2, seed=int(data['seed']) if data.get('seed') not in (None, '') else None)
+    except (TypeError, ValueError) as e:
+        return Response({'message': 'FA Cup group standings creation failed', 'errors': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    # get all teams
-    teams = Team.objects.all()
+    return Response({'message': 'FA Cup group standings created successfully', 'data': {'seed': seed}}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+def create_group_standings(request):
+    """Draw the teams of any competition's group stage in a season into groups, e.g. the women's FA Cup or the Champions League, and create the standings of every group. The draw is reproducible: the same teams, pots and seed always give the same groups. See standings.groups.draw_groups.
+
+    Args:
+    A JSON request. The request must contain the following fields:
+    season: The season. This is a foreign key to the Season model.
+    competition: The competition. This is a foreign key to the Competition model.
+    no_of_groups: The number of groups.
+    pots: A list of lists of team ids, strongest pot first. This is optional. By default every team of the competition's gender is drawn from a single pot.
+    seed: The seed of the draw. This is optional. By default a random seed is used, and returned.
     
-    if not teams:
-        return Response({'message': 'No teams found'}, status=status.HTTP_404_NOT_FOUND)
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message, and the groups and seed of the draw.
+    """
     
-    teams = list(teams)
+    data = request.data
     
-    # shuffle the teams
-    random.shuffle(teams)
+    if not data.get('season') or not data.get('competition') or not data.get('no_of_groups'):
+        return Response({'message': 'Season, competition and number of groups are required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # create groups
-    group_a = teams[:3]
-    group_b = teams[3:6]
+    try:
+        season_id = int(data.get('season'))
+        competition_id = int(data.get('competition'))
+        no_of_groups = int(data.get('no_of_groups'))
+        seed = int(data['seed']) if data.get('seed') not in (None, '') else None
+        pots = [[int(team_id) for team_id in pot] for pot in data['pots']] if data.get('pots') else None
+    except (TypeError, ValueError):
+        return Response({'message': 'Invalid season, competition, number of groups, pots or seed'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # create standings
+    try:
+        season = Season.objects.get(id=season_id)
+    except Season.DoesNotExist:
+        return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
     
     try:
-        standings_a = Standings.objects.create(season=season, competition=competition, name='A')
-        standings_b = Standings.objects.create(season=season, competition=competition, name='B')
-        
-        for team in group_a:
-            StandingsTeam.objects.create(standings=standings_a, team=team)
-            
-        for team in group_b:
-            StandingsTeam.objects.create(standings=standings_b, team=team)
-            
-        return Response({'message': 'FA Cup group standings created successfully'}, status=status.HTTP_201_CREATED)
+        competition = Competition.objects.get(id=competition_id)
+    except Competition.DoesNotExist:
+        return Response({'message': 'Competition not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    except Exception as e:
-        return Response({'message': 'FA Cup group standings creation failed', 'errors': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        standings, seed = draw_groups(season, competition, no_of_groups, pots, seed)
+    except ValueError as e:
+        return Response({'message': 'Group standings creation failed', 'errors': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    groups = {
+        group_standings.name: list(group_standings.standings_teams.values_list('team_id', flat=True))
+        for group_standings in Standings.objects.filter(id__in=[group_standings.id for group_standings in standings]).prefetch_related('standings_teams')
+    }
+    
+    return Response({'message': 'Group standings created successfully', 'data': {'groups': groups, 'seed': seed}}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+def get_season_group_standings(request):
+    """Get the group standings of a competition in a season, e.g. the women's FA Cup groups. The standings are updated whenever a group-stage match ends or an ended one changes (see standings.groups.update_match_group_standings).
+
+    Args:
+    A GET request. The request must contain the following fields:
+    season_id: The season of the group standings. This is a foreign key to the Season model.
+    competition_id: The competition of the group standings. This is a foreign key to the Competition model.
+    
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains the standings of every group and a message.
+    """
+    
+    season_id = request.query_params.get('season_id')
+    competition_id = request.query_params.get('competition_id')
+    
+    if not season_id or not competition_id:
+        return Response({'message': 'Season ID and competition ID are required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        season = Season.objects.get(id=int(season_id))
+        competition = Competition.objects.get(id=int(competition_id))
+    except ValueError:
+        return Response({'message': 'Invalid Season ID or competition ID'}, status=status.HTTP_400_BAD_REQUEST)
+    except (Season.DoesNotExist, Competition.DoesNotExist):
+        return Response({'message': 'Season or competition not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    standings = Standings.objects.filter(season=season, competition=competition).order_by('name')
+    
+    if not standings:
+        return Response({'message': 'Group standings not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    serializer = StandingsSerializer(standings, many=True)
+    
+    return Response({'data': serializer.data, 'message': 'Group standings retrieved'}, status=status.HTTP_200_OK)
+
 
 def create_league_table(season_id, gender, teams):
     """Create a new league table. Its argument is a JSON request which is deserialized into a django model. Both men and women have league tables.
@@ -103,6 +166,8 @@ def create_league_table(season_id, gender, teams):
         
         for team in teams:
             StandingsTeam.objects.create(standings=standings, team=team)
+        
+        update_positions(standings)
             
         return Response({'message': 'League table created successfully'}, status=status.HTTP_201_CREATED)
     
@@ -123,9 +188,7 @@ def create_mens_league_table(request):
     data = request.data
     season_id = data.get('season')
     
-    mens_teams = Team.objects.filter(
-        Q(players__gender='M') & ~Q(players=None)
-    ).distinct()
+    mens_teams = Team.objects.filter(no_of_mens_players__gt=0)
     
     return create_league_table(season_id, 'M', mens_teams)
 
@@ -142,9 +205,7 @@ def create_womens_league_table(request):
     data = request.data
     season_id = data.get('season')
     
-    womens_teams = Team.objects.filter(
-        Q(players__gender='W') & ~Q(players=None)
-    ).distinct()
+    womens_teams = Team.objects.filter(no_of_womens_players__gt=0)
     
     return create_league_table(season_id, 'W', womens_teams)
 
@@ -510,6 +571,8 @@ def update_league_standings(season_id_arg, gender):
             standings_team.goals_against = get_team_no_of_goals_conceded_in_league_campaign(season_id, team.id, gender)
             standings_team.matches_played = get_team_no_of_league_matches_played(season_id, team.id, gender)
             standings_team.save()
+        
+        update_positions(standings)
             
         return Response({'message': 'Standings updated successfully'}, status=status.HTTP_200_OK)
     
@@ -525,165 +588,6 @@ def update_league_standings(season_id_arg, gender):
     
 
 
-def get_team_no_of_wins_in_fa_cup_group_stage(season_id, team_id, gender):
-    
-    """Get the number of wins for a team in an FA Cup competition's group stage. This is a helper function. It finds the number of matches where the team was the home team and the home team score was greater than the away team score, and the number of matches where the team was the away team and the away team score was greater than the home team score.
-    
-    Args:
-    season_id: The season of the FA Cup competition. This is a foreign key to the Season model.
-    team_id: The team in the FA Cup competition. This is a foreign key to the Team model.
-    gender: Men's or women's FA Cup competition?
-
-    Returns:
-        The number of wins for the team in the FA Cup group stage during a particular season.
-    """
-    
-    team = Team.objects.get(id=team_id)
-    season = Season.objects.get(id=season_id)
-    stage = Stage.objects.get(name="Group Stage")
-    competition = Competition.objects.get(
-        name = "FA Cup",
-        gender = gender
-    )
-
-    matches_won = Match.objects.filter(
-        Q(home_team=team, home_team_score__gt=F('away_team_score'), competition=competition, match_day__season=season, stage=stage) |
-        Q(away_team=team, away_team_score__gt=F('home_team_score'), competition=competition, match_day__season=season, stage = stage)
-    ).count()
-
-    return matches_won
-
-
-def get_team_no_of_losses_in_fa_cup_group_stage(season_id, team_id, gender):
-    
-    """Get the number of losses for a team in an FA Cup's group stage. This is a helper function. It finds the number of matches where the team was the home team and the home team score was less than the away team score, and the number of matches where the team was the away team and the away team score was less than the home team score.
-    
-    Args:
-    season_id: The season of the FA Cup competition. This is a foreign key to the Season model.
-    team_id: The team in the FA Cup competition. This is a foreign key to the Team model.
-    gender: Men's or women's FA Cup competition?
-
-
-    Returns:
-        The number of losses for the team in the the FA Cup group stage during a particular season.
-    """
-    
-    team = Team.objects.get(id=team_id)
-    season = Season.objects.get(id=season_id)
-    stage = Stage.objects.get(name="Group Stage")
-    competition = Competition.objects.get(
-        name = "FA Cup",
-        gender = gender
-    )
-
-    matches_lost = Match.objects.filter(
-        Q(home_team=team, home_team_score__lt=F('away_team_score'), competition=competition, match_day__season=season, stage=stage) |
-        Q(away_team=team, away_team_score__lt=F('home_team_score'), competition=competition, match_day__season=season, stage=stage)
-    ).count()
-
-    return matches_lost
-
-
-def get_team_no_of_goals_scored_in_fa_cup_group_stage(season_id, team_id, gender):
-    
-    """Get the number of goals scored by a team in an FA Cup's group stage. This is a helper function. It finds the number of goals where the scoring team was the team and the match was in the the FA Cup's group stage.
-    
-    Args:
-    season_id: The season of the FA Cup competition. This is a foreign key to the Season model.
-    team_id: The team in the FA Cup competition. This is a foreign key to the Team model.
-    gender: Men's or women's FA Cup competition?
-
-    Returns:
-        The number of goals scored by the team in the FA Cup group stage during a particular season..
-    """
-    
-    team = Team.objects.get(id=team_id)
-    season = Season.objects.get(id=season_id)
-    stage = Stage.objects.get(name="Group Stage")
-    competition = Competition.objects.get(
-        name = "FA Cup",
-        gender = gender
-    )
-
-    no_of_goals_scored = Goal.objects.filter(
-            Q(match_event__team=team) &
-            Q(match_event__match__competition__name="FA Cup", match_event__match__competition=competition, match_event__match__match_day__season=season, match_event__match__stage=stage)
-        ).count()
-
-    return no_of_goals_scored
-
-
-def get_team_no_of_goals_conceded_in_fa_cup_group_stage(season_id, team_id, gender):
-    """Get the number of goals conceded by a team in an FA Cup's group stage. This is a helper function. It finds sum of the away team score where the home team was the team and the match was in the FA Cup's group stage, and the sum of the home team score where the away team was the team and the match was in the FA Cup's group stage.
-
-    Args:
-    season_id: The season of the FA Cup competition. This is a foreign key to the Season model.
-    team_id: The team in the FA Cup competition. This is a foreign key to the Team model.
-    gender: Men's or women's FA Cup competition?
-
-    Returns:
-        The number of goals conceded by the team in the FA Cup's group stage.
-    """
-    team = Team.objects.get(id=team_id)
-    season = Season.objects.get(id=season_id)
-    stage = Stage.objects.get(name="Group Stage")
-    competition = Competition.objects.get(
-        name = "FA Cup",
-        gender = gender
-    )
-
-    # Get the sum of away team score when the home team is the given team
-    away_goals_conceded = Match.objects.filter(
-        home_team=team,
-        competition = competition,
-        stage = stage,
-        match_day__season=season
-    ).aggregate(Sum('away_team_score'))['away_team_score__sum'] or 0
-
-    # Get the sum of home team score when the away team is the given team
-    home_goals_conceded = Match.objects.filter(
-        away_team=team,
-        competition = competition,
-        stage = stage,
-        match_day__season=season
-    ).aggregate(Sum('home_team_score'))['home_team_score__sum'] or 0
-
-    # Calculate the total goals conceded
-    total_goals_conceded = away_goals_conceded + home_goals_conceded
-
-    return total_goals_conceded or 0
-
-def get_team_no_of_fa_cup_group_stage_matches_played(season_id, team_id, gender):
-    
-    """Get the number of matches played by a team in an FA Cup.
-    
-    Args:
-        season_id: The season of the FA Cup competition. This is a foreign key to the Season model.
-        team_id: The team in the FA Cup competition. This is a foreign key to the Team model.
-        gender: Men's or women's FA Cup competition?
-
-    Returns:
-        The number of matches played by team in an FA Cup.
-    """
-    
-    team = Team.objects.get(id=team_id)
-    season = Season.objects.get(id=season_id)
-    stage = Stage.objects.get(name="Group Stage")
-    competition = Competition.objects.get(
-        name = "FA Cup",
-        gender = gender
-    )
-
-    no_of_fa_cup_group_matches_played = Match.objects.filter(
-        Q(match_day__season=season, competition=competition, home_team=team, stage=stage, has_started=True) |
-        Q(match_day__season=season, competition=competition, away_team=team, stage=stage, has_started=True)
-    ).count()
-        
-
-    return no_of_fa_cup_group_matches_played 
-
-
-
 @api_view(['PATCH'])
 def update_mens_league_standings(request, season_id):
     """See update_league_standings for documentation.
@@ -717,42 +621,19 @@ def update_mens_fa_cup_standings(season_id):
     Returns:
         A response object containing a JSON object and a status code. The JSON object contains a message and a list of errors if any. The message is either 'Standings updated successfully' or 'Standings update failed'.
     """   
-    try:         
+    try:
         season = Season.objects.get(id=season_id)
         
-        if not season:
-            return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
-    
-
-        # use filter because FA Cup always has two groups, A and B.
-        standings = Standings.objects.filter(
-            season = season,
-            competition__name = 'FA Cup',
-            competition__gender = 'M'
+        competition = Competition.objects.get(
+            name = 'FA Cup',
+            gender = 'M'
         )
         
-        if not standings:
+        if not update_group_standings(season, competition):
             return Response({'message': 'Standings not found. Perhaps there was no FA Cup competition during this season'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Update values in both Groups A and B.
-        for standing in standings:
-        
-            standings_teams = StandingsTeam.objects.filter(standings=standing)
-            
-            for standings_team in standings_teams:
-                team = standings_team.team
-                standings_team.matches_won = get_team_no_of_wins_in_fa_cup_group_stage(season_id, team.id, 'M')
-                standings_team.matches_lost = get_team_no_of_losses_in_fa_cup_group_stage(season_id, team.id, 'M')
-                standings_team.goals_for = get_team_no_of_goals_scored_in_fa_cup_group_stage(season_id, team.id, 'M')
-                standings_team.goals_against = get_team_no_of_goals_conceded_in_fa_cup_group_stage(season_id, team.id, 'M')
-                standings_team.matches_played = get_team_no_of_fa_cup_group_stage_matches_played(season_id, team.id, 'M')
-                standings_team.save()
-                
         return Response({'message': 'Standings updated successfully'}, status=status.HTTP_200_OK)
     
-    except Standings.DoesNotExist:
-        return Response({'message': 'Standings not found'}, status=status.HTTP_404_NOT_FOUND)
-    
     except Season.DoesNotExist:
         return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -0,0 +1,81 @@
+# appearances.py
+from django.conf import settings
+from django.db import transaction
+from export.models import record_changes
+from fixture.models import Match, MatchEvent, StartingXI, Substitution
+from stats.career import invalidate_player_careers
+from stats.models import Appearance
+
+
+def schedule_appearances_update(match_id):
+    """Recompute a match's appearances once the current transaction commits, e.g. after a whole starting XI has been saved."""
+    transaction.on_commit(lambda: recompute_appearances(match_id))
+
+
+def get_appearances(starters, events, match_length):
+    """Work out when each player came on and went off in a match.
+
+    Args:
+        starters: A list of (team id, player id) of the players in the starting XIs.
+        events: A list of the match's substitutions and red cards, in the order they happened. Each is a tuple of (minute, team id, player off id, player on id). A red card has no player on.
+        match_length: The length of the match in minutes.
+
+    Returns:
+        A dictionary of player id -> dictionary with the player's team id, is_starter, minute_on, minute_off and minutes_played.
+    """
+    appearances = {}
+
+    for team_id, player_id in starters:
+        appearances[player_id] = {'team_id': team_id, 'is_starter': True, 'minute_on': 0, 'minute_off': None}
+
+    for minute, team_id, player_off_id, player_on_id in events:
+        minute = min(max(minute, 0), match_length)
+        player_off = appearances.get(player_off_id)
+
+        if player_off is not None and player_off['minute_off'] is None:
+            player_off['minute_off'] = minute
+
+        if player_on_id is not None and player_on_id not in appearances:
+            appearances[player_on_id] = {'team_id': team_id, 'is_starter': False, 'minute_on': minute, 'minute_off': None}
+
+    for appearance in appearances.values():
+        minute_off = appearance['minute_off'] if appearance['minute_off'] is not None else match_length
+        appearance['minutes_played'] = max(minute_off - appearance['minute_on'], 0)
+
+    return appearances
+
+
+def recompute_appearances(match_id):
+    """Recompute the appearances of every player in a match from its starting XIs, substitutions and red cards. This is three queries to read the match's lineups and events, and one delete and one bulk insert to replace its appearances.
+
+    Args:
+        match_id: The id of the match.
+    """
+    if not Match.objects.filter(id=match_id).exists():
+        return
+
+    starters = StartingXI.players.through.objects.filter(startingxi__match_id=match_id).values_list('startingxi__team_id', 'player_id')
+
+    substitutions = Substitution.objects.filter(match_event__match_id=match_id).values_list('match_event__minute', 'match_event__id', 'match_event__team_id', 'player_out_id', 'player_in_id')
+    red_cards = MatchEvent.objects.filter(match_id=match_id, event_type='Red Card').values_list('minute', 'id', 'team_id', 'player_id')
+
+    # in the order they happened; events in the same minute in the order they were recorded
+    events = sorted(
+        [(minute, id, team_id, player_out_id, player_in_id) for minute, id, team_id, player_out_id, player_in_id in substitutions] +
+        [(minute, id, team_id, player_id, None) for minute, id, team_id, player_id in red_cards]
+    )
+
+    appearances = get_appearances(starters, [(minute, team_id, player_off_id, player_on_id) for minute, id, team_id, player_off_id, player_on_id in events], settings.MATCH_LENGTH)
+
+    old_player_ids = set(Appearance.objects.filter(match_id=match_id).values_list('player_id', flat=True))
+
+    with transaction.atomic():
+        Appearance.objects.filter(match_id=match_id).delete()
+        Appearance.objects.bulk_create([
+            Appearance(player_id=player_id, match_id=match_id, **appearance)
+            for player_id, appearance in appearances.items()
+        ])
+        record_changes(Appearance)
+
+    # bulk_create doesn't send post_save, so the change is recorded for the static export above, and the cached careers of the players whose appearances may have changed are dropped here
+    invalidate_player_careers(old_player_ids | set(appearances))
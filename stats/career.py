@@ -0,0 +1,108 @@
+# career.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from fixture.models import ManOfTheMatch, MatchEvent
+from stats.models import Appearance
+from transfer.models import SquadMembership
+
+
+def get_player_career_cache_key(player_id):
+    return f'player_career:{player_id}'
+
+
+def invalidate_player_careers(player_ids):
+    """Drop the cached careers of some players, e.g. the players involved in an event that changed."""
+    player_ids = set(player_ids) - {None}
+
+    if player_ids:
+        cache.delete_many([get_player_career_cache_key(player_id) for player_id in player_ids])
+
+
+def get_career(player):
+    """Get a player's career: their appearances, minutes, goals, assists, cards and man of the match awards in each season and competition they played in, and the teams they played for.
+    The goals, assists and cards come from one grouped query over the player's events, and the appearances and awards from one grouped query each over the materialized Appearance and ManOfTheMatch rows. The result is cached until one of the player's events, appearances, awards or transfers changes.
+
+    Args:
+        player: The player.
+
+    Returns:
+        A dictionary with the player's id, a list of splits, one per season and competition, newest season first, and a list of the teams they played for, oldest first.
+    """
+    cache_key = get_player_career_cache_key(player.id)
+    career = cache.get(cache_key)
+
+    if career is not None:
+        return career
+
+    splits = {}
+
+    def get_split(season_id, season_name, season_start_date, competition_id, competition_name):
+        return splits.setdefault((season_id, competition_id), {
+            'season_id': season_id,
+            'season_name': season_name,
+            'season_start_date': season_start_date.isoformat() if season_start_date else None,
+            'competition_id': competition_id,
+            'competition_name': competition_name,
+            'no_of_appearances': 0,
+            'no_of_starts': 0,
+            'minutes_played': 0,
+            'no_of_goals': 0,
+            'no_of_assists': 0,
+            'yellow_cards': 0,
+            'red_cards': 0,
+            'no_of_motm_awards': 0,
+        })
+
+    split_fields = ('match__match_day__season_id', 'match__match_day__season__name', 'match__match_day__season__start_date', 'match__competition_id', 'match__competition__name')
+
+    events = MatchEvent.objects.filter(
+        Q(player=player) | Q(goal__assist_provider=player),
+    ).values(*split_fields).annotate(
+        no_of_goals=Count('id', filter=Q(event_type='Goal', player=player)),
+        no_of_assists=Count('id', filter=Q(goal__assist_provider=player)),
+        yellow_cards=Count('id', filter=Q(event_type='Yellow Card', player=player)),
+        red_cards=Count('id', filter=Q(event_type='Red Card', player=player)),
+    ).order_by()
+
+    for event in events:
+        split = get_split(*(event[field] for field in split_fields))
+        for field in ('no_of_goals', 'no_of_assists', 'yellow_cards', 'red_cards'):
+            split[field] = event[field]
+
+    appearances = Appearance.objects.filter(player=player).values(*split_fields).annotate(
+        no_of_appearances=Count('id'),
+        no_of_starts=Count('id', filter=Q(is_starter=True)),
+        minutes_played=Sum('minutes_played'),
+    ).order_by()
+
+    for appearance in appearances:
+        split = get_split(*(appearance[field] for field in split_fields))
+        for field in ('no_of_appearances', 'no_of_starts', 'minutes_played'):
+            split[field] = appearance[field]
+
+    awards = ManOfTheMatch.objects.filter(player=player).values(*split_fields).annotate(no_of_motm_awards=Count('id')).order_by()
+
+    for award in awards:
+        get_split(*(award[field] for field in split_fields))['no_of_motm_awards'] = award['no_of_motm_awards']
+
+    teams = [
+        {
+            'team_id': membership.team_id,
+            'team_name': membership.team.name,
+            'team_name_abbreviation': membership.team.name_abbreviation,
+            'start_date': membership.start_date.isoformat() if membership.start_date else None,
+            'end_date': membership.end_date.isoformat() if membership.end_date else None,
+        }
+        for membership in SquadMembership.objects.filter(player=player).select_related('team')
+    ]
+    teams.sort(key=lambda team: (team['start_date'] is not None, team['start_date']))
+
+    career = {
+        'player_id': player.id,
+        'splits': sorted(splits.values(), key=lambda split: (split['season_start_date'] or '', split['competition_id'] or 0), reverse=True),
+        'teams': teams,
+    }
+
+    cache.set(cache_key, career, settings.PLAYER_CAREER_CACHE_TTL)
+    return career
@@ -0,0 +1,178 @@
+# discipline.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from export.models import record_changes
+from fixture.models import Match, MatchEvent
+from player.models import Player
+from stats.models import PlayerDiscipline
+from transfer.squads import get_squad_on
+
+
+# Every this many yellow cards in a season earns a one match ban. Every red card earns a one match ban.
+YELLOW_CARDS_PER_SUSPENSION = 3
+
+
+def get_card_rankings_cache_key(season_id, gender):
+    return f'card_rankings:{season_id}:{gender}'
+
+
+def invalidate_card_rankings(season_id):
+    cache.delete_many([get_card_rankings_cache_key(season_id, gender) for gender in ('M', 'W')])
+
+
+def get_card_rankings(season, gender):
+    """Get every player who has been booked in a season, with their yellow and red card counts side by side. The counts come from one grouped query, and the result is cached until a card in the season changes.
+
+    Args:
+        season: The season.
+        gender: Men's or women's players?
+
+    Returns:
+        A list of dictionaries, one per player.
+    """
+    cache_key = get_card_rankings_cache_key(season.id, gender)
+    card_rankings = cache.get(cache_key)
+
+    if card_rankings is not None:
+        return card_rankings
+
+    season_cards = Q(events__match__match_day__season=season)
+
+    players = Player.objects.filter(
+        season_cards,
+        gender=gender,
+        events__event_type__in=['Yellow Card', 'Red Card'],
+    ).annotate(
+        no_of_yellow_cards=Count('events', filter=Q(events__event_type='Yellow Card')),
+        no_of_red_cards=Count('events', filter=Q(events__event_type='Red Card')),
+    ).select_related('team', 'position')
+
+    disciplines = PlayerDiscipline.objects.filter(season=season, player__in=[player.id for player in players])
+    suspended_player_ids = {discipline.player_id for discipline in disciplines if discipline.is_suspended}
+
+    card_rankings = []
+
+    for player in players:
+        card_ranking_data = {
+            'first_name': player.first_name,
+            'last_name': player.last_name,
+            'position': player.position.name if player.position else None,
+            'team_name': player.team.name if player.team else None,
+            'team_name_abbreviation': player.team.name_abbreviation if player.team else None,
+            'team_logo_url': player.team.logo_url.url if player.team else None,
+            'team_color': player.team.color if player.team else None,
+            'player_id': player.id,
+            'no_of_yellow_cards': player.no_of_yellow_cards,
+            'no_of_red_cards': player.no_of_red_cards,
+            'is_suspended': player.id in suspended_player_ids,
+        }
+        if player.image is not None:
+            card_ranking_data['player_image'] = player.image.url
+        card_rankings.append(card_ranking_data)
+
+    cache.set(cache_key, card_rankings, settings.CARD_RANKINGS_CACHE_TTL)
+    return card_rankings
+
+
+def recompute_player_discipline(player_id, match_id):
+    """Recompute a player's card counts and bans earned for the season of a match. This is called whenever one of the player's card events is saved or deleted.
+
+    Args:
+        player_id: The id of the player.
+        match_id: The id of the match the card was given in.
+    """
+    season_id = Match.objects.filter(id=match_id).values_list('match_day__season_id', flat=True).first()
+
+    if season_id is None:
+        return
+
+    cards = MatchEvent.objects.filter(
+        player_id=player_id,
+        match__match_day__season_id=season_id,
+        event_type__in=['Yellow Card', 'Red Card'],
+    )
+
+    counts = cards.aggregate(
+        yellow_cards=Count('id', filter=Q(event_type='Yellow Card')),
+        red_cards=Count('id', filter=Q(event_type='Red Card')),
+    )
+    last_card_match_id = cards.order_by('-match__match_day__date', '-match__match_time').values_list('match_id', flat=True).first()
+
+    PlayerDiscipline.objects.update_or_create(
+        player_id=player_id,
+        season_id=season_id,
+        defaults={
+            'yellow_cards': counts['yellow_cards'],
+            'red_cards': counts['red_cards'],
+            'suspensions_earned': counts['red_cards'] + counts['yellow_cards'] // YELLOW_CARDS_PER_SUSPENSION,
+            'last_card_match_id': last_card_match_id,
+        },
+    )
+
+    invalidate_card_rankings(season_id)
+
+
+def serve_suspensions_in_match(match):
+    """Mark one match ban as served for every suspended player of the two teams in a match that has just ended. The teams' players are the players in their squads on the match day (see transfer.squads), so a ban is served by the team the player was in when the match was played, even if the match is recorded after a transfer.
+    Bans earned in the match itself are not served by it, but a player booked again in the match still serves a ban earned before it.
+
+    Args:
+        match: The match that has just ended.
+    """
+    season_id = match.match_day.season_id
+    squads = get_squad_on([match.home_team_id, match.away_team_id], match.match_day.date).filter(gender=match.competition.gender)
+
+    suspended = PlayerDiscipline.objects.filter(
+        season_id=season_id,
+        player__in=squads.values('id'),
+        suspensions_earned__gt=F('suspensions_served'),
+    )
+
+    served = suspended.exclude(last_card_match=match).update(suspensions_served=F('suspensions_served') + 1)
+
+    # the players booked in this match only serve a ban if they earned more before it than they have served. This is one grouped query over their other cards in the season.
+    booked = list(suspended.filter(last_card_match=match))
+
+    if booked:
+        earlier_cards = MatchEvent.objects.filter(
+            player_id__in=[discipline.player_id for discipline in booked],
+            match__match_day__season_id=season_id,
+            event_type__in=['Yellow Card', 'Red Card'],
+        ).exclude(match=match).values('player_id').annotate(
+            yellow_cards=Count('id', filter=Q(event_type='Yellow Card')),
+            red_cards=Count('id', filter=Q(event_type='Red Card')),
+        ).order_by()
+
+        suspensions_earned_before = {cards['player_id']: cards['red_cards'] + cards['yellow_cards'] // YELLOW_CARDS_PER_SUSPENSION for cards in earlier_cards}
+
+        served += PlayerDiscipline.objects.filter(id__in=[
+            discipline.id for discipline in booked
+            if discipline.suspensions_served < suspensions_earned_before.get(discipline.player_id, 0)
+        ]).update(suspensions_served=F('suspensions_served') + 1)
+
+    if served:
+        invalidate_card_rankings(season_id)
+        # update() doesn't send post_save, so the change is recorded for the static export here
+        record_changes(PlayerDiscipline)
+
+
+def get_suspended_players(season, team=None):
+    """Get the players who are suspended for their team's next match.
+
+    Args:
+        season: The season.
+        team: Only include this team's players (Optional).
+
+    Returns:
+        A queryset of PlayerDiscipline objects, with the player, the player's team and position loaded.
+    """
+    disciplines = PlayerDiscipline.objects.filter(
+        season=season,
+        suspensions_earned__gt=F('suspensions_served'),
+    ).select_related('player__team', 'player__position')
+
+    if team:
+        disciplines = disciplines.filter(player__team=team)
+
+    return disciplines
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from fixture.models import StartingXI
+from stats.appearances import recompute_appearances
+
+
+class Command(BaseCommand):
+    help = "Rebuild the appearances of every match with a starting XI. Appearances are updated automatically when starting XIs, substitutions or red cards change, so this is only needed for matches played before appearances existed."
+
+    def handle(self, *args, **options):
+        match_ids = set(StartingXI.objects.values_list('match_id', flat=True))
+
+        for match_id in match_ids:
+            recompute_appearances(match_id)
+
+        self.stdout.write(f'Rebuilt the appearances of {len(match_ids)} match(es)')
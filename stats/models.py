@@ -1,3 +1,128 @@
 from django.db import models
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete
+from django.dispatch import receiver
+from fixture.models import Goal, ManOfTheMatch, Match, MatchEvent, StartingXI, Substitution, match_ended
 
-# Create your models here.
+
+class PlayerDiscipline(models.Model):
+    """A player's cards in a season and whether they are suspended. The card counts are recomputed whenever one of the player's card events changes, and a suspension is served whenever the player's team finishes a match. See stats.discipline.
+    """
+    
+    player = models.ForeignKey('player.Player', on_delete=models.CASCADE, related_name='disciplines')
+    season = models.ForeignKey('fixture.Season', on_delete=models.CASCADE, related_name='player_disciplines')
+    yellow_cards = models.PositiveIntegerField(default=0)
+    red_cards = models.PositiveIntegerField(default=0)
+    # the number of match bans earned and served. The player is suspended while suspensions_earned > suspensions_served.
+    suspensions_earned = models.PositiveIntegerField(default=0)
+    suspensions_served = models.PositiveIntegerField(default=0)
+    # the match of the player's latest card. A ban can't be served in the match it was earned in.
+    last_card_match = models.ForeignKey('fixture.Match', on_delete=models.SET_NULL, related_name='+', null=True, blank=True, default=None)
+    
+    @property
+    def is_suspended(self):
+        return self.suspensions_earned > self.suspensions_served
+    
+    def __str__(self):
+        return self.player.first_name + ' ' + self.player.last_name + ' - ' + self.season.name
+    
+    class Meta:
+        unique_together = ('player', 'season')
+
+
+class Appearance(models.Model):
+    """A player's appearance in a match: when they came on and went off, and the minutes they played. Appearances are derived from the match's starting XIs, substitutions and red cards, and are recomputed whenever one of those changes. See stats.appearances.
+    """
+    
+    player = models.ForeignKey('player.Player', on_delete=models.CASCADE, related_name='appearances')
+    match = models.ForeignKey('fixture.Match', on_delete=models.CASCADE, related_name='appearances')
+    team = models.ForeignKey('team.Team', on_delete=models.CASCADE, related_name='appearances')
+    is_starter = models.BooleanField(default=False)
+    minute_on = models.PositiveIntegerField(default=0)
+    # None if the player was still on the pitch at the end of the match
+    minute_off = models.PositiveIntegerField(null=True, blank=True, default=None)
+    minutes_played = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return self.player.first_name + ' ' + self.player.last_name + ' - ' + str(self.match) + ' - ' + str(self.minutes_played) + ' minutes'
+    
+    class Meta:
+        unique_together = ('player', 'match')
+
+
+@receiver(post_save, sender=MatchEvent)
+@receiver(post_delete, sender=MatchEvent)
+def update_player_discipline(sender, instance, **kwargs):
+    if instance.event_type in ('Yellow Card', 'Red Card') and instance.player_id and instance.match_id:
+        from stats.discipline import recompute_player_discipline
+        recompute_player_discipline(instance.player_id, instance.match_id)
+
+
+@receiver(match_ended)
+def serve_suspensions(sender, instance, **kwargs):
+    from stats.discipline import serve_suspensions_in_match
+    serve_suspensions_in_match(instance)
+
+
+# Keep appearances up to date. A substitution's event is saved before the substitution itself, so a new substitution is picked up when the Substitution is saved, and a deleted one when its event is deleted.
+@receiver(post_save, sender=MatchEvent)
+@receiver(post_delete, sender=MatchEvent)
+def update_appearances_for_event(sender, instance, **kwargs):
+    is_deleted_substitution = instance.event_type == 'Substitution' and kwargs.get('signal') == post_delete
+    
+    if (instance.event_type == 'Red Card' or is_deleted_substitution) and instance.match_id:
+        from stats.appearances import schedule_appearances_update
+        schedule_appearances_update(instance.match_id)
+
+
+@receiver(post_save, sender=Substitution)
+def update_appearances_for_substitution(sender, instance, **kwargs):
+    from stats.appearances import schedule_appearances_update
+    schedule_appearances_update(instance.match_event.match_id)
+
+
+@receiver(m2m_changed, sender=StartingXI.players.through)
+def update_appearances_for_starting_xi(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, StartingXI):
+        from stats.appearances import schedule_appearances_update
+        schedule_appearances_update(instance.match_id)
+
+
+@receiver(post_delete, sender=StartingXI)
+def remove_starting_xi_appearances(sender, instance, **kwargs):
+    from stats.appearances import schedule_appearances_update
+    schedule_appearances_update(instance.match_id)
+
+
+# Remember who an award was given to when it was loaded, so the career of a player who loses an award is updated too
+@receiver(post_init, sender=ManOfTheMatch)
+def remember_motm_player(sender, instance, **kwargs):
+    instance._loaded_player_id = instance.player_id
+
+
+@receiver(post_save, sender=ManOfTheMatch)
+@receiver(post_delete, sender=ManOfTheMatch)
+def update_motm_rankings(sender, instance, **kwargs):
+    season_id = Match.objects.filter(id=instance.match_id).values_list('match_day__season_id', flat=True).first()
+    
+    if season_id is not None:
+        from stats.motm import invalidate_motm_rankings
+        invalidate_motm_rankings(season_id)
+    
+    from stats.career import invalidate_player_careers
+    invalidate_player_careers([instance.player_id, instance._loaded_player_id])
+    instance._loaded_player_id = instance.player_id
+
+
+# Cached careers (see stats.career) are dropped whenever one of the player's events changes
+@receiver(post_save, sender=MatchEvent)
+@receiver(post_delete, sender=MatchEvent)
+def update_player_career_for_event(sender, instance, **kwargs):
+    from stats.career import invalidate_player_careers
+    invalidate_player_careers([instance.player_id])
+
+
+@receiver(post_save, sender=Goal)
+@receiver(post_delete, sender=Goal)
+def update_player_career_for_assist(sender, instance, **kwargs):
+    from stats.career import invalidate_player_careers
+    invalidate_player_careers([instance.assist_provider_id])
@@ -0,0 +1,63 @@
+# motm.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from fixture.models import ManOfTheMatch
+
+
+def get_motm_rankings_cache_key(season_id, gender):
+    return f'motm_rankings:{season_id}:{gender}'
+
+
+def invalidate_motm_rankings(season_id):
+    cache.delete_many([get_motm_rankings_cache_key(season_id, gender) for gender in ('M', 'W')])
+
+
+def get_motm_rankings(season, gender):
+    """Get every player who has won a man of the match award in a season, with their number of awards, most awards first. The counts come from one grouped query, and the result is cached until an award in the season changes.
+
+    Args:
+        season: The season.
+        gender: Men's or women's players?
+
+    Returns:
+        A list of dictionaries, one per player.
+    """
+    cache_key = get_motm_rankings_cache_key(season.id, gender)
+    motm_rankings = cache.get(cache_key)
+
+    if motm_rankings is not None:
+        return motm_rankings
+
+    awards = ManOfTheMatch.objects.filter(
+        match__match_day__season=season,
+        player__gender=gender,
+    ).values(
+        'player_id', 'player__first_name', 'player__last_name', 'player__position__name',
+        'player__team__name', 'player__team__name_abbreviation', 'player__team__color',
+    ).annotate(no_of_awards=Count('id')).order_by('-no_of_awards', 'player_id')
+
+    motm_rankings = [
+        {
+            'player_id': award['player_id'],
+            'first_name': award['player__first_name'],
+            'last_name': award['player__last_name'],
+            'position': award['player__position__name'],
+            'team_name': award['player__team__name'],
+            'team_name_abbreviation': award['player__team__name_abbreviation'],
+            'team_color': award['player__team__color'],
+            'no_of_awards': award['no_of_awards'],
+        }
+        for award in awards
+    ]
+
+    cache.set(cache_key, motm_rankings, settings.MOTM_RANKINGS_CACHE_TTL)
+    return motm_rankings
+
+
+def get_player_no_of_motm_awards(player, season):
+    """Get the number of man of the match awards a player has won in a season, from the cached rankings."""
+    for motm_ranking in get_motm_rankings(season, player.gender):
+        if motm_ranking['player_id'] == player.id:
+            return motm_ranking['no_of_awards']
+    return 0
@@ -1,3 +1,215 @@
+import datetime
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from ashesi_premier_league.testing import create_match, create_match_day, create_player, create_season, get_teams
+from fixture.models import Competition, Goal, ManOfTheMatch, MatchEvent, StartingXI
+from player.models import PlayerPosition
+from stats.appearances import get_appearances
+from stats.career import get_career
+from stats.models import Appearance, PlayerDiscipline
+from transfer.models import Transfer
 
-# Create your tests here.
+
+class SuspensionTests(TestCase):
+
+    def setUp(self):
+        self.season = create_season()
+        self.teams = get_teams(3)
+        self.player = create_player(self.teams[0])
+        self.first_match = self.create_match(1, self.teams[0], self.teams[1])
+        self.book(self.first_match, 'Red Card')
+        self.end(self.first_match)
+
+    def create_match(self, number, home_team, away_team):
+        return create_match(home_team, away_team, create_match_day(self.season, number))
+
+    def book(self, match, event_type):
+        MatchEvent.objects.create(match=match, player=self.player, team=self.teams[0], event_type=event_type, minute=30)
+
+    def end(self, match):
+        match.has_ended = True
+        match.save()
+
+    def get_discipline(self):
+        return PlayerDiscipline.objects.get(player=self.player, season=self.season)
+
+    def test_a_ban_is_not_served_in_the_match_it_was_earned_in(self):
+        discipline = self.get_discipline()
+        self.assertEqual((discipline.suspensions_earned, discipline.suspensions_served), (1, 0))
+
+    def test_a_ban_is_served_by_the_team_the_player_was_in_on_the_match_day(self):
+        second_match = self.create_match(2, self.teams[0], self.teams[1])
+
+        # the player moves on before the second match is recorded as ended
+        transfer = Transfer.objects.create(player=self.player, from_team=self.teams[0], to_team=self.teams[2])
+        Transfer.objects.filter(id=transfer.id).update(date=datetime.date(2023, 10, 3))
+        self.player.team = self.teams[2]
+        self.player.save()
+
+        self.end(second_match)
+        self.assertEqual(self.get_discipline().suspensions_served, 1)
+
+    def test_a_player_booked_again_serves_the_earlier_ban(self):
+        second_match = self.create_match(2, self.teams[0], self.teams[1])
+        self.book(second_match, 'Red Card')
+        self.end(second_match)
+
+        discipline = self.get_discipline()
+        self.assertEqual((discipline.suspensions_earned, discipline.suspensions_served), (2, 1))
+
+
+class CleanSheetTests(TestCase):
+
+    def setUp(self):
+        self.season = create_season()
+        self.teams = get_teams(3)
+        self.goalkeeper = create_player(self.teams[0], position=PlayerPosition.objects.get(name='Goalkeeper'))
+
+        first_match = self.play(1, self.teams[0], self.teams[1], 1, 0)
+        self.play(2, self.teams[1], self.teams[2], 0, 0)
+        last_match = self.play(3, self.teams[2], self.teams[0], 0, 2)
+        # matches that haven't ended and women's matches don't count
+        self.play(4, self.teams[1], self.teams[0], 0, 0, has_ended=False)
+        self.play(5, self.teams[1], self.teams[0], 0, 0, competition=Competition.objects.get(name='Premier League', gender='W'))
+
+        for match in (first_match, last_match):
+            StartingXI.objects.create(match=match, team=self.teams[0]).players.set([self.goalkeeper])
+
+    def play(self, number, home_team, away_team, home_team_score, away_team_score, has_ended=True, competition=None):
+        return create_match(
+            home_team, away_team, create_match_day(self.season, number), competition,
+            home_team_score=home_team_score, away_team_score=away_team_score, has_ended=has_ended,
+        )
+
+    def get_rankings(self, **params):
+        response = APIClient().get('/season/stats/mens_clean_sheet_rankings/get', {'season_id': self.season.id, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_home_and_away_clean_sheets_are_counted(self):
+        rankings = self.get_rankings()['data']
+
+        # teams with as many clean sheets are ordered by name
+        other_teams = sorted(self.teams[1:], key=lambda team: team.name)
+        self.assertEqual([(team['team_id'], team['no_of_clean_sheets']) for team in rankings], [(self.teams[0].id, 2)] + [(team.id, 1) for team in other_teams])
+        self.assertEqual([(goalkeeper['player_id'], goalkeeper['no_of_clean_sheets']) for goalkeeper in rankings[0]['goalkeepers']], [(self.goalkeeper.id, 2)])
+        self.assertEqual(rankings[1]['goalkeepers'], [])
+
+    def test_rankings_can_be_paged(self):
+        rankings = self.get_rankings(page=2, page_size=2)
+
+        self.assertEqual(rankings['count'], 3)
+        self.assertEqual(len(rankings['data']), 1)
+
+
+class AppearanceTests(TestCase):
+
+    def setUp(self):
+        self.home_team, self.away_team = get_teams(2)
+        self.home_players = [create_player(self.home_team, last_name=str(number)) for number in range(3)]
+        self.away_player = create_player(self.away_team, last_name='3')
+        self.match = create_match(self.home_team, self.away_team, create_match_day(create_season()))
+
+    def post(self, path, data):
+        return APIClient().post(path, {'match': self.match.id, **data}, format='json')
+
+    def get_minutes_played(self, player):
+        appearance = Appearance.objects.get(match=self.match, player=player)
+        return appearance.minute_on, appearance.minute_off, appearance.minutes_played
+
+    def test_minutes_played_follow_the_lineups_substitutions_and_red_cards(self):
+        # the appearances are recomputed when each transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post('/starting_xi/create/', {'team': self.home_team.id, 'players': [self.home_players[0].id, self.home_players[1].id]})
+            self.post('/starting_xi/create/', {'team': self.away_team.id, 'players': [self.away_player.id]})
+            response = self.post('/match_event/substitution/create/', {'team': self.home_team.id, 'player_out': self.home_players[1].id, 'player_in': self.home_players[2].id, 'minute': 60})
+            self.assertEqual(response.status_code, 201)
+            self.post('/match_event/batch/create/', {'events': [
+                {'client_id': 'a', 'event_type': 'Goal', 'player': self.home_players[2].id, 'team': self.home_team.id, 'minute': 70},
+                {'client_id': 'b', 'event_type': 'Red Card', 'player': self.home_players[0].id, 'team': self.home_team.id, 'minute': 80},
+            ]})
+
+        self.assertEqual(self.get_minutes_played(self.home_players[0]), (0, 80, 80))
+        self.assertEqual(self.get_minutes_played(self.home_players[1]), (0, 60, 60))
+        self.assertEqual(self.get_minutes_played(self.home_players[2]), (60, None, 30))
+        self.assertEqual(self.get_minutes_played(self.away_player), (0, None, 90))
+
+        self.match.has_ended = True
+        self.match.save()
+
+        response = APIClient().get('/season/stats/mens_minutes_played/get', {'season_id': self.match.match_day.season_id})
+        rankings = [(player['player_id'], player['minutes_played']) for player in response.data['data']]
+        self.assertEqual(rankings, [(self.away_player.id, 90), (self.home_players[0].id, 80), (self.home_players[1].id, 60), (self.home_players[2].id, 30)])
+        self.assertEqual(response.data['data'][3]['goals_per_90'], 3.0)
+
+    def test_substitutes_must_play_for_the_team(self):
+        response = self.post('/match_event/substitution/create/', {'team': self.home_team.id, 'player_out': self.home_players[0].id, 'player_in': self.away_player.id, 'minute': 60})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MatchEvent.objects.exists())
+
+    def test_events_after_the_final_whistle_count_as_the_last_minute(self):
+        appearances = get_appearances([(1, 10)], [(95, 1, 10, 11)], 90)
+
+        self.assertEqual(appearances[10]['minutes_played'], 90)
+        self.assertEqual(appearances[11]['minutes_played'], 0)
+
+
+class CareerTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.teams = get_teams(2)
+        self.player = create_player(self.teams[0])
+        self.team_mate = create_player(self.teams[0], first_name='Kwame')
+
+        self.first_season = create_season()
+        self.league_match = create_match(self.teams[0], self.teams[1], create_match_day(self.first_season))
+        self.add_goal(self.league_match, self.player, assist_provider=self.team_mate)
+        self.add_event(self.league_match, self.player, 'Yellow Card')
+        ManOfTheMatch.objects.create(match=self.league_match, player=self.player)
+
+        self.second_season = create_season('2024/25', datetime.date(2024, 9, 1), datetime.date(2025, 6, 1))
+        self.cup_match = create_match(self.teams[0], self.teams[1], create_match_day(self.second_season, date=datetime.date(2024, 10, 1)), Competition.objects.get(name='FA Cup', gender='M'))
+        self.add_goal(self.cup_match, self.team_mate, assist_provider=self.player)
+        self.add_event(self.cup_match, self.player, 'Red Card')
+
+    def add_event(self, match, player, event_type):
+        return MatchEvent.objects.create(match=match, player=player, team=self.teams[0], event_type=event_type, minute=30)
+
+    def add_goal(self, match, player, assist_provider=None):
+        return Goal.objects.create(match_event=self.add_event(match, player, 'Goal'), assist_provider=assist_provider)
+
+    def get_splits(self):
+        return [
+            (split['season_id'], split['competition_name'], split['no_of_goals'], split['no_of_assists'], split['yellow_cards'], split['red_cards'], split['no_of_motm_awards'])
+            for split in get_career(self.player)['splits']
+        ]
+
+    def test_the_career_is_split_by_season_and_competition_newest_first(self):
+        self.assertEqual(self.get_splits(), [
+            (self.second_season.id, 'FA Cup', 0, 1, 0, 1, 0),
+            (self.first_season.id, 'Premier League', 1, 0, 1, 0, 1),
+        ])
+        self.assertEqual([team['team_id'] for team in get_career(self.player)['teams']], [self.teams[0].id])
+
+    def test_the_career_is_cached_until_one_of_the_players_events_changes(self):
+        self.get_splits()
+
+        with self.assertNumQueries(0):
+            self.get_splits()
+
+        self.add_goal(self.cup_match, self.player)
+        self.assertEqual(self.get_splits()[0], (self.second_season.id, 'FA Cup', 1, 1, 0, 1, 0))
+
+        # assists count for the assist provider
+        self.add_goal(self.league_match, self.team_mate, assist_provider=self.player)
+        self.assertEqual(self.get_splits()[1], (self.first_season.id, 'Premier League', 1, 1, 1, 0, 1))
+
+    def test_the_endpoint_returns_the_career(self):
+        response = APIClient().get('/player/career/get', {'id': self.player.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']['splits']), 2)
+        self.assertEqual(APIClient().get('/player/career/get', {'id': self.player.id + 100}).status_code, 404)
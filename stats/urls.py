@@ -1,5 +1,5 @@
 from django.urls import path
-from stats.views import get_season_top_scorers, get_season_top_assisters, get_mens_top_scorers, get_womens_top_scorers, get_mens_season_top_assisters, get_womens_season_top_assisters, get_mens_season_red_card_rankings, get_mens_season_yellow_card_rankings, get_womens_season_red_card_rankings, get_womens_season_yellow_card_rankings, get_mens_season_clean_sheet_rankings, get_womens_season_clean_sheet_rankings
+from stats.views import get_season_top_scorers, get_season_top_assisters, get_mens_top_scorers, get_womens_top_scorers, get_mens_season_top_assisters, get_womens_season_top_assisters, get_mens_season_red_card_rankings, get_mens_season_yellow_card_rankings, get_womens_season_red_card_rankings, get_womens_season_yellow_card_rankings, get_mens_season_clean_sheet_rankings, get_womens_season_clean_sheet_rankings, get_season_suspensions, get_mens_season_minutes_played, get_womens_season_minutes_played, get_mens_season_motm_rankings, get_womens_season_motm_rankings, get_player_season_stats
 
 
 urlpatterns = [
@@ -20,5 +20,15 @@ urlpatterns = [
     path('season/stats/mens_clean_sheet_rankings/get', get_mens_season_clean_sheet_rankings, name='get_mens_season_clean_sheet_rankings'),
     path('season/stats/womens_clean_sheet_rankings/get', get_womens_season_clean_sheet_rankings, name='get_womens_season_clean_sheet_rankings'),
     
+    path('season/stats/suspensions/get', get_season_suspensions, name='get_season_suspensions'),
+    
+    path('season/stats/mens_minutes_played/get', get_mens_season_minutes_played, name='get_mens_season_minutes_played'),
+    path('season/stats/womens_minutes_played/get', get_womens_season_minutes_played, name='get_womens_season_minutes_played'),
+    
+    path('season/stats/mens_motm_rankings/get', get_mens_season_motm_rankings, name='get_mens_season_motm_rankings'),
+    path('season/stats/womens_motm_rankings/get', get_womens_season_motm_rankings, name='get_womens_season_motm_rankings'),
+    
+    path('season/stats/player/get', get_player_season_stats, name='get_player_season_stats'),
+    
     
 ]
\ No newline at end of file
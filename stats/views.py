@@ -3,8 +3,14 @@ from django.conf import settings
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from fixture.models import Goal, MatchEvent, Season, Match
-from django.db.models import Q
+from fixture.models import Goal, MatchEvent, Season, Match, StartingXI
+from team.models import Team
+from stats.discipline import get_card_rankings, get_suspended_players
+from stats.models import Appearance, PlayerDiscipline
+from stats.motm import get_motm_rankings, get_player_no_of_motm_awards
+from player.models import Player
+from django.db.models import Q, F, Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 
 
 @api_view(['GET'])
@@ -121,25 +127,204 @@ def get_mens_season_clean_sheet_rankings(request):
     """See get_season_clean_sheet_rankings for documentation.
     
     Args:
-    A get request. The request must contain the season id.
+    A get request. The request must contain the season id. It can also contain page and page_size.
     """
     
     season_id_param = request.query_params.get('season_id')
+    page_param = request.query_params.get('page')
+    page_size_param = request.query_params.get('page_size')
     
-    
-    return get_season_clean_sheet_rankings('M', season_id_param)
+    return get_season_clean_sheet_rankings('M', season_id_param, page_param, page_size_param)
 
 @api_view(['GET'])
 def get_womens_season_clean_sheet_rankings(request):
     """See get_season_clean_sheet_rankings for documentation.
     
+    Args:
+    A get request. The request must contain the season id. It can also contain page and page_size.
+    """
+    
+    season_id_param = request.query_params.get('season_id')
+    page_param = request.query_params.get('page')
+    page_size_param = request.query_params.get('page_size')
+    
+    return get_season_clean_sheet_rankings('W', season_id_param, page_param, page_size_param)
+
+
+@api_view(['GET'])
+def get_season_suspensions(request):
+    """Get the players who are suspended for their team's next match. A player earns a one match ban for every red card and for every third yellow card in a season, and serves it when their team's next match ends.
+    
+    Args:
+    A get request. The request must contain the season id. It can also contain a team id, to only include that team's players.
+    
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and a list of suspended players with their card counts.
+    """
+    
+    season_id_param = request.query_params.get('season_id')
+    team_id_param = request.query_params.get('team_id')
+    
+    if not season_id_param:
+        return Response({'message': 'Season ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        season_id = int(season_id_param)
+        team_id = int(team_id_param) if team_id_param else None
+    except ValueError:
+        return Response({'message': 'Invalid Season ID or Team ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        season = Season.objects.get(id=season_id)
+        team = Team.objects.get(id=team_id) if team_id else None
+    except (Season.DoesNotExist, Team.DoesNotExist):
+        return Response({'message': 'Season or team not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    suspensions = []
+    
+    for discipline in get_suspended_players(season, team):
+        player = discipline.player
+        suspensions.append({
+            'player_id': player.id,
+            'first_name': player.first_name,
+            'last_name': player.last_name,
+            'position': player.position.name if player.position else None,
+            'team_id': player.team_id,
+            'team_name': player.team.name if player.team else None,
+            'no_of_yellow_cards': discipline.yellow_cards,
+            'no_of_red_cards': discipline.red_cards,
+            'no_of_matches_remaining': discipline.suspensions_earned - discipline.suspensions_served,
+        })
+    
+    return Response({'message': 'Suspensions retrieved successfully', 'data': suspensions}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_mens_season_minutes_played(request):
+    """See get_season_minutes_played for documentation
+    
+    Args:
+    A get request. The request must contain the season id.
+    """
+    
+    season_id_param = request.query_params.get('season_id')
+    
+    return get_season_minutes_played(season_id_param, 'M')
+
+
+@api_view(['GET'])
+def get_womens_season_minutes_played(request):
+    """See get_season_minutes_played for documentation
+    
     Args:
     A get request. The request must contain the season id.
     """
     
     season_id_param = request.query_params.get('season_id')
     
-    return get_season_clean_sheet_rankings('W', season_id_param)
+    return get_season_minutes_played(season_id_param, 'W')
+
+
+@api_view(['GET'])
+def get_mens_season_motm_rankings(request):
+    """See get_season_motm_rankings for documentation
+    
+    Args:
+    A get request. The request must contain the season id.
+    """
+    
+    season_id_param = request.query_params.get('season_id')
+    
+    return get_season_motm_rankings(season_id_param, 'M')
+
+
+@api_view(['GET'])
+def get_womens_season_motm_rankings(request):
+    """See get_season_motm_rankings for documentation
+    
+    Args:
+    A get request. The request must contain the season id.
+    """
+    
+    season_id_param = request.query_params.get('season_id')
+    
+    return get_season_motm_rankings(season_id_param, 'W')
+
+
+@api_view(['GET'])
+def get_player_season_stats(request):
+    """Get a player's stats in a season: goals, assists, cards, appearances, minutes played and man of the match awards.
+    Each comes from one aggregate query, or from the cached rankings in the case of man of the match awards, so a player's profile doesn't scan the season's matches.
+    
+    Args:
+    A get request. The request must contain the following fields:
+    player_id: The id of the player.
+    season_id: The id of the season.
+    
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and the player's stats.
+    """
+    
+    player_id_param = request.query_params.get('player_id')
+    season_id_param = request.query_params.get('season_id')
+    
+    if not player_id_param:
+        return Response({'message': 'Player ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not season_id_param:
+        return Response({'message': 'Season ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        player_id = int(player_id_param)
+    except ValueError:
+        return Response({'message': 'Invalid Player ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        season_id = int(season_id_param)
+    except ValueError:
+        return Response({'message': 'Invalid Season ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        player = Player.objects.get(id=player_id)
+    except Player.DoesNotExist:
+        return Response({'message': 'Player not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        season = Season.objects.get(id=season_id)
+    except Season.DoesNotExist:
+        return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    goals = Goal.objects.filter(
+        Q(match_event__player=player) | Q(assist_provider=player),
+        match_event__match__match_day__season=season,
+    ).aggregate(
+        no_of_goals=Count('id', filter=Q(match_event__player=player)),
+        no_of_assists=Count('id', filter=Q(assist_provider=player)),
+    )
+    
+    appearances = Appearance.objects.filter(player=player, match__match_day__season=season).aggregate(
+        no_of_appearances=Count('id'),
+        no_of_starts=Count('id', filter=Q(is_starter=True)),
+        minutes_played=Coalesce(Sum('minutes_played'), 0),
+    )
+    
+    discipline = PlayerDiscipline.objects.filter(player=player, season=season).first()
+    
+    player_season_stats = {
+        'player_id': player.id,
+        'season_id': season.id,
+        'no_of_goals': goals['no_of_goals'],
+        'no_of_assists': goals['no_of_assists'],
+        'no_of_appearances': appearances['no_of_appearances'],
+        'no_of_starts': appearances['no_of_starts'],
+        'minutes_played': appearances['minutes_played'],
+        'yellow_cards': discipline.yellow_cards if discipline else 0,
+        'red_cards': discipline.red_cards if discipline else 0,
+        'is_suspended': discipline.is_suspended if discipline else False,
+        'no_of_motm_awards': get_player_no_of_motm_awards(player, season),
+    }
+    
+    return Response({'message': 'Player season stats retrieved successfully', 'data': player_season_stats}, status=status.HTTP_200_OK)
 
 
 def get_season_top_scorers(season_id_arg, gender):
@@ -276,17 +461,20 @@ def get_season_top_assisters(season_id_arg, gender):
         return Response({'message': 'Top women\'s assisters retrieved successfully', 'data': assisters}, status=status.HTTP_200_OK) 
 
 
-def get_season_clean_sheet_rankings(gender, season_id_arg):
+def get_season_clean_sheet_rankings(gender, season_id_arg, page_arg=None, page_size_arg=None):
     """This is a helper function. Get the clean sheet rankings of a season. A team has a clean sheet in the following situations:
     1. They're the home team and the away_team_score is 0
     2. They're the away team and the home_team_score is 0
+    Both cases are counted in a single query, with one subquery per side. Goalkeepers who started a clean sheet (according to the match's starting XI) are credited with it.
     
     Args:
     gender: Men's or women's clean sheet rankings?
     season_id_arg: The season id.
+    page_arg: The page of rankings (Optional). If it's not given, all teams are returned.
+    page_size_arg: The number of teams per page (Optional). Defaults to 10.
     
     Returns:
-        A response object containing a JSON object and a status code. The JSON object contains a message, a list of errors if any, and a list of teams ranked by clean sheets. The message indicates whether the clean sheet rankings were retrieved successfully or not. 
+        A response object containing a JSON object and a status code. The JSON object contains a message, a list of errors if any, and a list of teams ranked by clean sheets. Each team includes its goalkeepers' clean sheets. The message indicates whether the clean sheet rankings were retrieved successfully or not. 
     """
     
     season_id_param = season_id_arg
@@ -304,61 +492,85 @@ def get_season_clean_sheet_rankings(gender, season_id_arg):
     except Season.DoesNotExist:
         return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    clean_sheets = Match.objects.filter(
+    try:
+        page, page_size = get_page_params(page_arg, page_size_arg)
+    except ValueError:
+        return Response({'message': 'Invalid page or page size'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    season_matches = Match.objects.filter(
         Q(match_day__season=season) &
-        (Q(home_team_score=0) | Q(away_team_score=0)) &
-        Q(competition__gender=gender) & 
+        Q(competition__gender=gender) &
         Q(has_ended=True)
     )
     
-    if not clean_sheets:
+    def count_clean_sheets(team_field, opponent_score_field):
+        clean_sheets = season_matches.filter(
+            **{team_field: OuterRef('pk'), opponent_score_field: 0}
+        ).order_by().values(team_field).annotate(no_of_clean_sheets=Count('id')).values('no_of_clean_sheets')
+        return Coalesce(Subquery(clean_sheets, output_field=IntegerField()), 0)
+    
+    teams = Team.objects.annotate(
+        home_clean_sheets=count_clean_sheets('home_team', 'away_team_score'),
+        away_clean_sheets=count_clean_sheets('away_team', 'home_team_score'),
+    ).annotate(
+        no_of_clean_sheets=F('home_clean_sheets') + F('away_clean_sheets')
+    ).filter(no_of_clean_sheets__gt=0).order_by('-no_of_clean_sheets', 'name')
+    
+    no_of_teams = teams.count()
+    
+    if not no_of_teams:
         return Response({'message': 'No clean sheets this season yet'}, status=status.HTTP_404_NOT_FOUND)
     
+    if page:
+        teams = teams[(page - 1) * page_size:page * page_size]
+    
+    teams = list(teams)
+    
+    # goalkeepers who started a clean sheet, per team
+    goalkeeper_clean_sheets = StartingXI.objects.filter(
+        Q(match__in=season_matches) &
+        Q(team__in=teams) &
+        Q(players__position__name='Goalkeeper') &
+        (
+            Q(team=F('match__home_team'), match__away_team_score=0) |
+            Q(team=F('match__away_team'), match__home_team_score=0)
+        )
+    ).values('team', 'players', 'players__first_name', 'players__last_name').annotate(
+        no_of_clean_sheets=Count('id')
+    ).order_by('-no_of_clean_sheets')
+    
+    goalkeepers = {}
+    for row in goalkeeper_clean_sheets:
+        goalkeepers.setdefault(row['team'], []).append({
+            'player_id': row['players'],
+            'first_name': row['players__first_name'],
+            'last_name': row['players__last_name'],
+            'no_of_clean_sheets': row['no_of_clean_sheets'],
+        })
+    
     clean_sheet_rankings = []
     
+    for team in teams:
+        clean_sheet_rankings.append({
+            'team_id': team.id,
+            'team_name': team.name,
+            'team_name_abbreviation': team.name_abbreviation,
+            'team_logo_url': team.logo_url.url,
+            'team_color': team.color,
+            'no_of_clean_sheets': team.no_of_clean_sheets,
+            'goalkeepers': goalkeepers.get(team.id, []),
+        })
     
-    for clean_sheet in clean_sheets:
-        if clean_sheet.home_team_score == 0:
-            clean_sheet_ranking_data = {
-                'team_name': clean_sheet.away_team.name,
-                'team_name_abbreviation': clean_sheet.away_team.name_abbreviation,
-                'team_logo_url': clean_sheet.away_team.logo_url.url,
-                'team_color': clean_sheet.away_team.color,
-                'no_of_clean_sheets': Match.objects.filter(
-                    Q(away_team=clean_sheet.away_team) &
-                    Q(home_team_score=0) &
-                    Q(match_day__season=season) &
-                    Q(competition__gender = gender) &
-                    Q(has_ended=True)
-                ).count()
-            }
-            if clean_sheet_ranking_data not in clean_sheet_rankings:
-                clean_sheet_rankings.append(clean_sheet_ranking_data)
-                
-        if clean_sheet.away_team_score == 0:
-            clean_sheet_ranking_data = {
-                'team_name': clean_sheet.home_team.name,
-                'team_name_abbreviation': clean_sheet.home_team.name_abbreviation,
-                'team_logo_url': clean_sheet.home_team.logo_url.url,
-                'team_color': clean_sheet.home_team.color,
-                'no_of_clean_sheets': Match.objects.filter(
-                    Q(home_team=clean_sheet.home_team) &
-                    Q(away_team_score=0) &
-                    Q(match_day__season=season) &
-                    Q(competition__gender = gender) &
-                    Q(has_ended=True)
-                ).count()
-            }
-            if clean_sheet_ranking_data not in clean_sheet_rankings:
-                clean_sheet_rankings.append(clean_sheet_ranking_data)
-                
-    clean_sheet_rankings.sort(key=lambda x: x['no_of_clean_sheets'], reverse=True)
+    response_data = {'message': 'Clean sheet rankings retrieved successfully', 'data': clean_sheet_rankings}
     
-    return Response({'message': 'Clean sheet rankings retrieved successfully', 'data': clean_sheet_rankings}, status=status.HTTP_200_OK)
+    if page:
+        response_data.update({'count': no_of_teams, 'page': page, 'page_size': page_size})
+    
+    return Response(response_data, status=status.HTTP_200_OK)
 
 
 def get_season_card_rankings(season_id_arg, gender, card_type):
-    """This is a helper function Get the card rankings of a season. 
+    """This is a helper function Get the card rankings of a season. The yellow and red card rankings share one cached result (see stats.discipline.get_card_rankings), which is filtered and sorted by card type here.
     
     Args:
     season_id_arg: The season id.
@@ -384,38 +596,141 @@ def get_season_card_rankings(season_id_arg, gender, card_type):
     except Season.DoesNotExist:
         return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    cards = MatchEvent.objects.filter(
-        Q(match__match_day__season=season) &
-        Q(event_type=card_type) &
-        Q(player__gender=gender)
-    )
+    count_field = 'no_of_yellow_cards' if card_type == 'Yellow Card' else 'no_of_red_cards'
     
-    if not cards:
-        return Response({'message': 'No ' + card_type + ' cards this season yet'}, status=status.HTTP_404_NOT_FOUND)
+    card_rankings = [
+        dict(card_ranking_data, no_of_cards=card_ranking_data[count_field])
+        for card_ranking_data in get_card_rankings(season, gender)
+        if card_ranking_data[count_field] > 0
+    ]
     
-    card_rankings = []
-    
-    for card in cards:
-        card_ranking_data = {
-            'first_name': card.player.first_name,
-            'last_name': card.player.last_name,
-            'position': card.player.position.name,
-            'team_name': card.player.team.name,
-            'team_name_abbreviation': card.player.team.name_abbreviation,
-            'team_logo_url': card.player.team.logo_url.url,
-            'team_color': card.player.team.color,
-            'player_id': card.player.id,
-            'no_of_cards': MatchEvent.objects.filter(
-                Q(player=card.player) &
-                Q(match__match_day__season=season) &
-                Q(event_type=card_type)
-            ).count()
-        }
-        if card.player.image is not None:
-            card_ranking_data['player_image'] = card.player.image.url
-        if card_ranking_data not in card_rankings:
-            card_rankings.append(card_ranking_data)
+    if not card_rankings:
+        return Response({'message': 'No ' + card_type + ' cards this season yet'}, status=status.HTTP_404_NOT_FOUND)
         
     card_rankings.sort(key=lambda x: x['no_of_cards'], reverse=True)
     
-    return Response({'message': card_type + ' rankings retrieved successfully', 'data': card_rankings}, status=status.HTTP_200_OK)
\ No newline at end of file
+    return Response({'message': card_type + ' rankings retrieved successfully', 'data': card_rankings}, status=status.HTTP_200_OK)
+
+
+def get_season_minutes_played(season_id_arg, gender):
+    """Get the players who have played in a season's ended matches, ranked by minutes played, with their appearances, starts, goals and goals per 90 minutes. This is a helper function. It's used by get_mens_season_minutes_played and get_womens_season_minutes_played.
+    The minutes come from the Appearance table (see stats.appearances), so this is one grouped query over appearances and one over goals.
+    
+    Args:
+    season_id_arg: The season id.
+    gender: Men's or women's players?
+    
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and a list of players ranked by minutes played.
+    """
+    
+    season_id_param = season_id_arg
+    
+    if not season_id_param:
+        return Response({'message': 'Season ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        season_id = int(season_id_param)
+    except ValueError:
+        return Response({'message': 'Invalid Season ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        season = Season.objects.get(id=season_id)
+    except Season.DoesNotExist:
+        return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    appearances = Appearance.objects.filter(
+        match__match_day__season=season,
+        match__has_ended=True,
+        player__gender=gender,
+    ).values(
+        'player_id', 'player__first_name', 'player__last_name', 'player__position__name', 'player__team__name', 'player__team__name_abbreviation',
+    ).annotate(
+        no_of_appearances=Count('id'),
+        no_of_starts=Count('id', filter=Q(is_starter=True)),
+        minutes_played=Sum('minutes_played'),
+    ).order_by('-minutes_played', 'player_id')
+    
+    if not appearances:
+        return Response({'message': 'No appearances in this season yet'}, status=status.HTTP_404_NOT_FOUND)
+    
+    goals = dict(Goal.objects.filter(
+        match_event__match__match_day__season=season,
+        match_event__match__has_ended=True,
+        match_event__player__gender=gender,
+    ).values('match_event__player_id').annotate(no_of_goals=Count('id')).values_list('match_event__player_id', 'no_of_goals'))
+    
+    minutes_played = []
+    
+    for appearance in appearances:
+        no_of_goals = goals.get(appearance['player_id'], 0)
+        minutes_played.append({
+            'player_id': appearance['player_id'],
+            'first_name': appearance['player__first_name'],
+            'last_name': appearance['player__last_name'],
+            'position': appearance['player__position__name'],
+            'team_name': appearance['player__team__name'],
+            'team_name_abbreviation': appearance['player__team__name_abbreviation'],
+            'no_of_appearances': appearance['no_of_appearances'],
+            'no_of_starts': appearance['no_of_starts'],
+            'minutes_played': appearance['minutes_played'],
+            'no_of_goals': no_of_goals,
+            'goals_per_90': round(no_of_goals * 90 / appearance['minutes_played'], 2) if appearance['minutes_played'] else None,
+        })
+    
+    return Response({'message': 'Minutes played retrieved successfully', 'data': minutes_played}, status=status.HTTP_200_OK)
+
+
+def get_season_motm_rankings(season_id_arg, gender):
+    """Get the players who have won man of the match awards in a season, ranked by number of awards. This is a helper function. It's used by get_mens_season_motm_rankings and get_womens_season_motm_rankings.
+    The rankings are cached per season (see stats.motm), so they are only counted again after an award in the season changes.
+    
+    Args:
+    season_id_arg: The season id.
+    gender: Men's or women's players?
+    
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and a list of players ranked by man of the match awards.
+    """
+    
+    season_id_param = season_id_arg
+    
+    if not season_id_param:
+        return Response({'message': 'Season ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        season_id = int(season_id_param)
+    except ValueError:
+        return Response({'message': 'Invalid Season ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        season = Season.objects.get(id=season_id)
+    except Season.DoesNotExist:
+        return Response({'message': 'Season not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    motm_rankings = get_motm_rankings(season, gender)
+    
+    if not motm_rankings:
+        return Response({'message': 'No man of the match awards in this season yet'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({'message': 'Man of the match rankings retrieved successfully', 'data': motm_rankings}, status=status.HTTP_200_OK)
+
+
+def get_page_params(page_arg, page_size_arg, default_page_size=10, max_page_size=50):
+    """This is a helper function. Parse the page and page size query parameters of a ranking.
+    
+    Args:
+    page_arg: The page parameter. If it's not given, the ranking isn't paginated.
+    page_size_arg: The page size parameter.
+    
+    Returns:
+        A tuple of (page, page_size). page is None if the ranking isn't paginated. Raises a ValueError if either parameter isn't a number.
+    """
+    
+    if not page_arg:
+        return None, None
+    
+    page = max(int(page_arg), 1)
+    page_size = min(max(int(page_size_arg or default_page_size), 1), max_page_size)
+    
+    return page, page_size
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from team.models import Team, update_team_player_counts
+
+
+class Command(BaseCommand):
+    help = "Recount the active men's and women's players of every team. Counts are updated automatically when players are saved, so this is only needed after bulk changes to players that bypass signals, or for players created before the counts existed."
+
+    def handle(self, *args, **options):
+        team_ids = list(Team.objects.values_list('id', flat=True))
+        update_team_player_counts(team_ids)
+        self.stdout.write(f'Recounted the players of {len(team_ids)} team(s)')
@@ -1,5 +1,7 @@
 from django.db import models
-from django.db.models.signals import post_migrate
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_init, post_migrate, post_save, post_delete
 from django.dispatch import receiver
 from cloudinary.models import CloudinaryField
 
@@ -13,9 +15,42 @@ class Team(models.Model):
     color = models.CharField(max_length=20, null=False, blank=False, default=None)
     twitter_url = models.URLField(max_length=100, null=False, blank=False, default=None, unique=True,)
     is_active = models.BooleanField(default=True)
+    # The number of active men's and women's players in the team. These are kept up to date by the Player signal handlers below.
+    no_of_mens_players = models.PositiveIntegerField(default=0)
+    no_of_womens_players = models.PositiveIntegerField(default=0)
     
     def __str__(self):
         return self.name    
+    
+    @property
+    def has_mens_team(self):
+        return self.no_of_mens_players > 0
+    
+    @property
+    def has_womens_team(self):
+        return self.no_of_womens_players > 0
+
+
+def update_team_player_counts(team_ids):
+    """Recount the active men's and women's players of some teams. This is a single UPDATE statement, so the counts are correct even when players of the same team are saved at the same time.
+
+    Args:
+        team_ids: The ids of the teams to recount.
+    """
+    from player.models import Player
+    
+    def count_players(gender):
+        players = Player.objects.filter(team=OuterRef('pk'), gender=gender, is_active=True).order_by().values('team').annotate(count=Count('id')).values('count')
+        return Coalesce(Subquery(players), 0)
+    
+    Team.objects.filter(id__in=team_ids).update(
+        no_of_mens_players=count_players('M'),
+        no_of_womens_players=count_players('W'),
+    )
+    
+    # update() doesn't send post_save, so the change is recorded for the static export here
+    from export.models import record_changes
+    record_changes(Team, team_ids)
 
 
 # create default teams
@@ -39,5 +74,29 @@ def create_default_teams(sender, **kwargs):
     if sender.name == 'team':
         for team_data in DEFAULT_TEAMS:
             Team.objects.get_or_create(**team_data)
+        
+        # The player counts start at 0 for teams that existed before them, and bulk changes to players skip the signal handlers below, so every
+        # team is recounted after each migrate. It's a single UPDATE statement.
+        update_team_player_counts(list(Team.objects.values_list('id', flat=True)))
             
-            
\ No newline at end of file
+            
+
+# Keep the teams' player counts up to date. A player's old team is remembered when the player is loaded, so that a transfer recounts both teams.
+@receiver(post_init, sender='player.Player')
+def remember_player_team(sender, instance, **kwargs):
+    instance._loaded_team_id = instance.team_id
+
+
+@receiver(post_save, sender='player.Player')
+def update_player_team_counts(sender, instance, **kwargs):
+    team_ids = {instance.team_id, instance._loaded_team_id} - {None}
+    instance._loaded_team_id = instance.team_id
+    
+    if team_ids:
+        update_team_player_counts(team_ids)
+
+
+@receiver(post_delete, sender='player.Player')
+def remove_player_from_team_counts(sender, instance, **kwargs):
+    if instance.team_id:
+        update_team_player_counts([instance.team_id])
@@ -1,3 +1,75 @@
 from django.test import TestCase
+from django.apps import apps
+from rest_framework.test import APIClient
+from ashesi_premier_league.testing import create_match, create_match_day, create_player, create_season, get_teams
+from fixture.models import HeadToHead
+from fixture.head_to_head import get_team_pair
+from team.models import Team, create_default_teams
 
-# Create your tests here.
+
+class HeadToHeadTests(TestCase):
+
+    def setUp(self):
+        self.teams = get_teams(3)
+        self.match = create_match(self.teams[0], self.teams[1], create_match_day(create_season()), home_team_score=2, away_team_score=1, has_ended=True)
+
+    def get_record(self, team_1, team_2):
+        team_a_id, team_b_id = get_team_pair(team_1.id, team_2.id)
+        return HeadToHead.objects.filter(team_a_id=team_a_id, team_b_id=team_b_id).first()
+
+    def test_limit_must_be_at_least_1(self):
+        response = APIClient().get('/team/head_to_head/get', {'team_1_id': self.teams[0].id, 'team_2_id': self.teams[1].id, 'limit': -1})
+        self.assertEqual(response.status_code, 400)
+
+        response = APIClient().get('/team/head_to_head/get', {'team_1_id': self.teams[0].id, 'team_2_id': self.teams[1].id, 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']['recent_meetings']), 1)
+
+    def test_changing_the_teams_of_an_ended_match_updates_both_pairs(self):
+        self.assertEqual(self.get_record(self.teams[0], self.teams[1]).matches_played, 1)
+
+        self.match.away_team = self.teams[2]
+        self.match.save()
+
+        old_record = self.get_record(self.teams[0], self.teams[1])
+        self.assertTrue(old_record is None or old_record.matches_played == 0)
+        self.assertEqual(self.get_record(self.teams[0], self.teams[2]).matches_played, 1)
+
+
+class PlayerCountTests(TestCase):
+
+    def setUp(self):
+        self.teams = get_teams(2)
+
+    def get_counts(self, team):
+        team = Team.objects.get(id=team.id)
+        return team.no_of_mens_players, team.no_of_womens_players
+
+    def test_counts_follow_the_players(self):
+        player = create_player(self.teams[0])
+        self.assertEqual(self.get_counts(self.teams[0]), (1, 0))
+
+        player.gender = 'W'
+        player.save()
+        self.assertEqual(self.get_counts(self.teams[0]), (0, 1))
+
+        player.team = self.teams[1]
+        player.save()
+        self.assertEqual(self.get_counts(self.teams[0]), (0, 0))
+        self.assertEqual(self.get_counts(self.teams[1]), (0, 1))
+
+        player.delete()
+        self.assertEqual(self.get_counts(self.teams[1]), (0, 0))
+
+    def test_counts_are_backfilled_on_migrate(self):
+        create_player(self.teams[0])
+        create_player(self.teams[0], gender='W')
+        # e.g. teams that existed before the counts
+        Team.objects.update(no_of_mens_players=0, no_of_womens_players=0)
+
+        create_default_teams(sender=apps.get_app_config('team'))
+
+        self.assertEqual(self.get_counts(self.teams[0]), (1, 1))
+        response = APIClient().get('/team/get/')
+        team = next(team for team in response.data['data'] if team['id'] == self.teams[0].id)
+        self.assertTrue(team['has_mens_team'] and team['has_womens_team'])
@@ -1,5 +1,5 @@
 from django.urls import path
-from team.views import create_team, update_team, get_teams, get_team, get_mens_players_in_team, get_womens_players_in_team, get_team_stats, get_mens_team_stats, get_womens_team_stats
+from team.views import create_team, update_team, get_teams, get_team, get_mens_players_in_team, get_womens_players_in_team, get_team_stats, get_mens_team_stats, get_womens_team_stats, get_head_to_head
 
 
 urlpatterns = [
@@ -12,4 +12,5 @@ urlpatterns = [
     path('team/stats/get', get_team_stats, name='get_team_stats'),
     path('team/mens_stats/get', get_mens_team_stats, name='get_mens_team_stats'),
     path('team/womens_stats/get', get_womens_team_stats, name='get_womens_team_stats'),
+    path('team/head_to_head/get', get_head_to_head, name='get_head_to_head'),
 ]
\ No newline at end of file
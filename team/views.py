@@ -9,7 +9,9 @@ from player.serializers import PlayerSerializer
 from team.models import Team
 from team.serializers import TeamSerializer
 from django.db.models import Q, F, Sum
-from fixture.models import Competition, MatchEvent, Season, Match, Goal, Stage
+from fixture.models import Competition, MatchEvent, Season, Match, Goal, Stage, TeamForm
+from fixture.head_to_head import get_head_to_head_records, get_matches_between
+from fixture.serializers import CompetitionSerializer, MatchSerializer
 
 
 
@@ -81,10 +83,6 @@ def get_teams(request):
         A response object containing a JSON object and a status code. The JSON object contains a message and a list of teams.
     """
         
-    womens_teams = Team.objects.filter(
-        Q(players__gender='W') & ~Q(players=None)
-    ).distinct()
-    
     teams = []
     
     for team in Team.objects.all():
@@ -96,7 +94,8 @@ def get_teams(request):
             'cover_photo_url': team.cover_photo_url.url if team.cover_photo_url else '',  # Extract URL from CloudinaryResource
             'color': team.color,
             'twitter_url': team.twitter_url,
-            'has_womens_team': team in womens_teams,
+            'has_mens_team': team.has_mens_team,
+            'has_womens_team': team.has_womens_team,
         }
         
         teams.append(team)
@@ -130,7 +129,9 @@ def get_team(request):
         return Response({'message': 'Team not found'}, status=status.HTTP_404_NOT_FOUND)
 
     serializer = TeamSerializer(team)
-    return Response({'message': 'Team retrieved successfully', 'data': serializer.data}, status=status.HTTP_200_OK)
+    team_data = serializer.data
+    team_data['forms'] = get_team_forms(team)
+    return Response({'message': 'Team retrieved successfully', 'data': team_data}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -316,9 +317,93 @@ def get_team_stats(request):
 
 
 
+@api_view(['GET'])
+def get_head_to_head(request):
+    """Get the head-to-head record of two teams: their all-time record, their record in each competition, and their most recent meetings. The records are read from the precomputed HeadToHead table, which is updated whenever a match between the teams ends.
+
+    Args:
+    request: A get request. The request must contain the following fields:
+    team_1_id: The id of the first team. The records are given from this team's point of view.
+    team_2_id: The id of the second team.
+    The request can contain the following field:
+    limit: The number of recent meetings to include. Defaults to 5.
+
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and the head-to-head record.
+    """
+    team_1_id = request.query_params.get('team_1_id')
+    team_2_id = request.query_params.get('team_2_id')
+
+    if not team_1_id or not team_2_id:
+        return Response({'message': 'Both team IDs are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        team_1_id = int(team_1_id)
+        team_2_id = int(team_2_id)
+        limit = min(int(request.query_params.get('limit', 5)), 20)
+    except ValueError:
+        return Response({'message': 'Invalid Team ID or limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if limit < 1:
+        return Response({'message': 'Limit must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if team_1_id == team_2_id:
+        return Response({'message': 'The two teams must be different'}, status=status.HTTP_400_BAD_REQUEST)
+
+    teams = Team.objects.in_bulk([team_1_id, team_2_id])
+
+    if len(teams) != 2:
+        return Response({'message': 'Team not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    records = get_head_to_head_records(team_1_id, team_2_id)
+
+    all_time = {'matches_played': 0, 'team_1_wins': 0, 'team_2_wins': 0, 'draws': 0, 'team_1_goals': 0, 'team_2_goals': 0}
+    for record in records:
+        for key in all_time:
+            all_time[key] += record[key]
+        record['competition'] = CompetitionSerializer(record['competition']).data
+
+    recent_meetings = get_matches_between(team_1_id, team_2_id).filter(has_ended=True).select_related(
+        'home_team', 'away_team', 'match_day__season', 'competition', 'referee', 'stage'
+    ).order_by('-match_day__date', '-match_time')[:limit]
+
+    head_to_head = {
+        'team_1': TeamSerializer(teams[team_1_id]).data,
+        'team_2': TeamSerializer(teams[team_2_id]).data,
+        'all_time': all_time,
+        'by_competition': records,
+        'recent_meetings': MatchSerializer(recent_meetings, many=True).data,
+    }
+
+    return Response({'message': 'Head-to-head retrieved successfully', 'data': head_to_head}, status=status.HTTP_200_OK)
+
 
 # HELPER FUNCTIONS
 
+def get_team_forms(team):
+    """Get a team's form in each competition of the latest season. See fixture.form.
+
+    Args:
+        team: The team whose form is to be retrieved.
+
+    Returns:
+        A list of dictionaries, one per competition, with the competition, the form string (e.g. 'WWDLW') and the results it is made of.
+    """
+    team_forms = TeamForm.objects.filter(
+        team=team,
+        season=Season.objects.order_by('-start_date').first(),
+    ).select_related('competition')
+
+    return [
+        {
+            'competition': CompetitionSerializer(team_form.competition).data,
+            'form': team_form.form,
+            'results': team_form.results,
+        }
+        for team_form in team_forms
+    ]
+
+
 def get_team_no_of_wins(team_id):
     """Get the number of matches won by a team.
 
@@ -371,7 +456,7 @@ def get_team_no_of_goals_scored(team_id):
     
     team = Team.objects.get(id=team_id)
 
-    no_of_goals_scored = Goal.objects.filter(scoring_team=team).count()
+    no_of_goals_scored = Goal.objects.filter(match_event__team=team).count()
 
     return no_of_goals_scored
 
@@ -483,7 +568,7 @@ def get_team_no_of_goals_scored_by_gender(team_id, gender):
     team = Team.objects.get(id=team_id)
 
     no_of_goals_scored = Goal.objects.filter(
-        Q(scoring_team=team) &
+        Q(match_event__team=team) &
         Q(match_event__match__competition__gender=gender)
     ).count()
 
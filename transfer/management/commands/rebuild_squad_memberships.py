@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from player.models import Player
+from transfer.squads import rebuild_squad_memberships
+
+
+class Command(BaseCommand):
+    help = "Rebuild every player's squad memberships from their transfers and current team. Memberships are updated automatically when players and transfers are saved, so this is only needed for players and transfers created before memberships existed."
+
+    def handle(self, *args, **options):
+        player_ids = list(Player.objects.values_list('id', flat=True))
+
+        for player_id in player_ids:
+            rebuild_squad_memberships(player_id)
+
+        self.stdout.write(f'Rebuilt the squad memberships of {len(player_ids)} player(s)')
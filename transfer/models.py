@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 # Create your models here.
 class Transfer (models.Model):
@@ -8,4 +10,50 @@ class Transfer (models.Model):
     date = models.DateField(auto_now_add=True)
     
     def __str__(self):
-        return self.player.first_name + ' ' + self.player.last_name + ' moved from ' + self.from_team.name + ' to ' + self.to_team.name + ' on ' + self.date
\ No newline at end of file
+        return self.player.first_name + ' ' + self.player.last_name + ' moved from ' + self.from_team.name + ' to ' + self.to_team.name + ' on ' + self.date
+    
+    class Meta:
+        ordering = ['-date', '-id']
+        # transfer histories are read newest first, by player, by team and by date (see transfer.views.get_transfer_history)
+        indexes = [
+            models.Index(fields=['player', '-date', '-id']),
+            models.Index(fields=['from_team', '-date', '-id']),
+            models.Index(fields=['to_team', '-date', '-id']),
+            models.Index(fields=['-date', '-id']),
+        ]
+
+
+class SquadMembership(models.Model):
+    """A period a player spent in a team's squad, from start_date up to, but not including, end_date. The periods are built from the player's transfers and are recomputed whenever one of them changes, so the team a player played for on any date is one indexed lookup. See transfer.squads.
+    """
+    
+    player = models.ForeignKey('player.Player', related_name='squad_memberships', on_delete=models.CASCADE)
+    team = models.ForeignKey('team.Team', related_name='squad_memberships', on_delete=models.CASCADE)
+    # None if the player was in the team before their first recorded transfer
+    start_date = models.DateField(null=True, blank=True, default=None)
+    # None if the player is still in the team
+    end_date = models.DateField(null=True, blank=True, default=None)
+    
+    def __str__(self):
+        return self.player.first_name + ' ' + self.player.last_name + ' - ' + self.team.name + ' (' + str(self.start_date or '') + ' - ' + str(self.end_date or '') + ')'
+    
+    class Meta:
+        ordering = ['player', 'start_date']
+        indexes = [
+            models.Index(fields=['team', 'start_date', 'end_date']),
+            models.Index(fields=['player', 'start_date', 'end_date']),
+        ]
+
+
+@receiver(post_save, sender=Transfer)
+@receiver(post_delete, sender=Transfer)
+def update_squad_memberships_for_transfer(sender, instance, **kwargs):
+    from transfer.squads import rebuild_squad_memberships
+    rebuild_squad_memberships(instance.player_id)
+
+
+# A player who has never been transferred is in their current team's squad, so that squad changes when the player is created or moved by hand
+@receiver(post_save, sender='player.Player')
+def update_squad_memberships_for_player(sender, instance, **kwargs):
+    from transfer.squads import rebuild_squad_memberships
+    rebuild_squad_memberships(instance.id)
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from ashesi_premier_league.loader import BatchedListSerializer
+from fixture.serializers import get_player_summary
 from player.serializers import PlayerSerializer
 from team.serializers import TeamSerializer
 from transfer.models import Transfer
@@ -7,6 +9,12 @@ class TransferSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transfer
         fields = '__all__'
+        list_serializer_class = BatchedListSerializer
+        
+    @classmethod
+    def prime_relations(cls, transfers, loader):
+        loader.load_related(transfers, 'player', 'from_team', 'to_team')
+        PlayerSerializer.prime_relations([transfer.player for transfer in transfers if transfer.player is not None], loader)
         
     # set the from team to player's current team
     def create(self, validated_data):
@@ -26,4 +34,18 @@ class TransferSerializer(serializers.ModelSerializer):
         if data['player'].team.id == data['to_team'].id:
             raise serializers.ValidationError('A player cannot be transferred to the same team he/she is already in')
         
-        return data
\ No newline at end of file
+        return data
+    
+    
+class TransferHistorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Transfer
+        fields = '__all__'
+    
+    def to_representation(self, instance):
+        # A summary of the player instead of PlayerSerializer, which counts the player's goals. Load the player's position and both teams with select_related, so that no query is made per transfer.
+        representation = super().to_representation(instance)
+        representation['player'] = get_player_summary(instance.player)
+        representation['from_team'] = TeamSerializer(instance.from_team).data if instance.from_team else None
+        representation['to_team'] = TeamSerializer(instance.to_team).data
+        return representation
@@ -0,0 +1,116 @@
+# squads.py
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from player.models import Player
+from transfer.models import SquadMembership, Transfer
+
+
+def get_squad_intervals(player_id, current_team_id, current_team_since=None):
+    """Work out the periods a player spent in each team from their transfers, oldest first. A player with no transfers has been in their current team all along.
+    A player's team can also be changed by hand (see player.views.update_player) after their last transfer. Their current team then takes over from the team of the last transfer on current_team_since.
+
+    Args:
+        player_id: The id of the player.
+        current_team_id: The id of the player's current team, or None.
+        current_team_since: The date the player's team was changed by hand, if it was. It's optional. By default it's today.
+
+    Returns:
+        A list of (team id, start date, end date) tuples. The first start date and the last end date are None.
+    """
+    transfers = list(Transfer.objects.filter(player_id=player_id).order_by('date', 'id').values_list('from_team_id', 'to_team_id', 'date'))
+
+    if not transfers:
+        return [(current_team_id, None, None)] if current_team_id else []
+
+    intervals = []
+    team_id, start_date = transfers[0][0], None
+
+    for from_team_id, to_team_id, date in transfers:
+        # a player transferred twice in a day only counts for the team they ended the day at
+        if team_id is not None and start_date != date:
+            intervals.append((team_id, start_date, date))
+        team_id, start_date = to_team_id, date
+
+    if team_id != current_team_id:
+        # the change isn't dated, so it can't be earlier than the last transfer
+        change_date = max(current_team_since or timezone.localdate(), start_date)
+        if team_id is not None and start_date != change_date:
+            intervals.append((team_id, start_date, change_date))
+        team_id, start_date = current_team_id, change_date
+
+    if team_id is not None:
+        intervals.append((team_id, start_date, None))
+
+    return intervals
+
+
+def rebuild_squad_memberships(player_id):
+    """Recompute a player's squad memberships from their transfers and current team. Nothing is written if they haven't changed, so this is cheap to call whenever the player or one of their transfers is saved.
+
+    Args:
+        player_id: The id of the player.
+    """
+    current_team_id = Player.objects.filter(id=player_id).values_list('team_id', flat=True).first()
+    memberships = list(SquadMembership.objects.filter(player_id=player_id).order_by('start_date').values_list('team_id', 'start_date', 'end_date'))
+
+    # a team change made by hand is dated the first time it's seen, and keeps that date when the memberships are rebuilt later
+    current_team_since = next((start_date for team_id, start_date, end_date in memberships if team_id == current_team_id and end_date is None), None)
+    intervals = get_squad_intervals(player_id, current_team_id, current_team_since)
+
+    # order_by puts a None start date first on some databases and last on others, so both are compared sorted the same way
+    def sort_key(interval):
+        return (interval[1] is not None, interval[1])
+
+    if sorted(memberships, key=sort_key) == sorted(intervals, key=sort_key):
+        return
+
+    with transaction.atomic():
+        SquadMembership.objects.filter(player_id=player_id).delete()
+        SquadMembership.objects.bulk_create([
+            SquadMembership(player_id=player_id, team_id=team_id, start_date=start_date, end_date=end_date)
+            for team_id, start_date, end_date in intervals
+        ])
+
+    from stats.career import invalidate_player_careers
+    invalidate_player_careers([player_id])
+
+
+def on_date(date, prefix=''):
+    """Get a filter for the squad memberships that cover a date. Use prefix to filter another model through its memberships, e.g. 'squad_memberships__'."""
+    return (
+        (Q(**{prefix + 'start_date__isnull': True}) | Q(**{prefix + 'start_date__lte': date})) &
+        (Q(**{prefix + 'end_date__isnull': True}) | Q(**{prefix + 'end_date__gt': date}))
+    )
+
+
+def get_squad_on(team_ids, date):
+    """Get the players who were in some teams' squads on a date, e.g. the two teams of a match on its match day. This is a single indexed query.
+    A player with no memberships yet, e.g. one created before memberships were recorded and not saved since, counts for their current team until manage.py rebuild_squad_memberships is run.
+
+    Args:
+        team_ids: A list of team ids.
+        date: The date.
+
+    Returns:
+        A queryset of players, each annotated with the id of the team they were in as squad_team_id.
+    """
+    return Player.objects.filter(
+        Q(on_date(date, 'squad_memberships__'), squad_memberships__team_id__in=team_ids) |
+        Q(squad_memberships__isnull=True, team_id__in=team_ids)
+    ).annotate(squad_team_id=Coalesce('squad_memberships__team_id', 'team_id'))
+
+
+def get_player_team_on(player_id, date):
+    """Get the team a player was in on a date, or None if they weren't in a team. A player with no memberships yet counts for their current team, as in get_squad_on."""
+    membership = SquadMembership.objects.filter(on_date(date), player_id=player_id).select_related('team').first()
+
+    if membership is not None:
+        return membership.team
+
+    if SquadMembership.objects.filter(player_id=player_id).exists():
+        return None
+
+    player = Player.objects.filter(id=player_id).select_related('team').first()
+    return player.team if player else None
@@ -1,3 +1,127 @@
+import datetime
 from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.test import APIClient
+from ashesi_premier_league.testing import create_player, get_teams
+from transfer.models import SquadMembership, Transfer
+from transfer.squads import get_player_team_on, get_squad_on, rebuild_squad_memberships
 
-# Create your tests here.
+
+class SquadMembershipTests(TestCase):
+
+    def setUp(self):
+        self.teams = get_teams(3)
+        self.player = create_player(self.teams[0])
+        self.transfer_date = datetime.date(2023, 10, 1)
+
+        transfer = Transfer.objects.create(player=self.player, from_team=self.teams[0], to_team=self.teams[1])
+        # the date is set on creation, so it's moved back afterwards
+        Transfer.objects.filter(id=transfer.id).update(date=self.transfer_date)
+        self.player.team = self.teams[1]
+        self.player.save()
+        rebuild_squad_memberships(self.player.id)
+
+    def test_transfers_are_followed(self):
+        self.assertEqual(get_player_team_on(self.player.id, self.transfer_date - datetime.timedelta(days=1)), self.teams[0])
+        self.assertEqual(get_player_team_on(self.player.id, self.transfer_date), self.teams[1])
+        self.assertEqual(get_player_team_on(self.player.id, timezone.localdate()), self.teams[1])
+
+    def test_a_team_changed_by_hand_after_the_last_transfer_is_kept(self):
+        self.player.team = self.teams[2]
+        self.player.save()
+
+        today = timezone.localdate()
+        self.assertEqual(get_player_team_on(self.player.id, self.transfer_date), self.teams[1])
+        self.assertEqual(get_player_team_on(self.player.id, today), self.teams[2])
+
+        # rebuilding later keeps the date the change was first seen
+        rebuild_squad_memberships(self.player.id)
+        self.assertEqual(get_player_team_on(self.player.id, today - datetime.timedelta(days=1)), self.teams[1])
+        self.assertEqual(get_player_team_on(self.player.id, today), self.teams[2])
+
+
+class PlayersWithoutMembershipsTests(TestCase):
+    """Players created before squad memberships were recorded have none until they're saved again or the memberships are rebuilt."""
+
+    def setUp(self):
+        self.teams = get_teams(2)
+        self.player = create_player(self.teams[0])
+        SquadMembership.objects.all().delete()
+        self.date = datetime.date(2023, 10, 1)
+
+    def test_they_count_for_their_current_team(self):
+        self.assertEqual(list(get_squad_on([self.teams[0].id], self.date)), [self.player])
+        self.assertEqual(get_squad_on([self.teams[0].id], self.date).get().squad_team_id, self.teams[0].id)
+        self.assertFalse(get_squad_on([self.teams[1].id], self.date).exists())
+        self.assertEqual(get_player_team_on(self.player.id, self.date), self.teams[0])
+
+    def test_their_memberships_take_over_once_rebuilt(self):
+        rebuild_squad_memberships(self.player.id)
+        other_player = create_player(self.teams[1])
+
+        self.assertEqual(list(get_squad_on([self.teams[0].id], self.date)), [self.player])
+        self.assertEqual(list(get_squad_on([self.teams[1].id], self.date)), [other_player])
+
+
+class TransferHistoryTests(TestCase):
+
+    def setUp(self):
+        self.teams = get_teams(2)
+        self.player = create_player(self.teams[0])
+        self.transfers = []
+
+        # three transfers on each of two days, so pages split days with more than one transfer
+        for date in (datetime.date(2023, 10, 1), datetime.date(2023, 11, 1)):
+            for number in range(3):
+                transfer = Transfer.objects.create(player=self.player, from_team=self.teams[number % 2], to_team=self.teams[(number + 1) % 2])
+                Transfer.objects.filter(id=transfer.id).update(date=date)
+                self.transfers.append(transfer)
+
+    def get_page(self, cursor=None):
+        params = {'player_id': self.player.id, 'page_size': 4}
+        if cursor:
+            params['cursor'] = cursor
+        return APIClient().get('/player/transfer/player/get', params)
+
+    def test_pages_are_newest_first_without_gaps_or_repeats(self):
+        first_page = self.get_page()
+        self.assertEqual(first_page.status_code, 200)
+
+        # a transfer made while paging through goes on the first page, so the next page doesn't change
+        Transfer.objects.create(player=self.player, from_team=self.teams[0], to_team=self.teams[1])
+
+        second_page = self.get_page(first_page.data['next_cursor'])
+        self.assertIsNone(second_page.data['next_cursor'])
+
+        ids = [transfer['id'] for transfer in first_page.data['data'] + second_page.data['data']]
+        newest_first = [transfer.id for transfer in self.transfers[3:][::-1] + self.transfers[:3][::-1]]
+        self.assertEqual(ids, newest_first)
+
+    def test_invalid_cursors_are_rejected(self):
+        for cursor in ('not-a-cursor', urlsafe_base64_encode(b'2023-10-01'), urlsafe_base64_encode(b'yesterday:1')):
+            response = self.get_page(cursor)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data['message'], 'Invalid cursor')
+
+
+class CreateTransferTests(TestCase):
+
+    def test_the_player_is_moved_to_the_new_team(self):
+        teams = get_teams(2)
+        player = create_player(teams[0])
+
+        response = APIClient().post('/player/transfer/create/', {'player': player.id, 'to_team': teams[1].id}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        player.refresh_from_db()
+        self.assertEqual(player.team, teams[1])
+        self.assertEqual(Transfer.objects.get(player=player).from_team, teams[0])
+
+        # the player is now in the new team
+        response = APIClient().post('/player/transfer/create/', {'player': player.id, 'to_team': teams[1].id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_players_are_rejected(self):
+        response = APIClient().post('/player/transfer/create/', {'player': 'Kofi', 'to_team': get_teams(1)[0].id}, format='json')
+        self.assertEqual(response.status_code, 400)
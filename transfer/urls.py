@@ -1,7 +1,13 @@
 from django.urls import path
-from transfer.views import create_transfer, get_transfers
+from transfer.views import create_transfer, get_transfers, get_player_transfers, get_team_transfers, get_window_transfers, get_team_squad_on_date, get_player_team_on_date
 
 urlpatterns = [
     path('player/transfer/create/', create_transfer, name='create_transfer'),
-    path('player/transfer/get/', get_transfers, name='get_transfers'),   
+    path('player/transfer/get/', get_transfers, name='get_transfers'),
+    path('player/transfer/player/get', get_player_transfers, name='get_player_transfers'),
+    path('player/transfer/team/get', get_team_transfers, name='get_team_transfers'),
+    path('player/transfer/window/get', get_window_transfers, name='get_window_transfers'),
+    
+    path('team/squad/get', get_team_squad_on_date, name='get_team_squad_on_date'),
+    path('player/team/get', get_player_team_on_date, name='get_player_team_on_date'),
 ]
\ No newline at end of file
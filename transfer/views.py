@@ -1,5 +1,9 @@
+import datetime
 from django.utils import timezone
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
@@ -7,7 +11,10 @@ from player.models import Player, PlayerPosition
 from player.serializers import PlayerSerializer, PlayerPositionSerializer
 from team.models import Team
 from transfer.models import Transfer
-from transfer.serializers import TransferSerializer
+from transfer.squads import get_player_team_on, get_squad_on
+from fixture.serializers import get_player_summary
+from team.serializers import TeamSerializer
+from transfer.serializers import TransferHistorySerializer, TransferSerializer
 
 @api_view(['POST'])
 def create_transfer(request):
@@ -24,21 +31,27 @@ def create_transfer(request):
         A response object containing a JSON object and a status code. The JSON object contains a message and a list of errors if any. The message is either 'Transfer created successfully' or 'Transfer creation failed'.
     """
     
-    serializer = TransferSerializer(data=request.data)
+    with transaction.atomic():
+        # Lock the player before the serializer reads their team, so two transfers of the same player can't both move them
+        try:
+            Player.objects.select_for_update().filter(id=int(request.data.get('player'))).first()
+        except (TypeError, ValueError):
+            # the serializer reports the invalid player
+            pass
         
-    if serializer.is_valid():
-        serializer.save()
+        serializer = TransferSerializer(data=request.data)
         
-        # Update the player's team
-        player = Player.objects.get(id=request.data['player'])
-        to_team = Team.objects.get(id=request.data['to_team'])
-        player.team = to_team
-        player.save()
+        if not serializer.is_valid():
+            return Response({'message': 'Transfer creation failed', 'errors': str(serializer.errors)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({'message': 'Transfer created successfully'}, status=status.HTTP_201_CREATED)
-    
-    else:
-        return Response({'message': 'Transfer creation failed', 'errors': str(serializer.errors)}, status=status.HTTP_400_BAD_REQUEST)
+        transfer = serializer.save()
+        
+        # Update the player's team. The player and team were loaded by the serializer, so no further queries are needed to find them.
+        player = transfer.player
+        player.team = transfer.to_team
+        player.save(update_fields=['team'])
+        
+    return Response({'message': 'Transfer created successfully'}, status=status.HTTP_201_CREATED)
     
     
 @api_view(['GET'])
@@ -52,6 +65,208 @@ def get_transfers(request):
         A response object containing a JSON object and a status code. The JSON object contains a message and a list of transfers.
     """
     
-    transfers = Transfer.objects.all()
+    transfers = Transfer.objects.select_related('player__position', 'player__team', 'from_team', 'to_team')
     serializer = TransferSerializer(transfers, many=True)
-    return Response({'message': 'Transfers retrieved successfully', 'data': serializer.data}, status=status.HTTP_200_OK)
\ No newline at end of file
+    return Response({'message': 'Transfers retrieved successfully', 'data': serializer.data}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_player_transfers(request):
+    """Get a player's transfers, newest first, a page at a time. See get_transfer_history for the pagination.
+    
+    Args:
+    A get request. The request must contain the following fields:
+    player_id: The id of the player.
+    cursor: The next_cursor of the previous page. Leave it out to get the first page.
+    page_size: The number of transfers per page. Defaults to 20, up to a maximum of 100.
+    """
+    
+    player_id = request.query_params.get('player_id')
+    
+    if not player_id:
+        return Response({'message': 'Player ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        player_id = int(player_id)
+    except ValueError:
+        return Response({'message': 'Invalid Player ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return get_transfer_history(request, Q(player_id=player_id))
+
+
+@api_view(['GET'])
+def get_team_transfers(request):
+    """Get the transfers in and out of a team, newest first, a page at a time. See get_transfer_history for the pagination.
+    
+    Args:
+    A get request. The request must contain the following fields:
+    team_id: The id of the team.
+    direction: 'in' for the players who joined the team, 'out' for the players who left it. Defaults to both.
+    cursor: The next_cursor of the previous page. Leave it out to get the first page.
+    page_size: The number of transfers per page. Defaults to 20, up to a maximum of 100.
+    """
+    
+    team_id = request.query_params.get('team_id')
+    direction = request.query_params.get('direction')
+    
+    if not team_id:
+        return Response({'message': 'Team ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        team_id = int(team_id)
+    except ValueError:
+        return Response({'message': 'Invalid Team ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if direction == 'in':
+        filters = Q(to_team_id=team_id)
+    elif direction == 'out':
+        filters = Q(from_team_id=team_id)
+    elif not direction:
+        filters = Q(to_team_id=team_id) | Q(from_team_id=team_id)
+    else:
+        return Response({'message': "Direction must be 'in' or 'out'"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return get_transfer_history(request, filters)
+
+
+@api_view(['GET'])
+def get_window_transfers(request):
+    """Get the transfers made during a transfer window, newest first, a page at a time. See get_transfer_history for the pagination.
+    
+    Args:
+    A get request. The request must contain the following fields:
+    from_date: The first day of the window (YYYY-MM-DD).
+    to_date: The last day of the window (YYYY-MM-DD).
+    cursor: The next_cursor of the previous page. Leave it out to get the first page.
+    page_size: The number of transfers per page. Defaults to 20, up to a maximum of 100.
+    """
+    
+    try:
+        from_date = datetime.date.fromisoformat(request.query_params.get('from_date', ''))
+        to_date = datetime.date.fromisoformat(request.query_params.get('to_date', ''))
+    except ValueError:
+        return Response({'message': 'From date and to date are required, as YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if from_date > to_date:
+        return Response({'message': 'From date must not be after to date'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return get_transfer_history(request, Q(date__gte=from_date, date__lte=to_date))
+
+
+@api_view(['GET'])
+def get_team_squad_on_date(request):
+    """Get the players who were in a team's squad on a date, e.g. for the report of an old match. Players transferred since then are listed under the team they were in on that date. See transfer.squads.
+    
+    Args:
+    A get request. The request must contain the following fields:
+    team_id: The id of the team.
+    date: The date (YYYY-MM-DD). Defaults to today.
+    
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and a list of players.
+    """
+    
+    team_id = request.query_params.get('team_id')
+    
+    if not team_id:
+        return Response({'message': 'Team ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        team_id = int(team_id)
+        date = datetime.date.fromisoformat(request.query_params['date']) if request.query_params.get('date') else timezone.now().date()
+    except ValueError:
+        return Response({'message': 'Invalid Team ID or date'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not Team.objects.filter(id=team_id).exists():
+        return Response({'message': 'Team not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    players = get_squad_on([team_id], date).select_related('position').order_by('last_name', 'first_name')
+    
+    return Response({'message': 'Squad retrieved successfully', 'data': [get_player_summary(player) for player in players]}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_player_team_on_date(request):
+    """Get the team a player was in on a date. See transfer.squads.
+    
+    Args:
+    A get request. The request must contain the following fields:
+    player_id: The id of the player.
+    date: The date (YYYY-MM-DD). Defaults to today.
+    
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message and the team.
+    """
+    
+    player_id = request.query_params.get('player_id')
+    
+    if not player_id:
+        return Response({'message': 'Player ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        player_id = int(player_id)
+        date = datetime.date.fromisoformat(request.query_params['date']) if request.query_params.get('date') else timezone.now().date()
+    except ValueError:
+        return Response({'message': 'Invalid Player ID or date'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    team = get_player_team_on(player_id, date)
+    
+    if team is None:
+        return Response({'message': 'Player was not in a team on this date'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({'message': 'Team retrieved successfully', 'data': TeamSerializer(team).data}, status=status.HTTP_200_OK)
+
+
+# HELPER FUNCTIONS
+def encode_transfer_cursor(transfer):
+    """Encode the position of a transfer in a history, e.g. 'MjAyNC0wMS0xNTo0Mg' for the transfer with id 42 made on 2024-01-15."""
+    return urlsafe_base64_encode(f'{transfer.date.isoformat()}:{transfer.id}'.encode())
+
+
+def decode_transfer_cursor(cursor):
+    """Decode a cursor made by encode_transfer_cursor.
+    
+    Returns:
+        A tuple of (date, id). Raises a ValueError if the cursor is invalid.
+    """
+    try:
+        date, id = urlsafe_base64_decode(cursor).decode().split(':')
+        return datetime.date.fromisoformat(date), int(id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def get_transfer_history(request, filters):
+    """Get a page of transfers, newest first. This is a helper function. It's used by get_player_transfers, get_team_transfers and get_window_transfers.
+    Pages are found with a cursor, the position of the last transfer of the previous page, rather than an offset. Each page is a single indexed query that starts where the previous one ended, however far back the history goes, and transfers made while a client pages through don't shift the pages.
+    
+    Args:
+    request: The get request. It can contain a cursor and a page size.
+    filters: A Q object selecting the transfers in the history.
+    
+    Returns:
+        A response object containing a JSON object and a status code. The JSON object contains a message, a page of transfers and the cursor of the next page, which is None on the last page.
+    """
+    
+    params = request.query_params
+    
+    try:
+        page_size = min(max(int(params.get('page_size', 20)), 1), 100)
+    except ValueError:
+        return Response({'message': 'Invalid page size'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    transfers = Transfer.objects.filter(filters).select_related('player__position', 'from_team', 'to_team').order_by('-date', '-id')
+    
+    if params.get('cursor'):
+        try:
+            date, id = decode_transfer_cursor(params.get('cursor'))
+        except ValueError:
+            return Response({'message': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        transfers = transfers.filter(Q(date__lt=date) | Q(date=date, id__lt=id))
+    
+    # one transfer more than the page, to know whether there is a next page
+    transfers = list(transfers[:page_size + 1])
+    next_cursor = encode_transfer_cursor(transfers[page_size - 1]) if len(transfers) > page_size else None
+    
+    serializer = TransferHistorySerializer(transfers[:page_size], many=True)
+    return Response({'message': 'Transfers retrieved successfully', 'data': serializer.data, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)